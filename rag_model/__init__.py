@@ -0,0 +1,6 @@
+"""
+Serving-side building blocks for the RAG model (retrieval backends and helpers).
+
+Modules are imported explicitly (e.g. ``from rag_model.local_index import LocalVectorIndex``)
+so the served container only pays for what the model actually uses.
+"""
@@ -0,0 +1,155 @@
+"""
+Precomputed answers for high-frequency questions, served without retrieval or chat calls.
+
+A precompute job runs the RAG model offline over the head queries (or every ``Topic``) and saves
+the answers together with the source table version they were generated from. The served model
+checks the table first: an exact match on the normalized query, then the nearest precomputed query
+by term overlap (Jaccard over BM25-analyzed terms) above ``min_similarity``.
+
+Snapshots are one JSON file. ``/Volumes/...`` paths are read through the Databricks Files API when
+the volume is not mounted (model serving), using the same service principal as Vector Search.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import pandas as pd
+
+from rag_model.lexical import analyze
+
+logger = logging.getLogger(__name__)
+
+ANSWER_FORMAT_VERSION = 1
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", str(text).lower()).split())
+
+
+def _terms(text: str) -> frozenset:
+    return frozenset(analyze(text))
+
+
+class AnswerTable:
+    def __init__(self, entries: Sequence[dict], min_similarity: float = 0.8, **metadata):
+        self.entries = [dict(entry) for entry in entries]
+        self.min_similarity = float(min_similarity)
+        self.metadata = metadata
+        self._exact = {}
+        self._terms = []
+        for position, entry in enumerate(self.entries):
+            self._exact.setdefault(normalize_query(entry["query"]), position)
+            self._terms.append(_terms(entry["query"]))
+
+    @property
+    def source_version(self):
+        return self.metadata.get("source_version")
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, query: str) -> Optional[dict]:
+        """
+        Best precomputed entry for ``query`` (with ``match`` and ``score``), or None.
+        """
+        position = self._exact.get(normalize_query(query))
+        if position is not None:
+            return {**self.entries[position], "match": "exact", "score": 1.0}
+        terms = _terms(query)
+        if not terms:
+            return None
+        best, best_score = None, 0.0
+        for position, entry_terms in enumerate(self._terms):
+            if not entry_terms:
+                continue
+            score = len(terms & entry_terms) / len(terms | entry_terms)
+            if score > best_score:
+                best, best_score = position, score
+        if best is None or best_score < self.min_similarity:
+            return None
+        return {**self.entries[best], "match": "nearest", "score": round(best_score, 4)}
+
+    def rows(self) -> list:
+        """
+        One flat row per entry (for a Delta table), tagged with the snapshot metadata.
+        """
+        return [
+            {
+                "query": entry["query"],
+                "normalized_query": normalize_query(entry["query"]),
+                "answer": entry["answer"],
+                "source_table": self.metadata.get("source_table"),
+                "source_version": self.metadata.get("source_version"),
+                "prompt_template": self.metadata.get("prompt_template"),
+                "model_uri": self.metadata.get("model_uri"),
+                "created_at": self.metadata.get("created_at"),
+            }
+            for entry in self.entries
+        ]
+
+    def to_dict(self) -> dict:
+        return {"format_version": ANSWER_FORMAT_VERSION, **self.metadata, "entries": self.entries}
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict(), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path, min_similarity: float = 0.8) -> "AnswerTable":
+        data = json.loads(_read_text(str(path)))
+        if data.get("format_version") != ANSWER_FORMAT_VERSION:
+            raise ValueError(f"Unsupported answer table format: {data.get('format_version')}")
+        entries = data.pop("entries")
+        data.pop("format_version")
+        return cls(entries, min_similarity=min_similarity, **data)
+
+
+def _read_text(path: str) -> str:
+    if os.path.exists(path) or not path.startswith("/Volumes/"):
+        return Path(path).read_text(encoding="utf-8")
+    from databricks.sdk import WorkspaceClient
+
+    host = os.getenv("DATABRICKS_HOST", "")
+    if host and not host.startswith("https://"):
+        host = f"https://{host}"
+    client = WorkspaceClient(
+        host=host,
+        azure_client_id=os.getenv("DATABRICKS_CLIENT_ID"),
+        azure_client_secret=os.getenv("DATABRICKS_CLIENT_SECRET"),
+        azure_tenant_id=os.getenv("DATABRICKS_TENANT_ID"),
+    )
+    return client.files.download(path).contents.read().decode("utf-8")
+
+
+def _answers(output) -> list:
+    if isinstance(output, pd.DataFrame):
+        return output["answer"].tolist() if "answer" in output else output.iloc[:, 0].tolist()
+    return list(output)
+
+
+def precompute_answers(predict: Callable, queries: Sequence[str], batch_size: int = 16, input_column: str = "query") -> list:
+    """
+    Run ``predict`` (a DataFrame -> answers callable, e.g. a loaded pyfunc's ``predict``) over the
+    distinct normalized ``queries``. Returns [{"query", "answer"}].
+    """
+    distinct = {}
+    for query in queries:
+        distinct.setdefault(normalize_query(query), str(query))
+    pending = list(distinct.values())
+    entries = []
+    start = time.perf_counter()
+    for offset in range(0, len(pending), batch_size):
+        batch = pending[offset : offset + batch_size]
+        answers = _answers(predict(pd.DataFrame({input_column: batch})))
+        entries.extend({"query": query, "answer": answer} for query, answer in zip(batch, answers) if answer)
+    logger.info("Precomputed %d answers in %.1fs", len(entries), time.perf_counter() - start)
+    return entries
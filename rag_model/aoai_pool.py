@@ -0,0 +1,196 @@
+"""
+Client-side load balancing over a pool of Azure OpenAI deployments (regions / accounts).
+
+Each deployment has its own client and quota limiter. A call goes to the available deployment
+with the best headroom-to-latency score that has quota right now; a 429 / 5xx / connection error
+takes the deployment out of rotation for a cooldown and the call fails over to the next one. A
+deployment is never retried before its Retry-After (else exponential backoff) has passed.
+
+Pool members come from ``RAG_AOAI_POOL_*`` env vars (one JSON object each, synced to Key Vault by
+``scripts/deploy.py``): {"name", "endpoint", "api_key", "api_version", "deployment", "capacity"}.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional, Sequence
+
+from rag_model.ratelimit import RateLimiter, RateLimitTimeout, quota_from_capacity, retry_after_s
+
+logger = logging.getLogger(__name__)
+
+POOL_ENV_PREFIX = "RAG_AOAI_POOL_"
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError")
+# Latency assumed for a deployment that has not answered yet (keeps new members in rotation).
+DEFAULT_LATENCY_S = 0.5
+
+
+def pool_configs_from_env(env=None) -> list:
+    env = os.environ if env is None else env
+    configs = []
+    for key in sorted(k for k in env if k.startswith(POOL_ENV_PREFIX)):
+        try:
+            config = json.loads(env[key])
+        except ValueError:
+            logger.error("Ignoring %s: not valid JSON.", key)
+            continue
+        config.setdefault("name", key[len(POOL_ENV_PREFIX):].lower())
+        configs.append(config)
+    return configs
+
+
+class Deployment:
+    def __init__(self, name: str, client, deployment: str, limiter: Optional[RateLimiter] = None, latency_alpha: float = 0.2):
+        self.name = name
+        self.client = client
+        self.deployment = deployment
+        self.limiter = limiter
+        self.latency_alpha = float(latency_alpha)
+        self.latency_s = None
+        self.cooldown_until = 0.0
+        # Earliest retry after a failure (Retry-After or backoff); the limiter enforces it when there is one.
+        self.retry_at = 0.0
+        self.inflight = 0
+
+    def score(self) -> float:
+        headroom = self.limiter.headroom() if self.limiter else 1.0
+        latency = self.latency_s if self.latency_s is not None else DEFAULT_LATENCY_S
+        return headroom / (max(latency, 1e-3) * (1 + self.inflight))
+
+    def record_latency(self, seconds: float) -> None:
+        if self.latency_s is None:
+            self.latency_s = seconds
+        else:
+            self.latency_s += self.latency_alpha * (seconds - self.latency_s)
+
+    def settle(self, estimated: float, actual: float) -> None:
+        if self.limiter is not None:
+            self.limiter.settle(estimated, actual)
+
+
+class DeploymentRouter:
+    def __init__(self, deployments: Sequence[Deployment], cooldown_s: float = 30.0, max_wait_s: float = 10.0):
+        if not deployments:
+            raise ValueError("DeploymentRouter needs at least one deployment.")
+        self.deployments = list(deployments)
+        self.cooldown_s = float(cooldown_s)
+        self.max_wait_s = float(max_wait_s)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_configs(cls, configs: Sequence[dict], cooldown_s: float = 30.0, max_wait_s: float = 10.0) -> "DeploymentRouter":
+        """
+        Build AzureOpenAI clients and limiters. ``rpm`` / ``tpm`` win over ``capacity`` (units);
+        with neither (or both 0) the deployment is not rate limited client-side.
+        """
+        from openai import AzureOpenAI
+
+        deployments = []
+        for config in configs:
+            rpm, tpm = config.get("rpm"), config.get("tpm")
+            if rpm is None and tpm is None and config.get("capacity"):
+                rpm, tpm = quota_from_capacity(config["capacity"])
+            limiter = RateLimiter(rpm or None, tpm or None, max_wait_s=max_wait_s) if (rpm or tpm) else None
+            client = AzureOpenAI(
+                api_key=config["api_key"],
+                api_version=config["api_version"],
+                azure_endpoint=config["endpoint"],
+                # The router owns retries and failover; SDK retries would bypass it.
+                max_retries=0,
+            )
+            deployments.append(Deployment(config.get("name") or config["deployment"], client, config["deployment"], limiter))
+        return cls(deployments, cooldown_s=cooldown_s, max_wait_s=max_wait_s)
+
+    def _candidates(self, exclude: set) -> list:
+        now = time.monotonic()
+        remaining = [d for d in self.deployments if d.name not in exclude]
+        available = [d for d in remaining if d.cooldown_until <= now]
+        if not available and remaining:
+            # Everything is cooling down: use the one that recovers first (_select waits for it).
+            available = [min(remaining, key=lambda d: d.cooldown_until)]
+        return sorted(available, key=lambda d: d.score(), reverse=True)
+
+    def _backoff(self, deployment: Deployment) -> float:
+        # Without a limiter nothing else holds a failed deployment back: sleep until its retry time.
+        delay = min(self.max_wait_s, deployment.retry_at - time.monotonic())
+        if delay <= 0:
+            return 0.0
+        time.sleep(delay)
+        return delay
+
+    def _select(self, candidates: list, tokens: float):
+        # Prefer a deployment with quota right now; otherwise queue on the best-scored one.
+        for deployment in candidates:
+            if deployment.limiter is None:
+                return deployment, self._backoff(deployment)
+            try:
+                return deployment, deployment.limiter.acquire(tokens, max_wait_s=0)
+            except RateLimitTimeout:
+                continue
+        deployment = candidates[0]
+        return deployment, deployment.limiter.acquire(tokens, max_wait_s=self.max_wait_s)
+
+    def _cool_down(self, deployment: Deployment, exc: Exception, attempt: int) -> None:
+        response = getattr(exc, "response", None)
+        retry_after = retry_after_s(getattr(response, "headers", None))
+        backoff = retry_after or min(self.cooldown_s, 2.0 ** attempt)
+        with self._lock:
+            now = time.monotonic()
+            deployment.cooldown_until = now + (retry_after or self.cooldown_s)
+            deployment.retry_at = now + backoff
+        if deployment.limiter is not None:
+            deployment.limiter.penalize(backoff)
+        logger.warning("Azure OpenAI deployment %s failed (%s); cooling down.", deployment.name, getattr(exc, "status_code", type(exc).__name__))
+
+    def call(self, fn: Callable, tokens: float = 0, max_retries: int = 3):
+        """
+        Run ``fn(deployment)`` on the best deployment, failing over on retryable errors.
+        Returns (result, deployment, seconds_waited_for_quota).
+        """
+        tried = set()
+        waited = 0.0
+        last_exc = None
+        for attempt in range(max(int(max_retries) + 1, len(self.deployments))):
+            candidates = self._candidates(tried)
+            if not candidates:
+                tried.clear()
+                candidates = self._candidates(tried)
+            deployment, wait = self._select(candidates, tokens)
+            waited += wait
+            with self._lock:
+                deployment.inflight += 1
+            start = time.perf_counter()
+            try:
+                result = fn(deployment)
+            except Exception as exc:
+                status = getattr(exc, "status_code", None)
+                if status not in RETRYABLE_STATUSES and type(exc).__name__ not in RETRYABLE_ERRORS:
+                    raise
+                self._cool_down(deployment, exc, attempt)
+                tried.add(deployment.name)
+                last_exc = exc
+                continue
+            finally:
+                with self._lock:
+                    deployment.inflight -= 1
+            deployment.record_latency(time.perf_counter() - start)
+            if deployment.limiter is not None:
+                deployment.limiter.observe_headers(getattr(result, "headers", None))
+            return result, deployment, waited
+        raise last_exc
+
+    def describe(self) -> list:
+        now = time.monotonic()
+        return [
+            {
+                "name": d.name,
+                "deployment": d.deployment,
+                "latency_ms": None if d.latency_s is None else round(d.latency_s * 1000, 1),
+                "headroom": round(d.limiter.headroom(), 3) if d.limiter else None,
+                "cooling_down_s": round(max(0.0, d.cooldown_until - now), 1),
+            }
+            for d in self.deployments
+        ]
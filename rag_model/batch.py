@@ -0,0 +1,247 @@
+"""
+Spark batch inference for the logged pyfunc RAG model.
+
+The model is wrapped in an iterator pandas UDF. Each Python worker loads the model once and keeps it
+for later tasks (``spark.python.worker.reuse``). Within a worker, rows are scored by a bounded thread
+pool, and every call first takes a slot from a rate limiter holding the worker's share of the Azure
+OpenAI quota (quota / concurrent tasks).
+
+    from rag_model.batch import score_queries
+    scored = score_queries(spark.table("cat.schema.questions"), model_uri="models:/rag_model/3",
+                           tokens_per_minute=30_000, requests_per_minute=180, env=model_env)
+
+Local mode with stub Azure OpenAI / Vector Search servers (needs pyspark + Java):
+    python -m rag_model.batch --local-demo --rows 200
+
+``tests/test_batch.py`` runs ``predict_batches`` directly and, when pyspark is installed,
+``score_queries`` on ``local[2]``.
+"""
+
+import argparse
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+import pandas as pd
+
+from rag_model.ratelimit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+_MODELS = {}
+_LIMITERS = {}
+_POOLS = {}
+_LOCK = threading.Lock()
+
+
+def load_pyfunc(model_uri: str):
+    import mlflow
+
+    return mlflow.pyfunc.load_model(model_uri)
+
+
+def _cached(cache: dict, key, factory: Callable):
+    value = cache.get(key)
+    if value is None:
+        with _LOCK:
+            value = cache.get(key)
+            if value is None:
+                value = cache[key] = factory()
+    return value
+
+
+def _answer(output) -> Optional[str]:
+    if isinstance(output, pd.DataFrame):
+        output = output.iloc[0].get("answer", output.iloc[0, 0])
+    elif isinstance(output, (list, tuple, pd.Series)):
+        output = list(output)[0]
+    if isinstance(output, dict):
+        output = output.get("answer")
+    return None if output is None else str(output)
+
+
+def predict_batches(
+    batches: Iterator[pd.Series],
+    model_loader: Callable,
+    cache_key: str,
+    input_column: str = "query",
+    max_concurrency: int = 4,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    tokens_per_query: int = 1500,
+    max_wait_s: float = 300.0,
+    env: Optional[dict] = None,
+) -> Iterator[pd.Series]:
+    """
+    Body of the pandas UDF; also callable directly (no Spark) for local checks.
+    """
+    if env:
+        os.environ.update({key: str(value) for key, value in env.items() if value is not None})
+    model = _cached(_MODELS, cache_key, model_loader)
+    limiter = None
+    if requests_per_minute or tokens_per_minute:
+        limiter = _cached(
+            _LIMITERS,
+            (cache_key, requests_per_minute, tokens_per_minute),
+            lambda: RateLimiter(requests_per_minute, tokens_per_minute, max_wait_s=max_wait_s),
+        )
+    pool = _cached(_POOLS, (cache_key, max_concurrency), lambda: ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="rag-batch"))
+
+    def score(query: str) -> Optional[str]:
+        if limiter is not None:
+            limiter.acquire(tokens_per_query)
+        return _answer(model.predict(pd.DataFrame({input_column: [query]})))
+
+    for queries in batches:
+        start = time.perf_counter()
+        answers = list(pool.map(score, queries.astype(str).tolist()))
+        logger.info("Scored %d rows in %.1fs", len(answers), time.perf_counter() - start)
+        yield pd.Series(answers, dtype="object")
+
+
+def score_queries(
+    df,
+    model_uri: Optional[str] = None,
+    model_loader: Optional[Callable] = None,
+    query_column: str = "query",
+    output_column: str = "answer",
+    num_partitions: Optional[int] = None,
+    max_concurrency_per_task: int = 4,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    tokens_per_query: int = 1500,
+    env: Optional[dict] = None,
+):
+    """
+    Add ``output_column`` to a Spark DataFrame by scoring ``query_column`` with the RAG model.
+
+    ``requests_per_minute`` / ``tokens_per_minute`` are the deployment-wide quota; each concurrently
+    running task gets an equal share. ``env`` is set on the workers before the model loads (the
+    model reads its Azure OpenAI / Databricks credentials from the environment).
+    """
+    from pyspark.sql.functions import col, pandas_udf
+
+    if model_loader is None:
+        if not model_uri:
+            raise ValueError("Pass model_uri or model_loader.")
+        model_loader = functools.partial(load_pyfunc, model_uri)
+    if num_partitions:
+        df = df.repartition(int(num_partitions))
+    try:
+        slots = df.sparkSession.sparkContext.defaultParallelism
+    except Exception:
+        # Spark Connect sessions have no SparkContext.
+        slots = num_partitions or 1
+    parallelism = min(int(num_partitions), slots) if num_partitions else slots
+    share = 1.0 / max(1, parallelism)
+
+    body = functools.partial(
+        predict_batches,
+        model_loader=model_loader,
+        cache_key=model_uri or repr(model_loader),
+        input_column=query_column,
+        max_concurrency=max(1, int(max_concurrency_per_task)),
+        requests_per_minute=requests_per_minute * share if requests_per_minute else None,
+        tokens_per_minute=tokens_per_minute * share if tokens_per_minute else None,
+        tokens_per_query=tokens_per_query,
+        env=env,
+    )
+
+    @pandas_udf("string")
+    def rag_answer(batches: Iterator[pd.Series]) -> Iterator[pd.Series]:
+        yield from body(batches)
+
+    return df.withColumn(output_column, rag_answer(col(query_column)))
+
+
+def distribute_package(spark) -> str:
+    """
+    Zip the rag_model package and add it to the executors' Python path (``addPyFile``).
+    """
+    import shutil
+    import tempfile
+    from pathlib import Path
+
+    package_dir = Path(__file__).resolve().parent
+    archive = shutil.make_archive(
+        str(Path(tempfile.mkdtemp(prefix="rag-package-")) / "rag_model"),
+        "zip",
+        root_dir=package_dir.parent,
+        base_dir=package_dir.name,
+    )
+    spark.sparkContext.addPyFile(archive)
+    return archive
+
+
+def load_stub_model(aoai_url: str, vector_search_url: str):
+    """
+    Loader for local runs: the notebook's RAGModel wired to ``rag_model.bench`` stubs.
+    """
+    import tempfile
+    from pathlib import Path
+
+    from rag_model.bench.harness import DEFAULT_CSV, DEFAULT_NOTEBOOK, build_model
+    from rag_model.local_index import read_csv_records
+
+    work_dir = Path(tempfile.mkdtemp(prefix="rag-batch-"))
+    # The stubs have no quota, and predict_batches applies the task's share of it: no model-side limiter.
+    overrides = {"AOAI_RPM": 0, "AOAI_TPM": 0}
+    model = build_model(DEFAULT_NOTEBOOK, overrides, aoai_url, vector_search_url, read_csv_records(DEFAULT_CSV), work_dir)
+
+    class _Pyfunc:
+        def predict(self, model_input):
+            return model.predict(None, model_input)
+
+    return _Pyfunc()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spark batch inference for the RAG model.")
+    parser.add_argument("--local-demo", action="store_true", help="Score seed FAQ topics in local mode against stubs")
+    parser.add_argument("--rows", type=int, default=200, help="Rows to score in the demo")
+    parser.add_argument("--partitions", type=int, default=4, help="Partitions (concurrent tasks)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent model calls per task")
+    parser.add_argument("--rpm", type=float, default=600, help="Deployment requests/minute quota")
+    parser.add_argument("--tpm", type=float, default=None, help="Deployment tokens/minute quota")
+    parser.add_argument("--aoai-latency", default="lognormal:200,0.4", help="Azure OpenAI stub latency spec (ms)")
+    args = parser.parse_args()
+    if not args.local_demo:
+        parser.error("Only --local-demo runs from the command line; use score_queries() on a cluster.")
+
+    from pyspark.sql import SparkSession
+
+    from rag_model.bench.stubs import AzureOpenAIStub, VectorSearchStub
+    from rag_model.bench.harness import DEFAULT_CSV
+    from rag_model.local_index import read_csv_records
+
+    records = read_csv_records(DEFAULT_CSV)
+    # Local-mode Python workers inherit the driver's environment.
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [repo_root, os.getenv("PYTHONPATH")]))
+    spark = SparkSession.builder.master(f"local[{args.partitions}]").appName("rag-batch-demo").getOrCreate()
+    with AzureOpenAIStub(latency=args.aoai_latency) as aoai, VectorSearchStub(records) as vs:
+        topics = [records[i % len(records)]["Topic"] for i in range(args.rows)]
+        queries = spark.createDataFrame(pd.DataFrame({"query": topics}))
+        loader = functools.partial(load_stub_model, aoai.url, vs.url)
+        start = time.perf_counter()
+        scored = score_queries(
+            queries,
+            model_loader=loader,
+            num_partitions=args.partitions,
+            max_concurrency_per_task=args.concurrency,
+            requests_per_minute=args.rpm,
+            tokens_per_minute=args.tpm,
+        ).toPandas()
+        elapsed = time.perf_counter() - start
+    print(scored.head())
+    print(f"Scored {len(scored)} rows in {elapsed:.1f}s ({len(scored) / elapsed:.1f} rows/s); Azure OpenAI stub saw {aoai.requests} calls")
+    spark.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,13 @@
+"""
+Offline load testing for the RAG serving path.
+
+- ``stubs``   : local stand-ins for /invocations, Vector Search and Azure OpenAI with latency distributions
+- ``loadgen`` : async open-loop / closed-loop load generator with p50/p95/p99 reporting
+- ``harness`` : runs the packaged RAGModel with the notebook's config against the stubs
+- ``coldstart`` : fresh-interpreter import / load_context / first-request timings of the packaged model
+- ``keepwarm`` : cold vs warm latency and replica-hours of scale-to-zero, keep-warm and provisioned serving
+- ``evaluate`` : recall@k / MRR / per-stage latency / tokens of the registration gate against the stubs or a local index
+- ``vector_search`` : query latency / QPS / sync freshness of Vector Search endpoint types and pipeline modes
+- ``hedging`` : retrieval p50/p95/p99 with and without hedged Vector Search requests against a stub with stalls
+- ``quantization`` : recall / memory / latency of quantized local index snapshots on a scaled-up FAQ corpus
+"""
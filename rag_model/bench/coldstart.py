@@ -0,0 +1,218 @@
+"""
+Cold-start benchmark for the served RAG model: a fresh interpreter per trial, like a replica
+scaling from zero.
+
+Each trial imports ``rag_model.serving`` (plus MLflow), runs ``load_context`` against the local
+stubs and times the first prediction and a few warm ones. The stubs charge ``--connect-latency``
+per new connection (TCP + TLS to the region) and the Vector Search client build charges
+``--aad-latency`` (the AAD token request), so connection setup shows up where it would in serving.
+
+Variants:
+- sequential : loads one after the other, no warm-up (the shape of the former f-string script)
+- parallel   : loads in parallel, no warm-up
+- warm       : loads in parallel, then opens connections and runs a dummy retrieval (default config)
+
+    python -m rag_model.bench.coldstart --trials 5
+    python -m rag_model.bench.coldstart --connect-latency const:150 --aad-latency const:400 --aoai-latency lognormal:800,0.4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Only the standard library at module level: the child process times the model imports itself.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+VARIANTS = ("sequential", "parallel", "warm")
+# Serving dependencies whose import cost a cold replica pays (when it needs them).
+IMPORT_MODULES = ("pandas", "numpy", "mlflow.pyfunc", "openai", "azure.identity", "databricks.vector_search.client", "databricks.sdk")
+WARM_PREDICTIONS = 5
+
+
+class _SerialExecutor(ThreadPoolExecutor):
+    def __init__(self, max_workers=None, **kwargs):
+        super().__init__(max_workers=1, **kwargs)
+
+
+def _child(spec: dict) -> dict:
+    """
+    One trial, run in a fresh interpreter (``--child``). Returns timings in seconds.
+    """
+    start = time.perf_counter()
+    import mlflow.pyfunc  # noqa: F401  (the serving container imports MLflow before the model)
+
+    mlflow_s = time.perf_counter() - start
+    import rag_model.serving as serving
+
+    import_s = time.perf_counter() - start
+    from rag_model.bench.stubs import StubVectorSearchClient
+    from rag_model.keepwarm import HEALTH_QUERY
+
+    import pandas as pd
+
+    if spec["variant"] == "sequential":
+        serving.ThreadPoolExecutor = _SerialExecutor
+    model = serving.RAGModel(dict(spec["config"], WARMUP=spec["variant"] == "warm"))
+
+    def build_vector_client():
+        time.sleep(spec["aad_latency_s"])
+        return StubVectorSearchClient(spec["vs_url"])
+
+    model._build_vector_client = build_vector_client
+    loaded_modules = sorted(name for name in IMPORT_MODULES if name in sys.modules)
+    load_start = time.perf_counter()
+    model.load_context(None)
+    load_s = time.perf_counter() - load_start
+
+    query = pd.DataFrame({"query": ["how is diabetes diagnosed?"]})
+    first_start = time.perf_counter()
+    model.predict(None, query)
+    first_s = time.perf_counter() - first_start
+    warm = []
+    for _ in range(WARM_PREDICTIONS):
+        warm_start = time.perf_counter()
+        model.predict(None, query)
+        warm.append(time.perf_counter() - warm_start)
+    to_first_answer_s = time.perf_counter() - start - sum(warm)
+    health_start = time.perf_counter()
+    model.predict(None, pd.DataFrame({"query": [HEALTH_QUERY]}))
+    health_s = time.perf_counter() - health_start
+    return {
+        "mlflow_import_s": mlflow_s,
+        "import_s": import_s,
+        "modules_after_import": loaded_modules,
+        "load_context_s": load_s,
+        "load_timings": model.load_timings,
+        "first_predict_s": first_s,
+        "warm_predict_s": statistics.median(warm),
+        "warm_predictions_s": warm,
+        "health_predict_s": health_s,
+        "to_first_answer_s": to_first_answer_s,
+    }
+
+
+def run_trial(spec: dict) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.getenv("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-m", "rag_model.bench.coldstart", "--child", json.dumps(spec)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Cold-start trial failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def import_times(modules=IMPORT_MODULES) -> dict:
+    """
+    Import time of each dependency in its own fresh interpreter (None when not installed).
+    """
+    out = {}
+    for name in modules:
+        code = f"import time; t = time.perf_counter(); import {name}; print(time.perf_counter() - t)"
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+        out[name] = float(proc.stdout.strip()) if proc.returncode == 0 else None
+    return out
+
+
+def _median(trials: list, key: str) -> float:
+    return statistics.median(trial[key] for trial in trials)
+
+
+def format_report(results: dict) -> str:
+    header = f"{'variant':<12} {'import':>8} {'load_context':>13} {'first predict':>14} {'warm predict':>13} {'to 1st answer':>14}"
+    lines = [header, "-" * len(header)]
+    for variant, trials in results.items():
+        lines.append(
+            f"{variant:<12} {_median(trials, 'import_s') * 1000:>6.0f}ms {_median(trials, 'load_context_s') * 1000:>11.0f}ms "
+            f"{_median(trials, 'first_predict_s') * 1000:>12.0f}ms {_median(trials, 'warm_predict_s') * 1000:>11.0f}ms "
+            f"{_median(trials, 'to_first_answer_s') * 1000:>12.0f}ms"
+        )
+    return "\n".join(lines)
+
+
+def measure(config: dict, records: list, variants=VARIANTS, trials: int = 3, aoai_latency: str = "const:300",
+            vs_latency: str = "const:40", connect_latency: str = "const:100", aad_latency_ms: float = 300.0) -> dict:
+    """
+    {variant: [trial timings]} with fresh-interpreter trials against local stubs.
+    """
+    from rag_model.bench.stubs import AzureOpenAIStub, VectorSearchStub
+
+    results = {}
+    with AzureOpenAIStub(latency=aoai_latency, connect_latency=connect_latency) as aoai, \
+            VectorSearchStub(records, latency=vs_latency, connect_latency=connect_latency) as vs:
+        os.environ["AZURE_OPENAI_ENDPOINT"] = aoai.url
+        os.environ["AZURE_OPENAI_API_KEY"] = "stub"
+        os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+        for variant in variants:
+            spec = {"variant": variant, "config": config, "vs_url": vs.url, "aad_latency_s": aad_latency_ms / 1000.0}
+            results[variant] = [run_trial(spec) for _ in range(trials)]
+    return results
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--notebook", default=str(REPO_ROOT / "notebooks" / "RAG.ipynb"), help="Notebook holding the log-model cell")
+    parser.add_argument("--csv", default=str(REPO_ROOT / "data" / "diabetes_treatment_faq.csv"), help="Rows served by the Vector Search stub")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Override a notebook config constant (repeatable)")
+    parser.add_argument("--trials", type=int, default=3, help="Fresh-interpreter trials per variant")
+    parser.add_argument("--aoai-latency", default="const:300", help="Azure OpenAI stub latency spec (ms)")
+    parser.add_argument("--vs-latency", default="const:40", help="Vector Search stub latency spec (ms)")
+    parser.add_argument("--connect-latency", default="const:100", help="Per-connection setup latency on the stubs (ms)")
+    parser.add_argument("--aad-latency", type=float, default=300.0, help="AAD token request when building the Vector Search client (ms)")
+
+
+def measure_from_args(args, variants) -> dict:
+    from rag_model.bench.harness import notebook_config, parse_overrides
+    from rag_model.local_index import read_csv_records
+
+    overrides = parse_overrides(args.set)
+    if not {"DEPLOYMENT_CAPACITY", "AOAI_RPM", "AOAI_TPM"} & set(overrides):
+        overrides.update(AOAI_RPM=0, AOAI_TPM=0)
+    return measure(
+        notebook_config(args.notebook, overrides),
+        read_csv_records(args.csv),
+        variants=variants,
+        trials=args.trials,
+        aoai_latency=args.aoai_latency,
+        vs_latency=args.vs_latency,
+        connect_latency=args.connect_latency,
+        aad_latency_ms=args.aad_latency,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the RAG model (fresh interpreter per trial).")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    add_stub_arguments(parser)
+    parser.add_argument("--variants", default=",".join(VARIANTS), help=f"Comma-separated: {', '.join(VARIANTS)}")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(json.loads(args.child))))
+        return 0
+
+    print("Import time per dependency (fresh interpreter):")
+    for name, seconds in import_times().items():
+        print(f"  {name:<32} {'not installed' if seconds is None else f'{seconds * 1000:.0f} ms'}")
+
+    results = measure_from_args(args, [v.strip() for v in args.variants.split(",") if v.strip()])
+    last = next(iter(results.values()))[-1]
+    print(f"Imported by 'import rag_model.serving' (with MLflow): {', '.join(last['modules_after_import'])}")
+    print(f"Cold start, median of {args.trials} trials (aoai={args.aoai_latency}, vs={args.vs_latency}, "
+          f"connect={args.connect_latency}, aad={args.aad_latency:g}ms):")
+    print(format_report(results))
+    for variant, trials in results.items():
+        timings = trials[-1]["load_timings"]
+        print(f"  {variant:<12} load steps: " + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in timings.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
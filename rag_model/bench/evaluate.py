@@ -0,0 +1,102 @@
+"""
+Offline run of the registration gate (``rag_model.evaluation``) against the local stand-ins.
+
+The model is built as in ``rag_model.bench.harness`` (the notebook's config, Vector Search and
+Azure OpenAI stubs). With ``--local-index`` it searches a local snapshot
+(``python -m rag_model.local_index``) instead of the Vector Search stub, so recall reflects real
+embeddings. Labeled queries come from the FAQ Topic column, plus ``--queries`` when given.
+
+    python -m rag_model.bench.evaluate
+    python -m rag_model.bench.evaluate --local-index /tmp/faq_index --min-recall 3=0.9 --max-p95-ms total=3000
+    python -m rag_model.bench.evaluate --baseline last_eval.json --json eval.json
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from rag_model.bench.harness import DEFAULT_CSV, DEFAULT_NOTEBOOK, build_model, parse_overrides
+from rag_model.bench.stubs import AzureOpenAIStub, VectorSearchStub
+from rag_model.evaluation import (
+    DEFAULT_K_VALUES,
+    EvaluationLimits,
+    evaluate,
+    format_report,
+    labeled_queries,
+    read_labeled_queries,
+)
+from rag_model.local_index import read_csv_records
+from rag_model.serving import LOCAL_INDEX_ENV
+
+
+def parse_limits(items, cast=float) -> dict:
+    """
+    ``["3=0.9", "5=0.95"]`` -> {"3": 0.9, "5": 0.95}
+    """
+    limits = {}
+    for item in items or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected KEY=VALUE, got {item!r}")
+        limits[key.strip()] = cast(value)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency of the notebook's RAGModel offline.")
+    parser.add_argument("--notebook", default=str(DEFAULT_NOTEBOOK), help="Notebook holding the model script")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV), help="FAQ rows (labels, and the Vector Search stub's documents)")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Override a notebook config constant (repeatable)")
+    parser.add_argument("--local-index", help="Search this local index snapshot instead of the Vector Search stub")
+    parser.add_argument("--queries", help="Extra curated queries: CSV with query,relevant[,variant] columns")
+    parser.add_argument("--k", default=",".join(str(k) for k in DEFAULT_K_VALUES), help="Comma-separated recall@k cut-offs")
+    parser.add_argument("--latency-queries", type=int, default=20, help="Full answers to time (0 skips the chat path)")
+    parser.add_argument("--aoai-latency", default="lognormal:800,0.4", help="Azure OpenAI stub latency spec (ms)")
+    parser.add_argument("--vs-latency", default="lognormal:40,0.3", help="Vector Search stub latency spec (ms)")
+    parser.add_argument("--min-recall", action="append", metavar="K=VALUE", help="Minimum recall@K (repeatable)")
+    parser.add_argument("--min-mrr", type=float, help="Minimum MRR")
+    parser.add_argument("--max-p95-ms", action="append", metavar="STAGE=MS", help="Maximum p95 of a stage (repeatable)")
+    parser.add_argument("--max-tokens-per-answer", type=float, help="Maximum prompt + completion tokens per answer")
+    parser.add_argument("--baseline", help="JSON report of a previous run (--json) to check regressions against")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    records = read_csv_records(args.csv)
+    queries = labeled_queries(records)
+    if args.queries:
+        queries += read_labeled_queries(args.queries)
+    overrides = parse_overrides(args.set)
+    overrides.setdefault("AOAI_RPM", 0)
+    overrides.setdefault("AOAI_TPM", 0)
+    if args.local_index:
+        os.environ[LOCAL_INDEX_ENV] = args.local_index
+    limits = EvaluationLimits(
+        min_recall=parse_limits(args.min_recall),
+        min_mrr=args.min_mrr,
+        max_p95_ms=parse_limits(args.max_p95_ms),
+        max_tokens_per_answer=args.max_tokens_per_answer,
+    )
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["metrics"] if args.baseline else None
+
+    with AzureOpenAIStub(latency=args.aoai_latency) as aoai, VectorSearchStub(records, latency=args.vs_latency) as vs:
+        model = build_model(args.notebook, overrides, aoai.url, vs.url, records, Path(tempfile.mkdtemp(prefix="rag-eval-")))
+        source = f"local index {args.local_index}" if args.local_index else f"Vector Search stub ({vs.latency})"
+        print(f"Evaluating {len(queries)} labeled queries against {source}; aoai={aoai.latency}")
+        report = evaluate(
+            model,
+            queries,
+            k_values=[int(k) for k in args.k.split(",")],
+            latency_queries=args.latency_queries,
+            limits=limits,
+            baseline=baseline,
+        )
+    print(format_report(report))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report.to_dict(), indent=2, default=str), encoding="utf-8")
+    return 0 if report.passed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+"""
+Run the notebook's models-from-code RAGModel against local stubs and load-test it.
+
+The model is ``rag_model.serving.RAGModel`` configured with the constants of the notebook's
+log-model cell, exactly the ``model_config`` the notebook logs, so the code under test is the code
+that gets served. Azure OpenAI and Vector Search are replaced by ``rag_model.bench.stubs`` servers with
+configurable latency; the model is served behind an ``/invocations`` stub whose concurrency models
+the endpoint ``workload_size``.
+
+    python -m rag_model.bench.harness --workload-size Small --concurrency 1,2,4,8 --duration 20
+    python -m rag_model.bench.harness --set RETRIEVAL_MODE=hybrid --rate 2,4,8 --aoai-latency lognormal:600,0.5
+    python -m rag_model.bench.harness --set DEPLOYMENT_CAPACITY=20 --aoai-pool 2 --concurrency 8,16
+"""
+
+import argparse
+import ast
+import contextlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from rag_model.answers import AnswerTable, precompute_answers
+from rag_model.aoai_pool import POOL_ENV_PREFIX
+from rag_model.bench.loadgen import add_load_arguments, run_load
+from rag_model.bench.stubs import AzureOpenAIStub, InvocationsStub, StubVectorSearchClient, VectorSearchStub
+from rag_model.lexical import BM25Index
+from rag_model.local_index import read_csv_records
+from rag_model.serving import CONFIG_DEFAULTS, METRICS, RAGModel
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_NOTEBOOK = REPO_ROOT / "notebooks" / "RAG.ipynb"
+DEFAULT_CSV = REPO_ROOT / "data" / "diabetes_treatment_faq.csv"
+# Provisioned concurrency per workload size on Databricks Model Serving (CPU).
+WORKLOAD_CONCURRENCY = {"Small": 4, "Medium": 16, "Large": 64}
+
+
+def _find_model_cell(notebook_path) -> str:
+    nb = json.loads(Path(notebook_path).read_text(encoding="utf-8"))
+    for cell in nb.get("cells", []):
+        source = "".join(cell.get("source") or [])
+        if cell.get("cell_type") == "code" and "model_config=model_config" in source:
+            return source
+    raise RuntimeError(f"No log-model cell found in {notebook_path}.")
+
+
+def notebook_config(notebook_path=DEFAULT_NOTEBOOK, overrides: Optional[dict] = None) -> dict:
+    """
+    The ``model_config`` the notebook logs: upper-case constants of the log-model cell that the
+    model reads (``CONFIG_DEFAULTS`` keys), after ``overrides``. Besides literals, simple expressions
+    over earlier constants (``AOAI_RPM = 6 * DEPLOYMENT_CAPACITY``) are evaluated.
+    """
+    tree = ast.parse(_find_model_cell(notebook_path))
+    overrides = overrides or {}
+    constants = {}
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)):
+            continue
+        name = node.targets[0].id
+        if name in overrides:
+            constants[name] = overrides[name]
+        elif name.isupper():
+            try:
+                constants[name] = ast.literal_eval(node.value)
+            except ValueError:
+                try:
+                    expression = compile(ast.Expression(body=node.value), "<config>", "eval")
+                    constants[name] = eval(expression, {"__builtins__": {}}, dict(constants))
+                except Exception:
+                    continue
+    constants.update(overrides)
+    return {name: value for name, value in constants.items() if name in CONFIG_DEFAULTS}
+
+
+def parse_overrides(items) -> dict:
+    overrides = {}
+    for item in items or []:
+        key, sep, raw = item.partition("=")
+        if not sep:
+            raise ValueError(f"Expected KEY=VALUE, got {item!r}")
+        try:
+            overrides[key.strip()] = ast.literal_eval(raw)
+        except (ValueError, SyntaxError):
+            overrides[key.strip()] = raw
+    return overrides
+
+
+def build_model(notebook_path, overrides: dict, aoai_url: str, vector_search_url: str, records: list, work_dir: Path):
+    """
+    Load the RAGModel with the notebook's config and Azure OpenAI / Vector Search pointed at the stubs.
+    """
+    config = notebook_config(notebook_path, overrides)
+    os.environ["AZURE_OPENAI_ENDPOINT"] = aoai_url
+    os.environ["AZURE_OPENAI_API_KEY"] = "stub"
+    os.environ.setdefault("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+    if config.get("RETRIEVAL_MODE") == "hybrid" and not os.getenv("RAG_LEXICAL_INDEX_DIR"):
+        os.environ["RAG_LEXICAL_INDEX_DIR"] = str(BM25Index.from_records(records).save(work_dir / "lexical_index"))
+
+    model = RAGModel(config)
+    # Same load path as serving, but the Vector Search client targets the stub (no OAuth).
+    model._build_vector_client = lambda: StubVectorSearchClient(vector_search_url)
+    model.load_context(None)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the notebook's RAGModel against local stubs.")
+    parser.add_argument("--notebook", default=str(DEFAULT_NOTEBOOK), help="Notebook holding the model script")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV), help="Rows served by the Vector Search stub")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Override a notebook config constant (repeatable)")
+    parser.add_argument("--aoai-latency", default="lognormal:800,0.4", help="Azure OpenAI stub latency spec (ms)")
+    parser.add_argument("--aoai-error-rate", type=float, default=0.0, help="Share of Azure OpenAI calls answered with 429")
+    parser.add_argument("--aoai-pool", type=int, default=1, help="Azure OpenAI stub deployments in the model's pool")
+    parser.add_argument("--precompute", action="store_true", help="Precompute answers for every Topic before the load (answer table)")
+    parser.add_argument("--vs-latency", default="lognormal:40,0.3", help="Vector Search stub latency spec (ms)")
+    parser.add_argument("--workload-size", choices=sorted(WORKLOAD_CONCURRENCY), default="Small", help="Endpoint size to model")
+    parser.add_argument("--serving-concurrency", type=int, help="Override the modelled endpoint concurrency")
+    parser.add_argument("--no-model", action="store_true", help="Serve canned answers instead of the RAGModel")
+    parser.add_argument("--invocations-latency", default="lognormal:900,0.4", help="Canned /invocations latency (with --no-model)")
+    add_load_arguments(parser)
+    args = parser.parse_args()
+
+    concurrency = args.serving_concurrency or WORKLOAD_CONCURRENCY[args.workload_size]
+    overrides = parse_overrides(args.set)
+    if not {"DEPLOYMENT_CAPACITY", "AOAI_RPM", "AOAI_TPM"} & set(overrides):
+        # The stubs have no quota; model the client-side limiter only when asked to.
+        overrides.update(AOAI_RPM=0, AOAI_TPM=0)
+    records = read_csv_records(args.csv)
+    work_dir = Path(tempfile.mkdtemp(prefix="rag-harness-"))
+    model = None
+
+    with AzureOpenAIStub(latency=args.aoai_latency, error_rate=args.aoai_error_rate) as aoai, \
+            VectorSearchStub(records, latency=args.vs_latency) as vs, \
+            contextlib.ExitStack() as pool:
+        for index in range(1, max(1, args.aoai_pool)):
+            member = pool.enter_context(AzureOpenAIStub(latency=args.aoai_latency, error_rate=args.aoai_error_rate))
+            os.environ[f"{POOL_ENV_PREFIX}{index}"] = json.dumps({
+                "name": f"stub-{index}",
+                "endpoint": member.url,
+                "api_key": "stub",
+                "api_version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+                "deployment": "stub",
+                "capacity": overrides.get("DEPLOYMENT_CAPACITY"),
+            })
+        if args.no_model:
+            serving = InvocationsStub(latency=args.invocations_latency, max_concurrency=concurrency)
+        else:
+            model = build_model(args.notebook, overrides, aoai.url, vs.url, records, work_dir)
+            if args.precompute:
+                entries = precompute_answers(lambda df: model.predict(None, df), [record["Topic"] for record in records])
+                model.answers = AnswerTable(entries, min_similarity=model.config["ANSWER_MIN_SIMILARITY"], source_version="harness")
+                print(f"Precomputed {len(entries)} answers")
+            serving = InvocationsStub(predict_fn=lambda df: model.predict(None, df), max_concurrency=concurrency)
+        with serving:
+            print(f"Serving concurrency {concurrency} ({args.workload_size}); aoai={aoai.latency} vs={vs.latency}")
+            run_load(f"{serving.url}/serving-endpoints/rag_model", args)
+
+    if model is not None:
+        print("load_context: " + ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in model.load_timings.items()))
+        print("Model stage latency:")
+        for stage, stats in METRICS.snapshot()["stages"].items():
+            print(f"  {stage:<18} n={stats['count']:<6} p50={stats['p50_ms']} p95={stats['p95_ms']} p99={stats['p99_ms']} ms")
+        counters = METRICS.snapshot()["counters"]
+        if counters.get("coalesced_requests_total"):
+            print(f"Coalesced requests: {int(counters['coalesced_requests_total'])} (answered by an identical in-flight query)")
+        if counters.get("hedged_requests_total"):
+            print(f"Hedged Vector Search requests: {int(counters['hedged_requests_total'])} "
+                  f"({int(counters.get('hedge_wins_total', 0))} answered by the hedge)")
+        prompt_tokens = counters.get("prompt_tokens_total", 0)
+        if prompt_tokens:
+            cached = counters.get("cached_tokens_total", 0)
+            print(f"Prompt tokens: {int(prompt_tokens)} ({int(cached)} cached, {100 * cached / prompt_tokens:.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""
+Retrieval tail latency with and without hedged Vector Search requests (``rag_model.hedging``).
+
+Both runs query the same Vector Search stub, whose latency spec injects rare stalls
+(``tail:<median>,<sigma>,<stall share>,<stall ms>``), with closed-loop workers for ``--duration``
+seconds each. The hedged run wraps the index in ``HedgedIndex`` with the model's defaults:
+
+    python -m rag_model.bench.hedging --vs-latency tail:40,0.3,0.02,2500 --concurrency 8 --duration 20
+
+The full model shows the same effect in the ``retrieve`` stage of
+``python -m rag_model.bench.harness --vs-latency tail:40,0.3,0.02,2500 --set HEDGE_REQUESTS=true``.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from rag_model.bench.harness import DEFAULT_CSV
+from rag_model.bench.stubs import StubVectorSearchClient, VectorSearchStub
+from rag_model.bench.vector_search import index_search, throughput
+from rag_model.hedging import HedgedIndex
+from rag_model.local_index import read_csv_records
+from rag_model.metrics import MetricsRegistry
+from rag_model.serving import CONFIG_DEFAULTS
+
+
+def run(index, queries: list, concurrency: int, duration_s: float, warmup: int) -> dict:
+    search = index_search(index)
+    # Untimed queries first: connection setup, and the latency window the hedge threshold needs.
+    for i in range(warmup):
+        search(queries[i % len(queries)])
+    return throughput(search, queries, concurrency, duration_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare retrieval p50/p95/p99 with and without hedged Vector Search requests.")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV), help="Rows served by the Vector Search stub; Topics are the queries")
+    parser.add_argument("--vs-latency", default="tail:40,0.3,0.02,2500", help="Vector Search stub latency spec (ms)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed-loop workers")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per run")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed queries before each run")
+    parser.add_argument("--percentile", type=float, default=CONFIG_DEFAULTS["HEDGE_PERCENTILE"], help="Hedge after this latency percentile")
+    parser.add_argument("--budget", type=float, default=CONFIG_DEFAULTS["HEDGE_BUDGET"], help="Hedges per request, at most")
+    parser.add_argument("--min-delay-ms", type=float, default=CONFIG_DEFAULTS["HEDGE_MIN_DELAY_MS"], help="Never hedge sooner than this")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    records = read_csv_records(args.csv)
+    queries = [record["Topic"] for record in records]
+    results = []
+    with VectorSearchStub(records, latency=args.vs_latency) as vs:
+        for hedged in (False, True):
+            registry = MetricsRegistry()
+            index = StubVectorSearchClient(vs.url).get_index("stub", "stub_index")
+            if hedged:
+                index = HedgedIndex(index, percentile=args.percentile, budget=args.budget, min_delay_ms=args.min_delay_ms, registry=registry)
+            result = {"mode": "hedged" if hedged else "single", **run(index, queries, args.concurrency, args.duration, args.warmup)}
+            counters = registry.snapshot()["counters"]
+            result["hedges"] = int(counters.get("hedged_requests_total", 0))
+            result["hedge_wins"] = int(counters.get("hedge_wins_total", 0))
+            result["budget_exhausted"] = int(counters.get("hedge_budget_exhausted_total", 0))
+            if hedged:
+                result["threshold_ms"] = round(1000 * (index.delay_s() or 0.0), 1)
+            results.append(result)
+
+    print(f"Vector Search stub {vs.latency}, concurrency {args.concurrency}, {args.duration:g}s per run")
+    header = f"{'mode':<8} {'requests':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'hedges':>14} {'wins':>5} {'no budget':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        share = f"{r['hedges']} ({100 * r['hedges'] / max(1, r['requests']):.1f}%)"
+        print(f"{r['mode']:<8} {r['requests']:>8} {r['p50_ms']:>7.0f} {r['p95_ms']:>7.0f} {r['p99_ms']:>7.0f} {share:>14} "
+              f"{r['hedge_wins']:>5} {r['budget_exhausted']:>9}")
+    if "threshold_ms" in results[-1]:
+        print(f"Hedge threshold at the end: {results[-1]['threshold_ms']} ms (p{args.percentile:g} of recent calls)")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""
+Minimal asyncio HTTP/1.1 client with keep-alive connection pooling (stdlib only).
+
+Good enough for load generation against JSON endpoints; not a general-purpose client.
+"""
+
+import asyncio
+import json
+import ssl
+from typing import Optional
+from urllib.parse import urlsplit
+
+
+class HTTPResponse:
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class AsyncHTTPClient:
+    """
+    POST JSON to one host over a bounded pool of persistent connections.
+    """
+
+    def __init__(self, base_url: str, headers: Optional[dict] = None, max_connections: int = 64, timeout_s: float = 120.0):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.base_path = parts.path.rstrip("/")
+        self.headers = dict(headers or {})
+        self.timeout_s = float(timeout_s)
+        self._ssl = ssl.create_default_context() if self.scheme == "https" else None
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def _connect(self):
+        if self._idle:
+            return self._idle.pop()
+        return await asyncio.open_connection(self.host, self.port, ssl=self._ssl)
+
+    async def post_json(self, path: str, payload) -> HTTPResponse:
+        body = json.dumps(payload).encode("utf-8")
+        async with self._slots:
+            conn = await self._connect()
+            try:
+                response, keep_alive = await asyncio.wait_for(self._exchange(conn, path, body), self.timeout_s)
+            except BaseException:
+                conn[1].close()
+                raise
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+            return response
+
+    async def _exchange(self, conn, path: str, body: bytes):
+        reader, writer = conn
+        lines = [
+            f"POST {self.base_path}{path} HTTP/1.1",
+            f"Host: {self.host}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive",
+        ]
+        lines += [f"{key}: {value}" for key, value in self.headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed before response.")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b"".join(chunks)
+            keep_alive = headers.get("connection", "").lower() != "close"
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+            keep_alive = headers.get("connection", "").lower() != "close"
+        else:
+            data = await reader.read()
+            keep_alive = False
+        return HTTPResponse(status, headers, data), keep_alive
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
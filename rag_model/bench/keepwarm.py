@@ -0,0 +1,172 @@
+"""
+Cold vs warm latency and idle cost of the serving capacity policies.
+
+Cold and warm request latencies are measured with the cold-start benchmark (fresh interpreter per
+trial against the local stubs, ``rag_model.bench.coldstart``). A week of traffic is then replayed
+against each policy:
+
+- scale_to_zero : the endpoint scales to zero after ``--idle-timeout-min`` without requests; the
+                  next request waits for a cold start (``--scale-up-s`` of container provisioning,
+                  then import + load_context + first predict as measured)
+- keep_warm     : as scale_to_zero, plus a health ping every ``--ping-min`` during business hours
+                  (``rag_model.keepwarm``; the deploy.py ``staging`` profile)
+- provisioned   : min provisioned concurrency > 0, never cold (``prod``)
+
+For each policy the report shows the share of user requests that hit a cold start (overall and
+inside business hours, which is what keep-warm targets), p50/p95/p99/max latency, and
+replica-hours up per week (what idle capacity costs).
+
+    python -m rag_model.bench.keepwarm --day-rate 6 --night-rate 0.5 --scale-up-s 60
+    python -m rag_model.bench.keepwarm --hours 07:00-19:00 --days mon-sat --ping-min 15 --json keepwarm.json
+"""
+
+import argparse
+import datetime as dt
+import json
+import random
+from pathlib import Path
+
+from rag_model.bench.coldstart import add_stub_arguments, measure_from_args
+from rag_model.bench.loadgen import percentile
+from rag_model.keepwarm import BusinessHours
+
+POLICIES = ("scale_to_zero", "keep_warm", "provisioned")
+SIMULATED_DAYS = 7
+
+
+def arrivals(hours: BusinessHours, day_rate: float, night_rate: float, days: int, rng: random.Random) -> list:
+    """
+    Poisson arrivals as (seconds from a Monday 00:00 local, in business hours) at ``day_rate`` per
+    hour inside business hours and ``night_rate`` outside, evaluated in one-minute slices.
+    """
+    start = dt.datetime(2024, 1, 1, tzinfo=hours.zone)  # a Monday
+    out = []
+    for minute in range(days * 24 * 60):
+        in_hours = hours.contains(start + dt.timedelta(minutes=minute))
+        rate = day_rate if in_hours else night_rate
+        t, end = minute * 60.0, (minute + 1) * 60.0
+        while rate > 0:
+            t += rng.expovariate(rate / 3600.0)
+            if t >= end:
+                break
+            out.append((t, in_hours))
+    return out
+
+
+def ping_times(hours: BusinessHours, interval_s: float, days: int) -> list:
+    start = dt.datetime(2024, 1, 1, tzinfo=hours.zone)
+    return [
+        t * interval_s
+        for t in range(int(days * 86400 / interval_s))
+        if hours.contains(start + dt.timedelta(seconds=t * interval_s))
+    ]
+
+
+def simulate(policy: str, requests: list, pings: list, cold_s: list, warm_s: list, idle_timeout_s: float,
+             scale_up_s: float, days: int, rng: random.Random) -> dict:
+    """
+    Replays ``requests`` (and, for keep_warm, ``pings``) against one replica's up/down state.
+    Requests arriving while a replica starts wait for it; latencies are drawn from the measurements.
+    """
+    events = [(t, False, in_hours) for t, in_hours in requests]
+    if policy == "keep_warm":
+        events += [(t, True, True) for t in pings]
+    events.sort()
+    always_up = policy == "provisioned"
+    # Starts scaled to zero (or, provisioned, up for good).
+    ready_at, up_since, up_s = 0.0, 0.0, 0.0
+    up_until = float("inf") if always_up else 0.0
+    latencies, cold, cold_in_hours = [], 0, 0
+    for t, is_ping, in_hours in events:
+        was_cold = True
+        if t > up_until:
+            # Scaled to zero since the last activity: pay provisioning + a measured cold start.
+            up_s += up_until - up_since
+            up_since = t
+            start_s = scale_up_s + rng.choice(cold_s)
+            ready_at = t + start_s
+            latency = start_s
+        elif t < ready_at:
+            # Arrived while the replica was still starting.
+            latency = ready_at - t + rng.choice(warm_s)
+        else:
+            latency = rng.choice(warm_s)
+            was_cold = False
+        if not always_up:
+            up_until = max(up_until, t + latency + idle_timeout_s)
+        if not is_ping:
+            latencies.append(latency)
+            cold += was_cold
+            cold_in_hours += was_cold and in_hours
+    horizon = days * 86400.0
+    up_s = horizon if always_up else up_s + max(0.0, min(up_until, horizon) - up_since)
+    latencies.sort()
+    requests_in_hours = sum(1 for _, in_hours in requests if in_hours)
+    return {
+        "policy": policy,
+        "requests": len(latencies),
+        "pings": len(pings) if policy == "keep_warm" else 0,
+        "cold_requests": cold,
+        "cold_share": cold / len(latencies) if latencies else 0.0,
+        "cold_share_in_hours": cold_in_hours / requests_in_hours if requests_in_hours else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000 if latencies else None,
+        "p95_ms": percentile(latencies, 95) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 99) * 1000 if latencies else None,
+        "max_ms": latencies[-1] * 1000 if latencies else None,
+        "replica_hours": up_s / 3600.0,
+    }
+
+
+def format_report(results: list, days: int) -> str:
+    header = f"{'policy':<14} {'requests':>8} {'cold':>7} {'cold (hours)':>12} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'up h/' + str(days) + 'd':>9}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['policy']:<14} {r['requests']:>8} {r['cold_share']:>6.1%} {r['cold_share_in_hours']:>12.1%} {r['p50_ms']:>7.0f}ms {r['p95_ms']:>7.0f}ms "
+            f"{r['p99_ms']:>7.0f}ms {r['max_ms']:>7.0f}ms {r['replica_hours']:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs warm latency and idle cost of scale-to-zero, keep-warm and provisioned serving.")
+    add_stub_arguments(parser)
+    parser.add_argument("--day-rate", type=float, default=6.0, help="User requests per hour inside business hours")
+    parser.add_argument("--night-rate", type=float, default=0.5, help="User requests per hour outside business hours")
+    parser.add_argument("--hours", default="08:00-18:00", help="Business hours, HH:MM-HH:MM")
+    parser.add_argument("--days", default="mon-fri", help="Business days")
+    parser.add_argument("--tz", default="UTC", help="IANA time zone of --hours")
+    parser.add_argument("--ping-min", type=float, default=10.0, help="Keep-warm ping interval (minutes)")
+    parser.add_argument("--idle-timeout-min", type=float, default=30.0, help="Idle time before the endpoint scales to zero")
+    parser.add_argument("--scale-up-s", type=float, default=0.0, help="Container provisioning before load_context on scale from zero (not measurable offline; take it from the endpoint's events)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write measurements and results to this file")
+    args = parser.parse_args()
+
+    trials = measure_from_args(args, ["warm"])["warm"]
+    cold_s = [trial["to_first_answer_s"] for trial in trials]
+    warm_s = [seconds for trial in trials for seconds in trial["warm_predictions_s"]]
+    health_s = [trial["health_predict_s"] for trial in trials]
+    print(f"Measured over {len(trials)} fresh-interpreter trials (aoai={args.aoai_latency}, vs={args.vs_latency}):")
+    print(f"  cold request (import + load_context + first predict): p50 {percentile(sorted(cold_s), 50) * 1000:.0f} ms"
+          f" (+ {args.scale_up_s:g} s provisioning)")
+    print(f"  warm request: p50 {percentile(sorted(warm_s), 50) * 1000:.0f} ms, health ping: p50 {percentile(sorted(health_s), 50) * 1000:.0f} ms")
+
+    hours = BusinessHours(args.hours, args.days, args.tz)
+    rng = random.Random(args.seed)
+    requests = arrivals(hours, args.day_rate, args.night_rate, SIMULATED_DAYS, rng)
+    pings = ping_times(hours, args.ping_min * 60.0, SIMULATED_DAYS)
+    results = [
+        simulate(policy, requests, pings, cold_s, warm_s, args.idle_timeout_min * 60.0, args.scale_up_s, SIMULATED_DAYS, random.Random(args.seed))
+        for policy in POLICIES
+    ]
+    print(f"\n{SIMULATED_DAYS} simulated days, {args.day_rate:g}/h in {hours}, {args.night_rate:g}/h otherwise, "
+          f"idle timeout {args.idle_timeout_min:g} min, pings every {args.ping_min:g} min ({len(pings)} pings):")
+    print(format_report(results, SIMULATED_DAYS))
+    if args.json:
+        Path(args.json).write_text(json.dumps({"cold_s": cold_s, "warm_s": warm_s, "health_s": health_s, "results": results}, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,212 @@
+"""
+Async load generator for a serving endpoint's ``/invocations`` API.
+
+Open loop (``--rate``): arrivals follow a Poisson process regardless of completions and latency is
+measured from the scheduled send time, so an overloaded endpoint shows up as queueing instead of
+silently lowering the offered load. Closed loop (``--concurrency``): N workers send back to back.
+
+    python -m rag_model.bench.loadgen --url https://<host>/serving-endpoints/<name> --concurrency 1,2,4,8
+    python -m rag_model.bench.loadgen --url https://<host>/serving-endpoints/<name> --rate 2,5,10 --duration 60
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from rag_model.bench.http import AsyncHTTPClient
+
+DEFAULT_QUERIES_CSV = Path(__file__).resolve().parents[2] / "data" / "diabetes_treatment_faq.csv"
+
+
+def load_queries(path=None, column: str = "Topic") -> list:
+    """
+    Queries from a CSV column (default: the seed FAQ topics) or a text file with one query per line.
+    """
+    path = Path(path or DEFAULT_QUERIES_CSV)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            return [row[column] for row in csv.DictReader(f) if row.get(column)]
+    return [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """
+    Linear-interpolated percentile (q in [0, 100]) of an already sorted sequence.
+    """
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def summarize(label: str, latencies: list, errors: dict, elapsed_s: float, batch_size: int = 1) -> dict:
+    latencies = sorted(latencies)
+    ok = len(latencies)
+    return {
+        "label": label,
+        "requests": ok + sum(errors.values()),
+        "ok": ok,
+        "errors": dict(errors),
+        "throughput_rps": round(ok / elapsed_s, 3) if elapsed_s else 0.0,
+        "throughput_qps": round(ok * batch_size / elapsed_s, 3) if elapsed_s else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / ok, 1) if ok else None,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+        "max_ms": _ms(latencies[-1] if latencies else None),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class LoadGenerator:
+    """
+    Sends ``dataframe_split`` batches of queries to ``<url>/invocations``.
+    """
+
+    def __init__(self, url: str, queries: Sequence[str], token: Optional[str] = None, batch_size: int = 1, max_connections: int = 256, timeout_s: float = 120.0):
+        self.url = url.rstrip("/")
+        self.queries = list(queries)
+        self.batch_size = max(1, int(batch_size))
+        self.max_connections = int(max_connections)
+        self.timeout_s = float(timeout_s)
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._cycle = itertools.cycle(self.queries)
+
+    def _payload(self) -> dict:
+        batch = [next(self._cycle) for _ in range(self.batch_size)]
+        return {"dataframe_split": {"columns": ["query"], "data": [[q] for q in batch]}}
+
+    async def _send(self, client: AsyncHTTPClient, started: float, latencies: list, errors: dict) -> None:
+        try:
+            resp = await client.post_json("/invocations", self._payload())
+        except Exception as exc:
+            key = type(exc).__name__
+            errors[key] = errors.get(key, 0) + 1
+            return
+        if resp.status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors[str(resp.status)] = errors.get(str(resp.status), 0) + 1
+
+    def _client(self) -> AsyncHTTPClient:
+        return AsyncHTTPClient(self.url, headers=self.headers, max_connections=self.max_connections, timeout_s=self.timeout_s)
+
+    async def warmup(self, requests: int) -> None:
+        client = self._client()
+        try:
+            await asyncio.gather(*(self._send(client, time.perf_counter(), [], {}) for _ in range(requests)))
+        finally:
+            await client.close()
+
+    async def open_loop(self, rate: float, duration_s: float) -> dict:
+        client = self._client()
+        latencies, errors, tasks = [], {}, []
+        start = time.perf_counter()
+        next_at = start
+        try:
+            while next_at - start < duration_s:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Latency is measured from the scheduled arrival, not the actual send.
+                tasks.append(asyncio.ensure_future(self._send(client, next_at, latencies, errors)))
+                next_at += random.expovariate(rate)
+            await asyncio.gather(*tasks)
+        finally:
+            await client.close()
+        return summarize(f"rate={rate:g}/s", latencies, errors, time.perf_counter() - start, self.batch_size)
+
+    async def closed_loop(self, concurrency: int, duration_s: float) -> dict:
+        client = self._client()
+        latencies, errors = [], {}
+        start = time.perf_counter()
+
+        async def worker():
+            while time.perf_counter() - start < duration_s:
+                await self._send(client, time.perf_counter(), latencies, errors)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(int(concurrency))))
+        finally:
+            await client.close()
+        return summarize(f"concurrency={concurrency}", latencies, errors, time.perf_counter() - start, self.batch_size)
+
+    async def sweep(self, rates: Sequence[float] = (), concurrencies: Sequence[int] = (), duration_s: float = 30.0, warmup: int = 0) -> list:
+        if warmup:
+            await self.warmup(warmup)
+        results = []
+        for rate in rates:
+            results.append(await self.open_loop(rate, duration_s))
+        for concurrency in concurrencies:
+            results.append(await self.closed_loop(concurrency, duration_s))
+        return results
+
+
+def format_report(results: Sequence[dict]) -> str:
+    header = f"{'load':<18}{'ok':>7}{'err':>6}{'rps':>9}{'qps':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['label']:<18}{r['ok']:>7}{sum(r['errors'].values()):>6}{r['throughput_rps']:>9}{r['throughput_qps']:>9}"
+            f"{_fmt(r['mean_ms']):>9}{_fmt(r['p50_ms']):>9}{_fmt(r['p95_ms']):>9}{_fmt(r['p99_ms']):>9}"
+        )
+    lines.append("(latencies in ms)")
+    return "\n".join(lines)
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def parse_levels(text: Optional[str], cast=float) -> list:
+    return [cast(part) for part in (text or "").split(",") if part.strip()]
+
+
+def add_load_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--rate", help="Comma-separated open-loop arrival rates (requests/s)")
+    parser.add_argument("--concurrency", help="Comma-separated closed-loop concurrency levels")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per load level")
+    parser.add_argument("--batch-size", type=int, default=1, help="Queries per request (dataframe_split rows)")
+    parser.add_argument("--warmup", type=int, default=4, help="Warm-up requests before measuring")
+    parser.add_argument("--queries", help="CSV (Topic column) or text file of queries; default: seed FAQ")
+    parser.add_argument("--json", dest="json_out", help="Write results as JSON to this path")
+
+
+def run_load(url: str, args, token: Optional[str] = None) -> list:
+    rates = parse_levels(args.rate, float)
+    concurrencies = parse_levels(args.concurrency, int)
+    if not rates and not concurrencies:
+        concurrencies = [1, 2, 4, 8]
+    generator = LoadGenerator(url, load_queries(args.queries), token=token, batch_size=args.batch_size)
+    results = asyncio.run(generator.sweep(rates, concurrencies, duration_s=args.duration, warmup=args.warmup))
+    print(format_report(results))
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Wrote {args.json_out}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a serving endpoint's /invocations API.")
+    parser.add_argument("--url", required=True, help="Endpoint base URL, e.g. https://<host>/serving-endpoints/<name>")
+    parser.add_argument("--token-env", default="DATABRICKS_TOKEN", help="Env var holding a bearer token")
+    add_load_arguments(parser)
+    args = parser.parse_args()
+    run_load(args.url, args, token=os.getenv(args.token_env))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
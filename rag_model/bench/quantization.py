@@ -0,0 +1,158 @@
+"""
+Recall / memory / latency of quantized local index snapshots on a synthetically scaled FAQ corpus.
+
+The seed FAQ is split into sentences; synthetic documents recombine 2-4 random sentences (with
+word dropout) and are embedded with the hashing embedder, so the corpus keeps the FAQ's vocabulary
+and topic clusters at any size. Queries are the FAQ topics plus perturbed corpus sentences. Every
+configuration is compared with exact float32 search over the same vectors.
+
+    python -m rag_model.bench.quantization --rows 100000 --dim 384
+    python -m rag_model.bench.quantization --index-types flat,ivf --quantization none,sq8,pq --rescore-factors 0,4,16
+"""
+
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from rag_model.bench.loadgen import parse_levels, percentile
+from rag_model.embeddings import HashingEmbedder
+from rag_model.local_index import LocalVectorIndex, build_snapshot, read_csv_records, top_k
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CSV = REPO_ROOT / "data" / "diabetes_treatment_faq.csv"
+
+
+def _sentences(records: list) -> list:
+    sentences = []
+    for record in records:
+        sentences.extend(s.strip() for s in re.split(r"(?<=[.!?])\s+", record.get("Description") or "") if s.strip())
+    return sentences
+
+
+def _perturb(text: str, rng, dropout: float) -> str:
+    words = [word for word in text.split() if rng.random() >= dropout]
+    return " ".join(words) or text
+
+
+def synthetic_corpus(records: list, rows: int, seed: int = 0, dropout: float = 0.15) -> list:
+    """
+    ``rows`` synthetic Description texts built from the seed FAQ's sentences.
+    """
+    rng = np.random.default_rng(seed)
+    sentences = _sentences(records)
+    texts = []
+    for _ in range(rows):
+        picked = rng.choice(len(sentences), size=int(rng.integers(2, 5)), replace=False)
+        texts.append(" ".join(_perturb(sentences[i], rng, dropout) for i in picked))
+    return texts
+
+
+def synthetic_queries(records: list, count: int, seed: int = 1, dropout: float = 0.3) -> list:
+    rng = np.random.default_rng(seed)
+    sentences = _sentences(records)
+    queries = [record["Topic"] for record in records]
+    while len(queries) < count:
+        queries.append(_perturb(sentences[int(rng.integers(len(sentences)))], rng, dropout))
+    return queries[:count]
+
+
+def search_bytes(index: LocalVectorIndex) -> int:
+    """
+    Bytes a query scans in RAM: the codes (plus codebooks/scales) when quantized, else the float32 matrix.
+    """
+    if index._codes is None:
+        return int(index.vectors.nbytes)
+    quantizer, codes = index._codes
+    params = getattr(quantizer, "codebooks", getattr(quantizer, "scale", None))
+    return int(codes.nbytes + params.nbytes)
+
+
+def measure(index: LocalVectorIndex, vectors: np.ndarray, queries: np.ndarray, k: int) -> dict:
+    """
+    recall@k against exact search (a hit is any result scoring at least the exact k-th score, so
+    ties between duplicate synthetic rows count) and per-query search latency.
+    """
+    latencies, hits = [], 0
+    for q in queries:
+        exact = vectors @ q
+        threshold = exact[top_k(exact, k)[-1]] - 1e-6
+        start = time.perf_counter()
+        ids, _ = index.search_vector(q, k)
+        latencies.append(time.perf_counter() - start)
+        hits += int((exact[ids] >= threshold).sum())
+    latencies.sort()
+    return {
+        "recall": hits / float(k * len(queries)),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+    }
+
+
+def format_table(results: list) -> str:
+    header = f"{'config':<24} {'recall@k':>9} {'MiB':>9} {'B/vec':>7} {'p50 ms':>8} {'p95 ms':>8} {'build s':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['config']:<24} {r['recall']:>9.3f} {r['bytes'] / 2**20:>9.1f} {r['bytes_per_vector']:>7.0f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['build_s']:>8.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized local index snapshots against exact search.")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV), help="Seed FAQ CSV (Topic/Description)")
+    parser.add_argument("--rows", type=int, default=50000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384, help="Hashing embedder dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Query count")
+    parser.add_argument("-k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--index-types", default="flat", help="Comma-separated: flat, ivf")
+    parser.add_argument("--quantization", default="none,sq8,pq", help="Comma-separated: none, sq8, pq")
+    parser.add_argument("--rescore-factors", default="0,4,16", help="Comma-separated rescore factors for quantized configs")
+    parser.add_argument("--pq-m", type=int, default=None, help="PQ subspaces (default dim / 8)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF lists to probe")
+    parser.add_argument("--work-dir", help="Where to write snapshots (default: a temp dir)")
+    args = parser.parse_args()
+
+    records = read_csv_records(args.csv)
+    embedder = HashingEmbedder(dim=args.dim)
+    start = time.perf_counter()
+    vectors = embedder(synthetic_corpus(records, args.rows))
+    queries = embedder(synthetic_queries(records, args.queries))
+    print(f"Embedded {args.rows} synthetic rows ({args.dim} dims) in {time.perf_counter() - start:.1f}s")
+    rows = [[i] for i in range(args.rows)]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(args.work_dir or tmp)
+        for index_type in [t.strip() for t in args.index_types.split(",") if t.strip()]:
+            for quantization in [q.strip() for q in args.quantization.split(",") if q.strip()]:
+                out = work_dir / f"{index_type}_{quantization}"
+                start = time.perf_counter()
+                build_snapshot(
+                    out, ["id"], rows, vectors, embedder.model_name,
+                    index_type=index_type, quantization=quantization, pq_m=args.pq_m,
+                )
+                build_s = time.perf_counter() - start
+                factors = [0.0] if quantization == "none" else parse_levels(args.rescore_factors)
+                for factor in factors:
+                    index = LocalVectorIndex.load(out, embed_fn=embedder, nprobe=args.nprobe, rescore_factor=factor)
+                    label = f"{index_type}/{quantization}" + (f" rescore x{factor:g}" if quantization != "none" else "")
+                    size = search_bytes(index)
+                    results.append({
+                        "config": label,
+                        "bytes": size,
+                        "bytes_per_vector": size / args.rows,
+                        "build_s": build_s,
+                        **measure(index, vectors, queries, args.k),
+                    })
+    print(format_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
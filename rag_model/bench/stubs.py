@@ -0,0 +1,360 @@
+"""
+Local stub servers standing in for the Databricks serving, Vector Search and Azure OpenAI APIs.
+
+Each stub sleeps for a latency drawn from a ``LatencyDistribution`` so load tests see
+realistic queueing. Latency specs (milliseconds):
+    "const:20"              fixed
+    "uniform:10,40"         uniform between bounds
+    "normal:50,10"          mean, stddev (clamped at 0)
+    "lognormal:800,0.4"     median, sigma (long right tail, like LLM calls)
+    "tail:40,0.3,0.02,2500" lognormal:40,0.3, but 2% of calls stall around 2500 ms (busy replica, GC pause)
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional, Sequence
+
+import requests
+
+from rag_model.embeddings import HashingEmbedder, normalize_rows
+from rag_model.lexical import BM25Index
+from rag_model.local_index import top_k
+from rag_model.results import build_result
+
+
+class LatencyDistribution:
+    def __init__(self, kind: str = "const", params: Sequence[float] = (0.0,)):
+        self.kind = kind
+        self.params = [float(p) for p in params]
+        if kind not in ("const", "uniform", "normal", "lognormal", "tail"):
+            raise ValueError(f"Unknown latency distribution: {kind!r}")
+
+    @classmethod
+    def parse(cls, spec) -> "LatencyDistribution":
+        if isinstance(spec, LatencyDistribution):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("const", [spec])
+        kind, _, params = str(spec).partition(":")
+        if not params:
+            return cls("const", [float(kind)])
+        return cls(kind, [float(p) for p in params.split(",")])
+
+    def sample_ms(self) -> float:
+        p = self.params
+        if self.kind == "const":
+            return p[0]
+        if self.kind == "uniform":
+            return random.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, random.gauss(p[0], p[1]))
+        if self.kind == "tail" and random.random() < p[2]:
+            return p[3] * math.exp(random.gauss(0.0, p[1]))
+        return p[0] * math.exp(random.gauss(0.0, p[1]))
+
+    def sleep(self) -> None:
+        time.sleep(self.sample_ms() / 1000.0)
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Default backlog (5) refuses connections under load-test bursts.
+    request_queue_size = 512
+
+
+class StubServer:
+    """
+    Threaded HTTP server running in the background. Subclasses implement ``handle_post``; GETs get
+    a keep-alive 404 (so warm-up probes such as ``models.list()`` keep their connection).
+    ``connect_latency`` is paid once per new client connection (TCP + TLS setup to a remote region).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, connect_latency=None):
+        stub = self
+        self.connect_latency = LatencyDistribution.parse(connect_latency) if connect_latency is not None else None
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                if stub.connect_latency is not None:
+                    stub.connect_latency.sleep()
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.send_json(self, 404, {"error": {"code": "NotFound", "message": self.path}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                stub.handle_post(self, body)
+
+        self.server = _ThreadingServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def handle_post(self, handler: BaseHTTPRequestHandler, body: dict) -> None:
+        raise NotImplementedError
+
+    @staticmethod
+    def send_json(handler: BaseHTTPRequestHandler, status: int, payload, headers: Optional[dict] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            handler.send_header(key, str(value))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+
+class AzureOpenAIStub(StubServer):
+    """
+    POST /openai/deployments/<name>/chat/completions (JSON or SSE stream).
+    ``error_rate`` of requests get a 429 with Retry-After, like a throttled deployment.
+    Prompt caching is simulated: a prompt prefix of 1,024+ tokens (in 128-token steps) that an
+    earlier request already sent is reported as ``prompt_tokens_details.cached_tokens``.
+    """
+
+    path_pattern = re.compile(r"^/openai/deployments/[^/]+/chat/completions")
+
+    def __init__(self, latency="lognormal:800,0.4", token_latency="const:15", completion_tokens: int = 40, error_rate: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = LatencyDistribution.parse(latency)
+        self.token_latency = LatencyDistribution.parse(token_latency)
+        self.completion_tokens = int(completion_tokens)
+        self.error_rate = float(error_rate)
+        self.requests = 0
+        self._prefixes = set()
+        self._prefix_lock = threading.Lock()
+
+    def _cached_tokens(self, prompt: str, prompt_tokens: int) -> int:
+        cached = 0
+        with self._prefix_lock:
+            for tokens in range(1024, prompt_tokens + 1, 128):
+                key = hash(prompt[: tokens * 4])
+                # Only a contiguous run of seen steps from 1,024 tokens counts as a cache hit.
+                if key in self._prefixes and cached == (tokens - 128 if tokens > 1024 else 0):
+                    cached = tokens
+                self._prefixes.add(key)
+        return cached
+
+    def handle_post(self, handler, body):
+        if not self.path_pattern.match(handler.path):
+            self.send_json(handler, 404, {"error": {"message": f"Unknown path {handler.path}"}})
+            return
+        self.requests += 1
+        if self.error_rate and random.random() < self.error_rate:
+            self.send_json(handler, 429, {"error": {"code": "429", "message": "Rate limit exceeded."}}, {"Retry-After": 1})
+            return
+        prompt = " ".join(str(m.get("content") or "") for m in body.get("messages") or [])
+        prompt_tokens = max(1, len(prompt) // 4)
+        words = ["stub"] * self.completion_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(words),
+            "total_tokens": prompt_tokens + len(words),
+            "prompt_tokens_details": {"cached_tokens": self._cached_tokens(prompt, prompt_tokens)},
+        }
+        headers = {"x-ratelimit-remaining-requests": 1000, "x-ratelimit-remaining-tokens": 100000}
+        self.latency.sleep()
+        if not body.get("stream"):
+            self.send_json(handler, 200, {
+                "id": "stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": usage,
+            }, headers)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Connection", "close")
+        for key, value in headers.items():
+            handler.send_header(key, str(value))
+        handler.end_headers()
+        for word in words:
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+            self.token_latency.sleep()
+        if (body.get("stream_options") or {}).get("include_usage"):
+            # As the API does: a last chunk with no choices carrying the request's usage.
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": "stub", "choices": [], "usage": usage}
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.close_connection = True
+
+
+class VectorSearchStub(StubServer):
+    """
+    POST /api/2.0/vector-search/indexes/<name>/query, ranked with BM25 over the given records.
+    A ``query_vector`` is ranked by cosine against hashing embeddings of ``Description`` instead
+    (harness models with ``QUERY_EMBEDDING=hashing``).
+    """
+
+    path_pattern = re.compile(r"^/api/2\.0/vector-search/indexes/[^/]+/query")
+
+    def __init__(self, records: Sequence[dict], latency="lognormal:40,0.3", **kwargs):
+        super().__init__(**kwargs)
+        self.latency = LatencyDistribution.parse(latency)
+        self.records = list(records)
+        self.index = BM25Index.from_records(self.records)
+        self._vectors = {}
+
+    def _vector_search(self, query_vector, columns, num_results: int) -> dict:
+        dim = len(query_vector)
+        matrix = self._vectors.get(dim)
+        if matrix is None:
+            matrix = self._vectors[dim] = HashingEmbedder(dim)([record.get("Description") or "" for record in self.records])
+        scores = matrix @ normalize_rows(query_vector)[0]
+        ids = top_k(scores, num_results)
+        columns = list(columns or ["Topic", "Description"])
+        return build_result(columns, ([self.records[i].get(col) for col in columns] for i in ids), scores[ids])
+
+    def handle_post(self, handler, body):
+        if not self.path_pattern.match(handler.path):
+            self.send_json(handler, 404, {"error_code": "NOT_FOUND", "message": handler.path})
+            return
+        self.latency.sleep()
+        if body.get("query_vector") is not None:
+            self.send_json(handler, 200, self._vector_search(body["query_vector"], body.get("columns"), int(body.get("num_results") or 10)))
+            return
+        res = self.index.similarity_search(
+            query_text=body.get("query_text") or "",
+            columns=body.get("columns"),
+            num_results=int(body.get("num_results") or 10),
+        )
+        self.send_json(handler, 200, res)
+
+
+class InvocationsStub(StubServer):
+    """
+    POST /serving-endpoints/<name>/invocations (or /invocations) with a ``dataframe_split`` payload.
+
+    With ``predict_fn`` the stub serves a real model (DataFrame in, DataFrame out); otherwise it
+    returns canned answers after ``latency`` + ``per_row_latency`` per row. ``max_concurrency``
+    models the endpoint's concurrency: extra requests queue, as they do on a sized endpoint.
+    """
+
+    path_pattern = re.compile(r"^(/serving-endpoints/[^/]+)?/invocations$")
+
+    def __init__(self, predict_fn: Optional[Callable] = None, latency="const:0", per_row_latency="const:0", max_concurrency: int = 4, **kwargs):
+        super().__init__(**kwargs)
+        self.predict_fn = predict_fn
+        self.latency = LatencyDistribution.parse(latency)
+        self.per_row_latency = LatencyDistribution.parse(per_row_latency)
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+
+    def handle_post(self, handler, body):
+        if not self.path_pattern.match(handler.path):
+            self.send_json(handler, 404, {"error_code": "ENDPOINT_NOT_FOUND", "message": handler.path})
+            return
+        split = body.get("dataframe_split")
+        records = body.get("dataframe_records")
+        if split is not None:
+            rows = [dict(zip(split["columns"], values)) for values in split["data"]]
+        elif records is not None:
+            rows = list(records)
+        else:
+            self.send_json(handler, 400, {"error_code": "BAD_REQUEST", "message": "Expected dataframe_split or dataframe_records."})
+            return
+
+        with self._slots:
+            try:
+                predictions = self._predict(rows)
+            except Exception as exc:
+                self.send_json(handler, 500, {"error_code": "INTERNAL_ERROR", "message": str(exc)})
+                return
+        self.send_json(handler, 200, {"predictions": predictions})
+
+    def _predict(self, rows: list) -> list:
+        if self.predict_fn is not None:
+            import pandas as pd
+
+            out = self.predict_fn(pd.DataFrame(rows))
+            return out.to_dict(orient="records")
+        self.latency.sleep()
+        for _ in rows:
+            self.per_row_latency.sleep()
+        return [{"answer": f"stub answer for: {row.get('query')}"} for row in rows]
+
+
+class StubVectorIndex:
+    """
+    Client-side index handle that queries a ``VectorSearchStub`` over HTTP (pooled session).
+    """
+
+    def __init__(self, url: str, index_name: str, session: Optional[requests.Session] = None):
+        self.url = url.rstrip("/")
+        self.index_name = index_name
+        self.session = session or requests.Session()
+
+    def describe(self) -> dict:
+        return {"name": self.index_name, "endpoint_name": "stub", "index_type": "DELTA_SYNC"}
+
+    def similarity_search(self, query_text: Optional[str] = None, columns: Optional[Sequence[str]] = None, num_results: int = 10, **kwargs) -> dict:
+        resp = self.session.post(
+            f"{self.url}/api/2.0/vector-search/indexes/{self.index_name}/query",
+            json={
+                "query_text": query_text,
+                "query_vector": kwargs.get("query_vector"),
+                "columns": list(columns or []),
+                "num_results": int(num_results),
+            },
+            timeout=60,
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+
+class StubVectorSearchClient:
+    """
+    Drop-in for ``VectorSearchClient`` exposing ``get_index`` against a ``VectorSearchStub``.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.session = requests.Session()
+
+    def get_index(self, endpoint_name: str, index_name: str) -> StubVectorIndex:
+        return StubVectorIndex(self.url, index_name, session=self.session)
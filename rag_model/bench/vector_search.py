@@ -0,0 +1,221 @@
+"""
+Query latency, throughput and sync freshness of Vector Search endpoint / sync options on our data.
+
+For each option (endpoint type x pipeline type) the notebook's "Benchmark Vector Search options"
+cell creates an index over a copy of the FAQ table on an explicitly named endpoint of that type
+(``rag_model.vector_search.ensure_endpoint``), waits until it is ready, then measures:
+
+- query latency : sequential ``similarity_search`` calls, p50/p95/p99
+- throughput    : closed-loop workers at each concurrency level for ``duration_s``; QPS and p95
+- freshness     : a marker row is written to the source table (and, for TRIGGERED, a sync is
+                  started); time until a filtered query returns it
+
+Benchmark indexes are deleted afterwards unless ``keep_indexes``. Without Databricks the same
+measurements run against the local Vector Search stub (no freshness), which checks the harness:
+
+    python -m rag_model.bench.vector_search --concurrency 1,4,8 --duration 5 --vs-latency lognormal:40,0.3
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from rag_model.bench.loadgen import percentile
+from rag_model.readiness import Backoff, vector_search_endpoint_probe, vector_search_index_probe, wait_all, wait_until
+from rag_model.vector_search import ENDPOINT_TYPES, PIPELINE_TYPES, check_option, ensure_endpoint, index_pipeline_type
+
+DEFAULT_CONCURRENCY = (1, 4, 8)
+
+
+def _ms(values: Sequence[float], q: float) -> Optional[float]:
+    value = percentile(sorted(values), q)
+    return None if value is None else value * 1000
+
+
+def index_search(index, columns: Sequence[str] = ("Topic",), num_results: int = 3) -> Callable:
+    def search(query: str, **kwargs):
+        return index.similarity_search(query_text=query, columns=list(columns), num_results=num_results, **kwargs)
+
+    return search
+
+
+def query_latency(search: Callable, queries: Sequence[str], n: int = 50) -> dict:
+    latencies, errors = [], 0
+    for i in range(n):
+        start = time.perf_counter()
+        try:
+            search(queries[i % len(queries)])
+        except Exception:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    return {"requests": n, "errors": errors, **{f"p{q}_ms": _ms(latencies, q) for q in (50, 95, 99)}}
+
+
+def throughput(search: Callable, queries: Sequence[str], concurrency: int, duration_s: float) -> dict:
+    """
+    ``concurrency`` workers issuing queries back to back for ``duration_s``.
+    """
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker(offset: int):
+        i = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                search(queries[i % len(queries)])
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            i += concurrency
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "qps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": _ms(latencies, 50),
+        "p95_ms": _ms(latencies, 95),
+        "p99_ms": _ms(latencies, 99),
+    }
+
+
+def freshness(index, write_marker: Callable, remove_marker: Callable, pipeline_type: str, primary_key: str = "Topic",
+              timeout_s: float = 1800, poll_s: float = 2.0) -> dict:
+    """
+    Seconds from writing a marker row (``write_marker(key)``) to the source table until the index
+    returns it. TRIGGERED indexes get a ``sync()`` right after the write, as the notebook does.
+    """
+    marker = f"vs-freshness-{uuid.uuid4().hex[:8]}"
+    write_marker(marker)
+    start = time.monotonic()
+    try:
+        if pipeline_type == "TRIGGERED":
+            index.sync()
+
+        def probe():
+            rows = (index.similarity_search(query_text=marker, columns=[primary_key], filters={primary_key: marker}, num_results=1)
+                    .get("result", {}).get("data_array") or [])
+            return bool(rows), "visible" if rows else "pending", None
+
+        result = wait_until("freshness", probe, timeout_s=timeout_s, backoff=Backoff(initial_s=poll_s, max_delay_s=poll_s, jitter=0.0), log=None)
+        return {"visible_s": result.elapsed_s, "polls": result.polls}
+    except TimeoutError:
+        return {"visible_s": None, "polls": None}
+    finally:
+        remove_marker(marker)
+        print(f"Freshness marker {marker} removed ({time.monotonic() - start:.0f}s after write).")
+
+
+def benchmark_index(search: Callable, queries: Sequence[str], concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+                    latency_queries: int = 50, duration_s: float = 20.0) -> dict:
+    # A few untimed queries first: the first ones pay connection setup and cold caches.
+    for query in queries[:5]:
+        search(query)
+    return {
+        "latency": query_latency(search, queries, latency_queries),
+        "throughput": [throughput(search, queries, level, duration_s) for level in concurrency],
+    }
+
+
+def run_options(
+    client,
+    options: Sequence[tuple],
+    create_index: Callable,
+    queries: Sequence[str],
+    write_marker: Optional[Callable] = None,
+    remove_marker: Optional[Callable] = None,
+    endpoint_names: Optional[dict] = None,
+    concurrency: Sequence[int] = DEFAULT_CONCURRENCY,
+    latency_queries: int = 50,
+    duration_s: float = 20.0,
+    keep_indexes: bool = False,
+) -> list:
+    """
+    Benchmark each (endpoint_type, pipeline_type) in ``options``. ``create_index(endpoint, index_suffix,
+    pipeline_type)`` creates (or returns) the benchmark index; ``endpoint_names`` maps endpoint
+    types to the endpoints to use (default ``rag-vs-bench-<type>``).
+    """
+    results = []
+    for endpoint_type, pipeline_type in options:
+        endpoint_type = check_option(endpoint_type, ENDPOINT_TYPES, "endpoint type")
+        pipeline_type = check_option(pipeline_type, PIPELINE_TYPES, "pipeline type")
+        name = (endpoint_names or {}).get(endpoint_type) or f"rag-vs-bench-{endpoint_type.lower().replace('_', '-')}"
+        label = f"{endpoint_type}/{pipeline_type}"
+        print(f"\n=== {label} on {name}")
+        endpoint = ensure_endpoint(client, name, endpoint_type=endpoint_type)
+        wait_all({"endpoint": vector_search_endpoint_probe(client, endpoint)}, timeout_s=1800)
+        index = create_index(endpoint, f"{endpoint_type}_{pipeline_type}".lower(), pipeline_type)
+        actual = index_pipeline_type(index)
+        if actual and actual != pipeline_type:
+            print(f"Index exists with pipeline type {actual}; results are for {actual}.")
+        ready = wait_until(f"index {label}", vector_search_index_probe(index), timeout_s=3600)
+        result = {"option": label, "endpoint": endpoint, "index_ready_s": ready.elapsed_s}
+        result.update(benchmark_index(index_search(index), queries, concurrency, latency_queries, duration_s))
+        if write_marker is not None and remove_marker is not None:
+            result["freshness"] = freshness(index, write_marker, remove_marker, pipeline_type)
+        if not keep_indexes:
+            client.delete_index(endpoint, index.describe()["name"])
+        results.append(result)
+        print(format_results([result]))
+    return results
+
+
+def format_results(results: Sequence[dict]) -> str:
+    def ms(value):
+        return "-" if value is None else f"{value:.0f}"
+
+    header = f"{'option':<28} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'QPS @ concurrency (p95 ms)':<40} {'fresh s':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        latency = r["latency"]
+        qps = ", ".join(f"{t['qps']:.0f}@{t['concurrency']} ({ms(t['p95_ms'])})" for t in r["throughput"])
+        fresh = (r.get("freshness") or {}).get("visible_s")
+        lines.append(f"{r['option']:<28} {ms(latency['p50_ms']):>7} {ms(latency['p95_ms']):>7} {ms(latency['p99_ms']):>7} "
+                     f"{qps:<40} {'-' if fresh is None else f'{fresh:.0f}':>8}")
+    return "\n".join(lines)
+
+
+def main():
+    from rag_model.bench.harness import DEFAULT_CSV
+    from rag_model.bench.stubs import StubVectorSearchClient, VectorSearchStub
+    from rag_model.local_index import read_csv_records
+
+    parser = argparse.ArgumentParser(description="Vector Search latency / QPS benchmark against the local stub (the live run is the notebook cell).")
+    parser.add_argument("--csv", default=str(DEFAULT_CSV), help="Rows served by the Vector Search stub; Topics are the queries")
+    parser.add_argument("--vs-latency", default="lognormal:40,0.3", help="Vector Search stub latency spec (ms)")
+    parser.add_argument("--concurrency", default=",".join(str(c) for c in DEFAULT_CONCURRENCY), help="Comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--latency-queries", type=int, default=50, help="Sequential queries for the latency percentiles")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    records = read_csv_records(args.csv)
+    queries = [record["Topic"] for record in records]
+    with VectorSearchStub(records, latency=args.vs_latency) as vs:
+        index = StubVectorSearchClient(vs.url).get_index("stub", "stub_index")
+        result = {"option": f"stub ({vs.latency})", "endpoint": "stub"}
+        result.update(benchmark_index(index_search(index), queries, [int(c) for c in args.concurrency.split(",")],
+                                      args.latency_queries, args.duration))
+    print(format_results([result]))
+    if args.json:
+        Path(args.json).write_text(json.dumps([result], indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+"""
+Pooled, micro-batching client for a Model Serving endpoint's ``/invocations`` API.
+
+- One ``requests.Session`` with a sized connection pool (keep-alive, no per-call TLS handshake).
+- Single queries are queued and flushed as one ``dataframe_split`` payload once ``max_batch_size``
+  queries are waiting or the oldest has waited ``max_batch_wait_ms``.
+- Bulk calls (``predict`` / ``score_dataframe``) are chunked and sent ``max_in_flight`` at a time.
+- 429 / 503 / connection errors are retried with capped exponential backoff (``Retry-After`` wins).
+
+Sync and async front ends share the same batcher:
+    client = ScoringClient.from_workspace(host, "rag-model-endpoint", token=pat)
+    client.query("what is diabetes?")
+    client.predict(queries)                         # bulk, e.g. nightly evaluation
+    await client.aquery("what is diabetes?")        # asyncio
+    await client.apredict(queries)
+"""
+
+import asyncio
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class ScoringError(RuntimeError):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Request failed with status {status}, {message}")
+        self.status = status
+
+
+class ScoringClient:
+    def __init__(
+        self,
+        url: str,
+        token: Optional[str] = None,
+        token_provider: Optional[Callable[[], str]] = None,
+        input_column: str = "query",
+        max_batch_size: int = 32,
+        max_batch_wait_ms: float = 20.0,
+        max_in_flight: int = 8,
+        max_retries: int = 6,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 30.0,
+        timeout_s: float = 300.0,
+    ):
+        self.url = url if url.rstrip("/").endswith("/invocations") else url.rstrip("/") + "/invocations"
+        self._token = token
+        self._token_provider = token_provider
+        self.input_column = input_column
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_batch_wait_s = float(max_batch_wait_ms) / 1000.0
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_retries = int(max_retries)
+        self.backoff_base_s = float(backoff_base_s)
+        self.backoff_max_s = float(backoff_max_s)
+        self.timeout_s = float(timeout_s)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight + 1)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="scoring")
+        self._queue = queue.Queue()
+        self._dispatcher = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @classmethod
+    def from_workspace(cls, host: str, endpoint_name: str, **kwargs) -> "ScoringClient":
+        host = host if host.startswith("https://") else f"https://{host}"
+        return cls(f"{host.rstrip('/')}/serving-endpoints/{endpoint_name}/invocations", **kwargs)
+
+    # -----------------------------
+    # Transport
+    # -----------------------------
+    def _headers(self) -> dict:
+        token = self._token_provider() if self._token_provider else self._token
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+
+    def _backoff_s(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max_s)
+            except ValueError:
+                pass
+        # Full jitter keeps many throttled callers from retrying in lockstep.
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
+
+    def post(self, payload: dict) -> dict:
+        """
+        POST one payload with retries. Returns the decoded JSON response.
+        """
+        data = json.dumps(payload, separators=(",", ":"), allow_nan=True)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                resp = self.session.post(self.url, data=data, headers=self._headers(), timeout=self.timeout_s)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("Scoring request failed (%s); retrying.", exc)
+            else:
+                if resp.status_code == 200:
+                    return resp.json()
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise ScoringError(resp.status_code, resp.text)
+                retry_after = resp.headers.get("Retry-After")
+                logger.warning("Scoring request got %s; retrying.", resp.status_code)
+            time.sleep(self._backoff_s(attempt, retry_after))
+        raise RuntimeError("unreachable")
+
+    def _score_batch(self, queries: Sequence[str]) -> list:
+        payload = {"dataframe_split": {"columns": [self.input_column], "data": [[q] for q in queries]}}
+        predictions = self.post(payload).get("predictions")
+        if not isinstance(predictions, list) or len(predictions) != len(queries):
+            raise ScoringError(200, f"Expected {len(queries)} predictions, got {predictions!r:.200}")
+        return predictions
+
+    # -----------------------------
+    # Micro-batching (single queries)
+    # -----------------------------
+    def _ensure_dispatcher(self) -> None:
+        if self._dispatcher is None:
+            with self._lock:
+                if self._dispatcher is None:
+                    self._dispatcher = threading.Thread(target=self._dispatch, name="scoring-batcher", daemon=True)
+                    self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_batch_wait_s
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._pool.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: list) -> None:
+        try:
+            predictions = self._score_batch([q for q, _ in batch])
+        except BaseException as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), prediction in zip(batch, predictions):
+            future.set_result(prediction)
+
+    def submit(self, query: str) -> Future:
+        """
+        Queue one query for the next micro-batch; returns a Future with its prediction.
+        """
+        if self._closed:
+            raise RuntimeError("ScoringClient is closed.")
+        self._ensure_dispatcher()
+        future = Future()
+        self._queue.put((str(query), future))
+        return future
+
+    def query(self, query: str):
+        return self.submit(query).result()
+
+    async def aquery(self, query: str):
+        return await asyncio.wrap_future(self.submit(query))
+
+    # -----------------------------
+    # Bulk scoring
+    # -----------------------------
+    def _chunks(self, items: Sequence) -> list:
+        return [items[i:i + self.max_batch_size] for i in range(0, len(items), self.max_batch_size)]
+
+    def predict(self, queries: Sequence[str]) -> list:
+        """
+        Score many queries: full batches, ``max_in_flight`` requests at a time, order preserved.
+        """
+        queries = [str(q) for q in queries]
+        results = []
+        for predictions in self._pool.map(self._score_batch, self._chunks(queries)):
+            results.extend(predictions)
+        return results
+
+    async def apredict(self, queries: Sequence[str]) -> list:
+        futures = [asyncio.wrap_future(self._pool.submit(self._score_batch, chunk)) for chunk in self._chunks([str(q) for q in queries])]
+        results = []
+        for predictions in await asyncio.gather(*futures):
+            results.extend(predictions)
+        return results
+
+    def score_dataframe(self, df):
+        """
+        Score a DataFrame (any input columns) in chunks; returns predictions as a DataFrame.
+        """
+        import pandas as pd
+
+        def score_chunk(start: int) -> list:
+            chunk = df.iloc[start:start + self.max_batch_size]
+            return self.post({"dataframe_split": chunk.to_dict(orient="split", index=False)})["predictions"]
+
+        rows = []
+        for predictions in self._pool.map(score_chunk, range(0, len(df), self.max_batch_size)):
+            rows.extend(predictions)
+        return pd.DataFrame(rows)
+
+    def close(self) -> None:
+        self._closed = True
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher.join()
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
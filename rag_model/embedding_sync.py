@@ -0,0 +1,118 @@
+"""
+Self-managed embeddings for the Vector Search source table.
+
+A Delta Sync index with ``embedding_source_column`` re-embeds the text on every full sync. Here the
+embeddings are computed in batched endpoint calls and cached in a Delta table keyed by content hash
+(model + text), so unchanged text is never embedded twice. The embedded table (source columns +
+``content_hash`` + ``embedding``) is MERGEd on the primary key, so only changed rows reach the
+index's change feed. Create the index with ``embedding_vector_column="embedding"`` and query it with
+``query_vector``.
+
+    from rag_model.embedding_sync import sync_embeddings
+    stats = sync_embeddings(spark, "cat.rag.faq", "cat.rag.faq_embedded", "cat.rag.faq_embedding_cache",
+                            DatabricksEmbedder("databricks-gte-large-en"), primary_key="Topic")
+"""
+
+import functools
+import logging
+from typing import Iterator, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HASH_COLUMN = "content_hash"
+MODEL_COLUMN = "model"
+EMBEDDING_COLUMN = "embedding"
+HASH_SEPARATOR = "\x01"
+
+
+def embed_batches(batches: Iterator[pd.DataFrame], embedder, text_column: str, batch_size: int = 64) -> Iterator[pd.DataFrame]:
+    """
+    ``mapInPandas`` body: (content_hash, text) rows in, (content_hash, model, embedding) rows out.
+    """
+    for frame in batches:
+        for start in range(0, len(frame), batch_size):
+            chunk = frame.iloc[start : start + batch_size]
+            vectors = embedder(chunk[text_column].astype(str).tolist())
+            yield pd.DataFrame({
+                HASH_COLUMN: chunk[HASH_COLUMN].to_numpy(),
+                MODEL_COLUMN: embedder.model_name,
+                EMBEDDING_COLUMN: [vector.astype("float32").tolist() for vector in vectors],
+            })
+
+
+def sync_embeddings(
+    spark,
+    source_table: str,
+    target_table: str,
+    cache_table: str,
+    embedder,
+    text_column: str = "Description",
+    primary_key: str = "Topic",
+    batch_size: int = 64,
+    num_partitions: Optional[int] = None,
+) -> dict:
+    """
+    Embed new text into ``cache_table`` and MERGE the embedded rows into ``target_table``.
+    Returns {"rows", "embedded", "reused", "dimension"}.
+    """
+    from pyspark.sql import functions as F
+
+    model_name = embedder.model_name
+    source = spark.table(source_table).withColumn(
+        HASH_COLUMN,
+        F.sha2(F.concat_ws(HASH_SEPARATOR, F.lit(model_name), F.col(text_column)), 256),
+    )
+    pending = source.select(HASH_COLUMN, text_column).dropDuplicates([HASH_COLUMN])
+    if spark.catalog.tableExists(cache_table):
+        cached = spark.table(cache_table).filter(F.col(MODEL_COLUMN) == model_name).select(HASH_COLUMN)
+        pending = pending.join(cached, HASH_COLUMN, "left_anti")
+    pending_count = pending.count()
+    if pending_count:
+        if num_partitions:
+            pending = pending.repartition(int(num_partitions))
+        body = functools.partial(embed_batches, embedder=embedder, text_column=text_column, batch_size=batch_size)
+        schema = f"{HASH_COLUMN} string, {MODEL_COLUMN} string, {EMBEDDING_COLUMN} array<float>"
+        (
+            pending.mapInPandas(body, schema)
+            .withColumn("created_at", F.current_timestamp())
+            .write.format("delta")
+            .mode("append")
+            .saveAsTable(cache_table)
+        )
+
+    cache = (
+        spark.table(cache_table)
+        .filter(F.col(MODEL_COLUMN) == model_name)
+        .select(HASH_COLUMN, EMBEDDING_COLUMN)
+        .dropDuplicates([HASH_COLUMN])
+    )
+    embedded = source.join(cache, HASH_COLUMN, "inner")
+    if not spark.catalog.tableExists(target_table):
+        embedded.write.format("delta").saveAsTable(target_table)
+        spark.sql(f"ALTER TABLE {target_table} SET TBLPROPERTIES (delta.enableChangeDataFeed = true)")
+    else:
+        # Only rows whose text changed are rewritten, so the index syncs just those.
+        embedded.createOrReplaceTempView("_rag_embedded_source")
+        spark.sql(
+            f"""
+            MERGE INTO {target_table} AS t
+            USING _rag_embedded_source AS s
+            ON t.`{primary_key}` = s.`{primary_key}`
+            WHEN MATCHED AND t.{HASH_COLUMN} <> s.{HASH_COLUMN} THEN UPDATE SET *
+            WHEN NOT MATCHED THEN INSERT *
+            WHEN NOT MATCHED BY SOURCE THEN DELETE
+            """
+        )
+
+    rows = source.count()
+    first = cache.select(EMBEDDING_COLUMN).first()
+    stats = {
+        "rows": rows,
+        "embedded": pending_count,
+        "reused": rows - pending_count,
+        "dimension": len(first[EMBEDDING_COLUMN]) if first else None,
+    }
+    logger.info("Embedding sync %s -> %s: %s", source_table, target_table, stats)
+    return stats
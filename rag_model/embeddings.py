@@ -0,0 +1,144 @@
+"""
+Embedding functions used by the local retrieval backends and for query embeddings in serving.
+
+An embedder is any callable ``embed(texts) -> np.ndarray`` returning one
+L2-normalised float32 row per input text.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Sequence
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+HASHING_MODEL_NAME = "hashing"
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(str(text or "").lower())
+
+
+def content_hash(text: str, model_name: str) -> str:
+    """
+    Cache key for an embedding: the same text under another model is a different vector.
+    Same hash as the ``content_hash`` column written by ``rag_model.embedding_sync``.
+    """
+    return hashlib.sha256(f"{model_name}\x01{text}".encode("utf-8")).hexdigest()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class HashingEmbedder:
+    """
+    Deterministic feature-hashing embedder (unigrams + bigrams).
+    No model or network needed, so snapshots built with it work offline (CI, local dev).
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = int(dim)
+        self.model_name = HASHING_MODEL_NAME
+
+    def _features(self, text: str) -> list:
+        tokens = tokenize(text)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                out[row, (value >> 1) % self.dim] += sign
+        return normalize_rows(out)
+
+
+class DatabricksEmbedder:
+    """
+    Batched calls to a Databricks embedding endpoint (default: databricks-gte-large-en).
+    Uses the MLflow deployments client, so it picks up the same DATABRICKS_* auth as serving.
+    """
+
+    def __init__(self, endpoint: str = "databricks-gte-large-en", batch_size: int = 64, client=None):
+        self.model_name = endpoint
+        self.endpoint = endpoint
+        self.batch_size = int(batch_size)
+        self._client = client
+
+    def _get_client(self):
+        if self._client is None:
+            from mlflow.deployments import get_deploy_client
+
+            self._client = get_deploy_client("databricks")
+        return self._client
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        client = self._get_client()
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [str(t) for t in texts[start:start + self.batch_size]]
+            response = client.predict(endpoint=self.endpoint, inputs={"input": batch})
+            data = sorted(response["data"], key=lambda item: item.get("index", 0))
+            vectors.extend(item["embedding"] for item in data)
+        return normalize_rows(np.asarray(vectors, dtype=np.float32))
+
+
+class CachedEmbedder:
+    """
+    Thread-safe LRU cache in front of an embedder, keyed by the exact text.
+    Repeated queries skip the embedding call; misses in one call are embedded as one batch.
+    """
+
+    def __init__(self, embedder, max_entries: int = 10000):
+        self.embedder = embedder
+        self.model_name = getattr(embedder, "model_name", None)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        texts = [str(t) for t in texts]
+        out = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for position, text in enumerate(texts):
+                vector = self._cache.get(text)
+                if vector is None:
+                    missing.setdefault(text, []).append(position)
+                    continue
+                self._cache.move_to_end(text)
+                out[position] = vector
+                self.hits += 1
+        if missing:
+            vectors = self.embedder(list(missing))
+            with self._lock:
+                for (text, positions), vector in zip(missing.items(), vectors):
+                    self._cache[text] = vector
+                    self._cache.move_to_end(text)
+                    for position in positions:
+                        out[position] = vector
+                self.misses += len(missing)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return np.vstack(out) if out else np.zeros((0, 0), dtype=np.float32)
+
+
+def get_embedder(model_name: str, dim: int = None):
+    """
+    Resolve the embedder a snapshot was built with.
+    """
+    if model_name == HASHING_MODEL_NAME:
+        return HashingEmbedder(dim=dim or 256)
+    return DatabricksEmbedder(endpoint=model_name)
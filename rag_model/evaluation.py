@@ -0,0 +1,380 @@
+"""
+Retrieval and latency evaluation of the RAG model, used to gate model registration.
+
+- Labeled queries come from the FAQ ``Topic`` column: every topic is asked verbatim and as a
+  keyword query, labeled with its own row (``labeled_queries``). A curated CSV with
+  ``query,relevant[,variant]`` columns can be added (``read_labeled_queries``).
+- Retrieval runs through the model's own path (query embedding, index search, reranker) at
+  depth ``max(k_values)`` and is scored as recall@k and MRR, overall and per query variant.
+- Latency and tokens come from full answers (retrieval + chat, bypassing the answer table) on a
+  sample of the queries. The report has exact per-stage p50/p95/p99 and tokens per answer.
+
+The model can use the live Vector Search index (the notebook's loaded model) or the local
+stand-ins (``python -m rag_model.bench.evaluate``). ``check`` compares the metrics with absolute
+limits and with the last registered version's metrics; the notebook logs the metrics on the
+model's MLflow run and refuses to register when there are violations:
+
+    report = evaluate(model, labeled_queries(rows), limits=EvaluationLimits(min_recall={3: 0.9}),
+                      baseline=baseline_metrics("rag_model"))
+    log_report(report, run_id)
+    report.raise_for_violations()
+"""
+
+import csv
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional, Sequence
+
+from rag_model.bench.loadgen import percentile
+from rag_model.metrics import MetricsRegistry, RequestTimer
+
+DEFAULT_K_VALUES = (1, 3, 5, 10)
+METRIC_PREFIX = "eval_"
+# Gated stages; the rest are reported only.
+GATED_STAGES = ("total", "retrieve", "chat")
+STOPWORDS = frozenset(
+    "a an and are can do does for how i in is it my of on or the to what when which who why with".split()
+)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class EvaluationGateError(RuntimeError):
+    """
+    Raised when an evaluation violates its limits; registration must not proceed.
+    """
+
+
+class LabeledQuery:
+    def __init__(self, query: str, relevant: Sequence[str], variant: str = "curated"):
+        self.query = query
+        self.relevant = frozenset(relevant)
+        self.variant = variant
+
+    def __repr__(self) -> str:
+        return f"LabeledQuery({self.query!r}, {sorted(self.relevant)!r}, {self.variant!r})"
+
+
+def keyword_query(text: str) -> str:
+    words = [word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+    return " ".join(words) or text
+
+
+def labeled_queries(rows: Sequence[dict], key_column: str = "Topic", variants: Sequence[str] = ("topic", "keywords")) -> list:
+    """
+    One labeled query per row and variant: ``topic`` asks the Topic verbatim, ``keywords`` asks
+    its content words only (a terser, search-box style query). The relevant document is the row.
+    """
+    out = []
+    for row in rows:
+        key = row.get(key_column)
+        if not key:
+            continue
+        if "topic" in variants:
+            out.append(LabeledQuery(str(key), [key], "topic"))
+        if "keywords" in variants:
+            out.append(LabeledQuery(keyword_query(str(key)), [key], "keywords"))
+    return out
+
+
+def read_labeled_queries(path) -> list:
+    """
+    Curated queries from a CSV with ``query`` and ``relevant`` (``|``-separated keys) columns and
+    an optional ``variant`` column.
+    """
+    with Path(path).open(newline="", encoding="utf-8") as f:
+        return [
+            LabeledQuery(row["query"], [key.strip() for key in row["relevant"].split("|") if key.strip()], row.get("variant") or "curated")
+            for row in csv.DictReader(f)
+            if row.get("query") and row.get("relevant")
+        ]
+
+
+def ranked_keys(model, query: str, depth: int, key_column: str = "Topic") -> list:
+    """
+    Document keys in the order the model would use them: embed, search ``depth`` deep, rerank.
+    """
+    rows = model._retrieve(query, model._embed_query(query), num_results=depth)
+    if model.reranker is not None:
+        rows, _ = model.reranker.rerank(query, rows, depth)
+    return [row.get(key_column) for row in rows]
+
+
+def retrieval_metrics(model, queries: Sequence[LabeledQuery], k_values: Sequence[int] = DEFAULT_K_VALUES, key_column: str = "Topic") -> dict:
+    depth = max(k_values)
+    per_variant = {}
+    misses = []
+    for labeled in queries:
+        keys = ranked_keys(model, labeled.query, depth, key_column)
+        rank = next((i + 1 for i, key in enumerate(keys) if key in labeled.relevant), None)
+        per_variant.setdefault(labeled.variant, []).append(rank)
+        if rank is None or rank > min(k_values):
+            misses.append({"query": labeled.query, "relevant": sorted(labeled.relevant), "rank": rank, "top": keys[:3]})
+
+    def scores(ranks):
+        out = {f"recall_at_{k}": sum(1 for r in ranks if r is not None and r <= k) / len(ranks) for k in k_values}
+        out["mrr"] = sum(1.0 / r for r in ranks if r is not None) / len(ranks)
+        out["queries"] = len(ranks)
+        return out
+
+    all_ranks = [rank for ranks in per_variant.values() for rank in ranks]
+    return {
+        **(scores(all_ranks) if all_ranks else {}),
+        "by_variant": {variant: scores(ranks) for variant, ranks in sorted(per_variant.items())},
+        "misses": misses,
+    }
+
+
+def latency_metrics(model, queries: Sequence[str], use_answers: bool = False) -> dict:
+    """
+    Full answers for ``queries``, one at a time. Exact per-stage percentiles (ms) and tokens per answer.
+    ``use_answers=False`` bypasses the precomputed answer table so the chat path is measured.
+    """
+    registry = MetricsRegistry()
+    stages, usage, errors = {}, {}, 0
+    start = time.perf_counter()
+    for query in queries:
+        timer = RequestTimer(registry)
+        try:
+            with timer:
+                model._answer(query, timer, use_answers=use_answers)
+        except Exception:
+            errors += 1
+            continue
+        for stage, seconds in timer.stages.items():
+            stages.setdefault(stage, []).append(seconds * 1000)
+        for key, value in timer.usage.items():
+            usage[key] = usage.get(key, 0) + value
+    answered = len(queries) - errors
+    tokens = {f"{key}_per_answer": value / answered for key, value in usage.items()} if answered else {}
+    if answered:
+        tokens["tokens_per_answer"] = (usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)) / answered
+    return {
+        "requests": len(queries),
+        "errors": errors,
+        "elapsed_s": time.perf_counter() - start,
+        "stages": {
+            stage: {f"p{q}_ms": percentile(sorted(values), q) for q in (50, 95, 99)}
+            for stage, values in sorted(stages.items())
+        },
+        "tokens": tokens,
+    }
+
+
+class EvaluationLimits:
+    """
+    Absolute limits (``min_recall`` {k: value}, ``min_mrr``, ``max_p95_ms`` {stage: ms},
+    ``max_tokens_per_answer``) and regressions allowed against a baseline (absolute recall/MRR
+    drop, relative p95 and token increase). ``None`` disables a check.
+    """
+
+    def __init__(
+        self,
+        min_recall: Optional[dict] = None,
+        min_mrr: Optional[float] = None,
+        max_p95_ms: Optional[dict] = None,
+        max_tokens_per_answer: Optional[float] = None,
+        max_recall_drop: Optional[float] = 0.02,
+        max_mrr_drop: Optional[float] = 0.02,
+        max_p95_increase: Optional[float] = 0.25,
+        max_tokens_increase: Optional[float] = 0.25,
+        max_error_rate: float = 0.0,
+    ):
+        self.min_recall = {int(k): float(v) for k, v in (min_recall or {}).items()}
+        self.min_mrr = min_mrr
+        self.max_p95_ms = dict(max_p95_ms or {})
+        self.max_tokens_per_answer = max_tokens_per_answer
+        self.max_recall_drop = max_recall_drop
+        self.max_mrr_drop = max_mrr_drop
+        self.max_p95_increase = max_p95_increase
+        self.max_tokens_increase = max_tokens_increase
+        self.max_error_rate = max_error_rate
+
+
+def flatten_metrics(retrieval: dict, latency: Optional[dict]) -> dict:
+    """
+    MLflow metric names: eval_recall_at_3, eval_mrr, eval_keywords_mrr, eval_total_p95_ms,
+    eval_tokens_per_answer, ...
+    """
+    metrics = {}
+    for key, value in retrieval.items():
+        if isinstance(value, (int, float)) and key != "queries":
+            metrics[f"{METRIC_PREFIX}{key}"] = value
+    for variant, scores in retrieval.get("by_variant", {}).items():
+        for key, value in scores.items():
+            if key != "queries":
+                metrics[f"{METRIC_PREFIX}{variant}_{key}"] = value
+    if latency:
+        for stage, values in latency["stages"].items():
+            for key, value in values.items():
+                if value is not None:
+                    metrics[f"{METRIC_PREFIX}{stage}_{key}"] = value
+        for key, value in latency["tokens"].items():
+            metrics[f"{METRIC_PREFIX}{key}"] = value
+        metrics[f"{METRIC_PREFIX}error_rate"] = latency["errors"] / latency["requests"] if latency["requests"] else 0.0
+    return metrics
+
+
+def check(metrics: dict, limits: EvaluationLimits, baseline: Optional[dict] = None) -> list:
+    """
+    Violations (human-readable) of ``limits`` for flattened ``metrics``, against ``baseline``
+    (flattened metrics of the previously registered model) when given.
+    """
+    baseline = baseline or {}
+    violations = []
+
+    def metric(name):
+        return metrics.get(f"{METRIC_PREFIX}{name}")
+
+    def base(name):
+        return baseline.get(f"{METRIC_PREFIX}{name}")
+
+    for k, minimum in limits.min_recall.items():
+        value = metric(f"recall_at_{k}")
+        if value is not None and value < minimum:
+            violations.append(f"recall@{k} {value:.3f} < {minimum:.3f}")
+    if limits.min_mrr is not None and metric("mrr") is not None and metric("mrr") < limits.min_mrr:
+        violations.append(f"MRR {metric('mrr'):.3f} < {limits.min_mrr:.3f}")
+    for stage, maximum in limits.max_p95_ms.items():
+        value = metric(f"{stage}_p95_ms")
+        if value is not None and value > maximum:
+            violations.append(f"{stage} p95 {value:.0f} ms > {maximum:.0f} ms")
+    tokens = metric("tokens_per_answer")
+    if limits.max_tokens_per_answer is not None and tokens is not None and tokens > limits.max_tokens_per_answer:
+        violations.append(f"tokens/answer {tokens:.0f} > {limits.max_tokens_per_answer:.0f}")
+    error_rate = metric("error_rate")
+    if error_rate is not None and error_rate > limits.max_error_rate:
+        violations.append(f"error rate {error_rate:.1%} > {limits.max_error_rate:.1%}")
+
+    # Regressions against the last registered model.
+    for name, value in metrics.items():
+        key = name[len(METRIC_PREFIX):]
+        previous = base(key)
+        if previous is None:
+            continue
+        if re.fullmatch(r"recall_at_\d+", key) and limits.max_recall_drop is not None and previous - value > limits.max_recall_drop:
+            violations.append(f"{key} dropped {previous:.3f} -> {value:.3f}")
+        elif key == "mrr" and limits.max_mrr_drop is not None and previous - value > limits.max_mrr_drop:
+            violations.append(f"MRR dropped {previous:.3f} -> {value:.3f}")
+        elif (
+            limits.max_p95_increase is not None
+            and any(key == f"{stage}_p95_ms" for stage in GATED_STAGES)
+            and previous > 0
+            and value > previous * (1 + limits.max_p95_increase)
+        ):
+            violations.append(f"{key} regressed {previous:.0f} -> {value:.0f} ms (> +{limits.max_p95_increase:.0%})")
+        elif key == "tokens_per_answer" and limits.max_tokens_increase is not None and previous > 0 and value > previous * (1 + limits.max_tokens_increase):
+            violations.append(f"tokens/answer regressed {previous:.0f} -> {value:.0f} (> +{limits.max_tokens_increase:.0%})")
+    return violations
+
+
+class EvaluationReport:
+    def __init__(self, retrieval: dict, latency: Optional[dict], violations: list, baseline: Optional[dict] = None):
+        self.retrieval = retrieval
+        self.latency = latency
+        self.violations = violations
+        self.baseline = baseline
+
+    @property
+    def passed(self) -> bool:
+        return not self.violations
+
+    def metrics(self) -> dict:
+        return flatten_metrics(self.retrieval, self.latency)
+
+    def raise_for_violations(self) -> None:
+        if self.violations:
+            raise EvaluationGateError("Evaluation failed; not registering: " + "; ".join(self.violations))
+
+    def to_dict(self) -> dict:
+        return {
+            "passed": self.passed,
+            "violations": self.violations,
+            "metrics": self.metrics(),
+            "retrieval": self.retrieval,
+            "latency": self.latency,
+            "baseline": self.baseline,
+        }
+
+
+def evaluate(
+    model,
+    queries: Sequence[LabeledQuery],
+    k_values: Sequence[int] = DEFAULT_K_VALUES,
+    latency_queries: int = 20,
+    limits: Optional[EvaluationLimits] = None,
+    baseline: Optional[dict] = None,
+    key_column: str = "Topic",
+) -> EvaluationReport:
+    """
+    ``model`` is a loaded ``RAGModel`` (``loaded_pyfunc_model.unwrap_python_model()``).
+    ``latency_queries`` full answers are timed (0 skips the chat calls and their tokens).
+    """
+    retrieval = retrieval_metrics(model, queries, k_values, key_column)
+    latency = None
+    if latency_queries > 0:
+        sample = [labeled.query for labeled in queries]
+        sample = (sample * (latency_queries // max(len(sample), 1) + 1))[:latency_queries]
+        latency = latency_metrics(model, sample)
+    report = EvaluationReport(retrieval, latency, [], baseline)
+    report.violations = check(report.metrics(), limits or EvaluationLimits(), baseline)
+    return report
+
+
+def format_report(report: EvaluationReport) -> str:
+    lines = []
+    retrieval = report.retrieval
+    recall_keys = [key for key in retrieval if key.startswith("recall_at_")]
+    header = f"{'variant':<10} {'queries':>7} " + " ".join(f"{key.replace('recall_at_', 'R@'):>6}" for key in recall_keys) + f" {'MRR':>6}"
+    lines += [header, "-" * len(header)]
+    for variant, scores in list(retrieval["by_variant"].items()) + [("all", retrieval)]:
+        lines.append(f"{variant:<10} {scores['queries'] if 'queries' in scores else sum(v['queries'] for v in retrieval['by_variant'].values()):>7} "
+                     + " ".join(f"{scores[key]:>6.3f}" for key in recall_keys) + f" {scores['mrr']:>6.3f}")
+    for miss in retrieval["misses"][:5]:
+        lines.append(f"  miss: {miss['query']!r} -> rank {miss['rank']} (top: {miss['top']})")
+    if report.latency:
+        latency = report.latency
+        lines.append(f"\nLatency over {latency['requests']} answers ({latency['errors']} errors):")
+        for stage, values in latency["stages"].items():
+            lines.append(f"  {stage:<18} " + "  ".join(f"{key.replace('_ms', '')}={value:.1f} ms" for key, value in values.items() if value is not None))
+        if latency["tokens"]:
+            lines.append("  tokens/answer: " + ", ".join(f"{'total' if key == 'tokens_per_answer' else key.replace('_per_answer', '')}={value:.0f}" for key, value in latency["tokens"].items()))
+    lines.append("\nGate: " + ("PASSED" if report.passed else "FAILED\n  " + "\n  ".join(report.violations)))
+    return "\n".join(lines)
+
+
+def log_report(report: EvaluationReport, run_id: str) -> None:
+    """
+    Log the flattened metrics, the gate outcome and the full report (``evaluation/report.json``)
+    on the model's MLflow run.
+    """
+    from mlflow import MlflowClient
+
+    client = MlflowClient()
+    timestamp = int(time.time() * 1000)
+    for name, value in report.metrics().items():
+        client.log_metric(run_id, name, float(value), timestamp=timestamp)
+    client.set_tag(run_id, "evaluation_passed", str(report.passed).lower())
+    client.log_dict(run_id, json.loads(json.dumps(report.to_dict(), default=str)), "evaluation/report.json")
+
+
+def baseline_metrics(model_name: str) -> Optional[dict]:
+    """
+    ``eval_*`` metrics of the newest registered version of ``model_name`` that has them, or None.
+    """
+    from mlflow import MlflowClient
+
+    client = MlflowClient()
+    try:
+        versions = client.search_model_versions(f"name='{model_name}'")
+    except Exception:
+        return None
+    for version in sorted(versions, key=lambda v: int(v.version), reverse=True):
+        if not version.run_id:
+            continue
+        metrics = client.get_run(version.run_id).data.metrics
+        evaluated = {key: value for key, value in metrics.items() if key.startswith(METRIC_PREFIX)}
+        if evaluated:
+            return evaluated
+    return None
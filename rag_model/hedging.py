@@ -0,0 +1,156 @@
+"""
+Hedged ``similarity_search`` calls: cut the retrieval tail by racing a duplicate request.
+
+A Vector Search query that is still running after the ``percentile``-th latency of recent calls
+is most likely stuck behind something (a busy replica, a GC pause, a slow connection), and a fresh
+request usually returns sooner than it does. ``HedgedIndex`` then sends one duplicate and returns
+whichever answer arrives first.
+
+- The threshold adapts: it is the ``percentile`` of the last ``window`` primary latencies (the
+  primary's latency is recorded when it completes, even if the hedge won), floored at
+  ``min_delay_ms``. No hedges are sent until ``min_samples`` latencies are known.
+- ``HedgeBudget`` caps the extra load: every request earns ``budget`` of a hedge (0.05 = at most
+  one hedge per 20 requests over time, bursts up to ``max_burst``), so a slow backend is not hit
+  with twice the traffic when everything is slow.
+- Errors are not hedged: a failing primary fails the call unless a hedge is already racing it.
+
+Counters: ``hedged_requests_total``, ``hedge_wins_total``, ``hedge_budget_exhausted_total``.
+
+    index = HedgedIndex(vsc.get_index(endpoint, index_name), percentile=95, budget=0.05)
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Optional
+
+from rag_model.threads import spawn
+
+
+class HedgeBudget:
+    """
+    Token bucket for hedges: each request adds ``ratio`` tokens (up to ``max_burst``), a hedge spends one.
+    """
+
+    def __init__(self, ratio: float = 0.05, max_burst: float = 10.0):
+        self.ratio = float(ratio)
+        self.max_burst = float(max_burst)
+        self.tokens = 0.0
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self.tokens < 1.0:
+                return False
+            self.tokens -= 1.0
+            return True
+
+
+class LatencyWindow:
+    """
+    Percentile of the last ``size`` latencies, recomputed every ``refresh_every`` observations.
+    """
+
+    def __init__(self, percentile: float = 95.0, size: int = 1000, refresh_every: int = 50):
+        self.percentile = float(percentile)
+        self.refresh_every = int(refresh_every)
+        self._values = deque(maxlen=int(size))
+        self._pending = 0
+        self._threshold = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._values.append(seconds)
+            self._pending += 1
+            if self._threshold is None or self._pending >= self.refresh_every:
+                ordered = sorted(self._values)
+                rank = max(0, min(len(ordered) - 1, int(round(self.percentile / 100.0 * len(ordered))) - 1))
+                self._threshold = ordered[rank]
+                self._pending = 0
+
+    def threshold(self) -> Optional[float]:
+        return self._threshold
+
+
+class HedgedIndex:
+    """
+    ``similarity_search`` that sends one duplicate request once the adaptive threshold passes.
+    Each search starts at once on its own thread, so the hedge delay only measures the search.
+    """
+
+    def __init__(
+        self,
+        index,
+        percentile: float = 95.0,
+        budget: float = 0.05,
+        min_delay_ms: float = 20.0,
+        min_samples: int = 20,
+        window: int = 1000,
+        max_burst: float = 10.0,
+        registry=None,
+    ):
+        self.index = index
+        self.latencies = LatencyWindow(percentile, size=window)
+        self.budget = HedgeBudget(budget, max_burst=max_burst)
+        self.min_delay_s = float(min_delay_ms) / 1000.0
+        self.min_samples = int(min_samples)
+        self.registry = registry
+
+    def describe(self) -> dict:
+        return self.index.describe()
+
+    def _inc(self, name: str) -> None:
+        if self.registry is not None:
+            self.registry.inc(name)
+
+    def delay_s(self) -> Optional[float]:
+        """
+        Seconds to wait before hedging, or None while too few latencies are known.
+        """
+        threshold = self.latencies.threshold()
+        if threshold is None or len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay_s, threshold)
+
+    def _search(self, kwargs: dict):
+        return self.index.similarity_search(**kwargs)
+
+    def _timed_search(self, kwargs: dict):
+        start = time.perf_counter()
+        result = self.index.similarity_search(**kwargs)
+        self.latencies.observe(time.perf_counter() - start)
+        return result
+
+    def similarity_search(self, **kwargs) -> dict:
+        self.budget.earn()
+        delay = self.delay_s()
+        if delay is None:
+            return self._timed_search(kwargs)
+        primary = spawn(self._timed_search, kwargs, name="hedged-retrieval")
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.budget.try_spend():
+            if not done:
+                self._inc("hedge_budget_exhausted_total")
+            return primary.result()
+
+        self._inc("hedged_requests_total")
+        hedge = spawn(self._search, kwargs, name="hedged-retrieval")
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._inc("hedge_wins_total")
+                    return future.result()
+        # Both failed: report the primary's error.
+        return primary.result()
@@ -0,0 +1,85 @@
+"""
+Hybrid retrieval: query a vector index and a lexical index, then fuse with RRF.
+
+Both run on the calling thread: the vector search is the network round trip, and the in-memory
+BM25 lookup is cheap next to it, so a worker pool would only add queueing.
+"""
+
+import logging
+from typing import Optional, Sequence
+
+from rag_model.results import build_result, result_rows
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(ranked_lists: Sequence[Sequence[dict]], key: str, k: int = RRF_K) -> list:
+    """
+    Merge ranked hit lists by summing 1 / (k + rank) per key. Returns (row, score) pairs, best first.
+    The first list to contain a key provides its row values.
+    """
+    scores = {}
+    rows = {}
+    for hits in ranked_lists:
+        for rank, row in enumerate(hits, start=1):
+            row_key = row.get(key)
+            scores[row_key] = scores.get(row_key, 0.0) + 1.0 / (k + rank)
+            rows.setdefault(row_key, row)
+    ordered = sorted(scores, key=lambda row_key: scores[row_key], reverse=True)
+    return [(rows[row_key], scores[row_key]) for row_key in ordered]
+
+
+class HybridIndex:
+    """
+    ``similarity_search`` over vector + BM25 results fused by reciprocal rank.
+    Each side is over-fetched to ``candidates`` hits so fusion has room to reorder.
+    """
+
+    def __init__(self, vector_index, lexical_index, key_column: str = "Topic", candidates: int = 20, rrf_k: int = RRF_K):
+        self.vector_index = vector_index
+        self.lexical_index = lexical_index
+        self.key_column = key_column
+        self.candidates = int(candidates)
+        self.rrf_k = int(rrf_k)
+
+    def describe(self) -> dict:
+        return self.vector_index.describe()
+
+    def similarity_search(
+        self,
+        query_text: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        num_results: int = 10,
+        **kwargs,
+    ) -> dict:
+        columns = list(columns or [self.key_column])
+        fetch_columns = columns if self.key_column in columns else columns + [self.key_column]
+        fetch = max(int(num_results), self.candidates)
+
+        vector_hits = result_rows(
+            self.vector_index.similarity_search(
+                # A precomputed query_vector replaces server-side embedding of the text.
+                query_text=None if kwargs.get("query_vector") is not None else query_text,
+                columns=fetch_columns,
+                num_results=fetch,
+                **kwargs,
+            )
+        )
+        try:
+            lexical_hits = result_rows(
+                self.lexical_index.similarity_search(query_text=query_text, columns=fetch_columns, num_results=fetch)
+            )
+        except Exception:
+            # Lexical side is an enhancement; never fail the request because of it.
+            logger.exception("Lexical retrieval failed; using vector results only.")
+            lexical_hits = []
+
+        fused = reciprocal_rank_fusion([vector_hits, lexical_hits], key=self.key_column, k=self.rrf_k)
+        fused = fused[: int(num_results)]
+        return build_result(
+            columns,
+            [[row.get(col) for col in columns] for row, _ in fused],
+            [score for _, score in fused],
+        )
@@ -0,0 +1,169 @@
+"""
+Keep-warm pings for a scale-to-zero serving endpoint.
+
+A health invocation (``{"query": "__health__"}``) is answered by the model after a retrieval but
+without an Azure OpenAI call. It costs no tokens and keeps the index connection and AAD token
+warm. One every few minutes during business hours keeps the endpoint from scaling to zero (its
+idle timeout is about 30 minutes), so users never hit a cold start then; outside business hours
+it scales to zero as usual.
+
+Standard library only (plus databricks-sdk for job auth), so it runs as a plain Python file in a
+scheduled Databricks job (``terraform/12_serving_endpoint``, ``keep_warm_enabled``) as well as
+from a laptop or cron:
+
+    python -m rag_model.keepwarm --endpoint rag-model-endpoint-otter --once
+    python -m rag_model.keepwarm --url https://<host>/serving-endpoints/<name> --interval-min 10 --hours 08:00-18:00 --days mon-fri --tz Europe/London
+
+With ``DATABRICKS_TOKEN`` set, requests use it as a bearer token. Otherwise ``--endpoint`` falls back to
+databricks-sdk default auth (the job's own identity inside Databricks).
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+HEALTH_QUERY = "__health__"
+HEALTH_ANSWER = "ok"
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DEFAULT_TIMEOUT_S = 120.0
+
+
+def parse_days(text: str) -> frozenset:
+    """
+    ``"mon-fri"``, ``"sat,sun"`` or ``"mon-wed,fri"`` -> weekday numbers (Monday = 0).
+    """
+    days = set()
+    for part in (p.strip().lower() for p in text.split(",") if p.strip()):
+        first, _, last = part.partition("-")
+        start = DAY_NAMES.index(first[:3])
+        end = DAY_NAMES.index((last or first)[:3])
+        days.update(range(start, end + 1) if start <= end else [*range(start, 7), *range(0, end + 1)])
+    return frozenset(days)
+
+
+class BusinessHours:
+    """
+    Weekly window such as mon-fri 08:00-18:00 in a given IANA time zone.
+    """
+
+    def __init__(self, hours: str = "08:00-18:00", days: str = "mon-fri", tz: str = "UTC"):
+        start, end = hours.split("-")
+        self.start = dt.time.fromisoformat(start.strip())
+        self.end = dt.time.fromisoformat(end.strip())
+        self.days = parse_days(days)
+        self.tz = tz
+        self.zone = ZoneInfo(tz)
+
+    def contains(self, when: Optional[dt.datetime] = None) -> bool:
+        local = (when or dt.datetime.now(dt.timezone.utc)).astimezone(self.zone)
+        return local.weekday() in self.days and self.start <= local.time() < self.end
+
+    def __repr__(self) -> str:
+        days = ",".join(DAY_NAMES[d] for d in sorted(self.days))
+        return f"BusinessHours({self.start:%H:%M}-{self.end:%H:%M} {days} {self.tz})"
+
+
+def health_payload() -> dict:
+    return {"dataframe_split": {"columns": ["query"], "data": [[HEALTH_QUERY]]}}
+
+
+def _sdk_auth() -> tuple:
+    # databricks-sdk default auth: env vars, ~/.databrickscfg, or the job's identity on Databricks.
+    from databricks.sdk import WorkspaceClient
+
+    config = WorkspaceClient().config
+    return config.host, config.authenticate
+
+
+def invocations_url(endpoint: str, host: Optional[str] = None) -> str:
+    host = (host or os.getenv("DATABRICKS_HOST") or "").rstrip("/")
+    if host and not host.startswith("https://"):
+        host = f"https://{host}"
+    return f"{host}/serving-endpoints/{endpoint}/invocations"
+
+
+def bearer(token: str):
+    return lambda: {"Authorization": f"Bearer {token}"}
+
+
+def ping(url: str, auth, timeout_s: float = DEFAULT_TIMEOUT_S) -> dict:
+    """
+    One health invocation; ``auth()`` returns the auth headers. Returns {"ok", "status",
+    "latency_s", "error"} and never raises on HTTP errors.
+    """
+    if not url.rstrip("/").endswith("/invocations"):
+        url = url.rstrip("/") + "/invocations"
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(health_payload()).encode("utf-8"),
+        headers={**auth(), "Content-Type": "application/json"},
+        method="POST",
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout_s) as response:
+            body = json.loads(response.read().decode("utf-8") or "{}")
+            status = response.status
+    except urllib.error.HTTPError as exc:
+        return {"ok": False, "status": exc.code, "latency_s": time.perf_counter() - start, "error": exc.read().decode("utf-8", "replace")[:500]}
+    except (urllib.error.URLError, TimeoutError) as exc:
+        return {"ok": False, "status": None, "latency_s": time.perf_counter() - start, "error": str(exc)}
+    predictions = body.get("predictions") if isinstance(body, dict) else None
+    answer = (predictions[0] or {}).get("answer") if isinstance(predictions, list) and predictions else None
+    return {"ok": answer == HEALTH_ANSWER, "status": status, "latency_s": time.perf_counter() - start, "error": None if answer == HEALTH_ANSWER else str(body)[:500]}
+
+
+def run(url: str, auth, hours: Optional[BusinessHours], interval_s: float, once: bool = False, timeout_s: float = DEFAULT_TIMEOUT_S) -> int:
+    """
+    Ping every ``interval_s`` while inside ``hours`` (always when None). ``once`` pings at most once
+    (the scheduled-job mode, where the schedule already encodes the hours). Returns an exit code.
+    """
+    while True:
+        if hours is None or hours.contains():
+            result = ping(url, auth, timeout_s)
+            print(f"[{time.strftime('%H:%M:%S')}] keep-warm {url}: {'ok' if result['ok'] else 'FAILED'} "
+                  f"status={result['status']} {result['latency_s'] * 1000:.0f} ms"
+                  + (f" {result['error']}" if result["error"] else ""), flush=True)
+            if once:
+                return 0 if result["ok"] else 1
+        elif once:
+            print(f"Outside {hours}; not pinging.")
+            return 0
+        time.sleep(interval_s)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send keep-warm health invocations to a serving endpoint during business hours.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="https://<host>/serving-endpoints/<name>[/invocations]")
+    target.add_argument("--endpoint", help="Serving endpoint name (host from DATABRICKS_HOST or databricks-sdk auth)")
+    parser.add_argument("--interval-min", type=float, default=10.0, help="Minutes between pings (keep below the ~30 min scale-to-zero idle timeout)")
+    parser.add_argument("--hours", default="08:00-18:00", help="Local business hours, HH:MM-HH:MM")
+    parser.add_argument("--days", default="mon-fri", help="Business days, e.g. mon-fri or mon-thu,sat")
+    parser.add_argument("--tz", default="UTC", help="IANA time zone of --hours")
+    parser.add_argument("--always", action="store_true", help="Ignore --hours/--days")
+    parser.add_argument("--once", action="store_true", help="Ping once and exit (for cron / scheduled jobs)")
+    parser.add_argument("--timeout-s", type=float, default=DEFAULT_TIMEOUT_S, help="Per-ping timeout (a cold replica can take minutes)")
+    args = parser.parse_args(argv)
+
+    token = os.getenv("DATABRICKS_TOKEN")
+    host = os.getenv("DATABRICKS_HOST")
+    if token:
+        auth = bearer(token)
+    elif args.endpoint:
+        host, auth = _sdk_auth()
+    else:
+        parser.error("Set DATABRICKS_TOKEN (or use --endpoint with databricks-sdk auth).")
+    url = args.url or invocations_url(args.endpoint, host)
+    hours = None if args.always else BusinessHours(args.hours, args.days, args.tz)
+    return run(url, auth, hours, args.interval_min * 60.0, once=args.once, timeout_s=args.timeout_s)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""
+Compact BM25 inverted index over the FAQ text columns.
+
+Postings are stored CSR-style (one offsets array + flat doc id / term frequency arrays),
+so even large corpora stay a few numpy arrays. The index exposes the same
+``similarity_search`` interface as the vector backends so it can be fused with them.
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from rag_model.embeddings import tokenize
+from rag_model.local_index import top_k
+from rag_model.results import build_result
+
+LEXICAL_FORMAT_VERSION = 1
+META_FILE = "bm25.json"
+ARRAYS_FILE = "bm25.npz"
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it its my of on or should "
+    "that the their there these this to was what when where which who why will with you your".split()
+)
+
+
+def analyze(text: str) -> list:
+    return [token for token in tokenize(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one or more text fields (default: Topic + Description).
+    """
+
+    def __init__(
+        self,
+        vocab: dict,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        term_freqs: np.ndarray,
+        doc_len: np.ndarray,
+        columns: Sequence[str],
+        rows: list,
+        fields: Sequence[str],
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_len = doc_len
+        self.columns = list(columns)
+        self.rows = rows
+        self.fields = list(fields)
+        self.k1 = float(k1)
+        self.b = float(b)
+        count = doc_len.shape[0]
+        self.avg_doc_len = float(doc_len.mean()) if count else 0.0
+        doc_freq = np.diff(offsets).astype(np.float64)
+        self.idf = np.log1p((count - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    @classmethod
+    def from_rows(
+        cls,
+        columns: Sequence[str],
+        rows: Sequence[Sequence],
+        fields: Sequence[str] = ("Topic", "Description"),
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        positions = [list(columns).index(field) for field in fields]
+        postings = {}
+        doc_len = np.zeros(len(rows), dtype=np.float32)
+        for doc_id, row in enumerate(rows):
+            terms = analyze(" ".join(str(row[p] or "") for p in positions))
+            doc_len[doc_id] = len(terms)
+            for term, freq in Counter(terms).items():
+                postings.setdefault(term, []).append((doc_id, freq))
+
+        vocab = {}
+        offsets = [0]
+        doc_ids = []
+        term_freqs = []
+        for term in sorted(postings):
+            vocab[term] = len(vocab)
+            for doc_id, freq in postings[term]:
+                doc_ids.append(doc_id)
+                term_freqs.append(freq)
+            offsets.append(len(doc_ids))
+        return cls(
+            vocab,
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(doc_ids, dtype=np.int32),
+            np.asarray(term_freqs, dtype=np.float32),
+            doc_len,
+            columns,
+            [list(row) for row in rows],
+            fields,
+            k1=k1,
+            b=b,
+        )
+
+    @classmethod
+    def from_records(cls, records: Sequence[dict], columns: Sequence[str] = ("Topic", "Description"), **kwargs):
+        return cls.from_rows(columns, [[record.get(col) for col in columns] for record in records], **kwargs)
+
+    def save(self, out_dir) -> Path:
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            out / ARRAYS_FILE,
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_len=self.doc_len,
+        )
+        terms = sorted(self.vocab, key=self.vocab.get)
+        meta = {
+            "format_version": LEXICAL_FORMAT_VERSION,
+            "columns": self.columns,
+            "fields": self.fields,
+            "k1": self.k1,
+            "b": self.b,
+            "terms": terms,
+            "rows": self.rows,
+        }
+        (out / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+        return out
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+        if meta.get("format_version") != LEXICAL_FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported lexical index format: {meta.get('format_version')}")
+        arrays = np.load(path / ARRAYS_FILE)
+        return cls(
+            {term: i for i, term in enumerate(meta["terms"])},
+            arrays["offsets"],
+            arrays["doc_ids"],
+            arrays["term_freqs"],
+            arrays["doc_len"],
+            meta["columns"],
+            meta["rows"],
+            meta["fields"],
+            k1=meta["k1"],
+            b=meta["b"],
+        )
+
+    def search(self, query_text: str, k: int):
+        """
+        Return (row_ids, scores) for the k best BM25 matches, best first.
+        """
+        term_ids = sorted({self.vocab[t] for t in analyze(query_text) if t in self.vocab})
+        if not term_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids = []
+        contributions = []
+        for term_id in term_ids:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[docs] / max(self.avg_doc_len, 1e-9))
+            ids.append(docs)
+            contributions.append(self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + norm))
+        unique_ids, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions)).astype(np.float32)
+        best = top_k(scores, k)
+        return unique_ids[best].astype(np.int64), scores[best]
+
+    def similarity_search(
+        self,
+        query_text: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        num_results: int = 10,
+        **kwargs,
+    ) -> dict:
+        columns = list(columns or self.columns)
+        positions = [self.columns.index(col) for col in columns]
+        ids, scores = self.search(query_text or "", num_results)
+        rows = [[self.rows[i][p] for p in positions] for i in ids]
+        return build_result(columns, rows, scores)
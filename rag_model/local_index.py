@@ -0,0 +1,419 @@
+"""
+In-process vector index with the same ``similarity_search`` interface as Databricks Vector Search.
+
+A snapshot is a directory exported from the Delta table + embeddings:
+- meta.json      : columns, dimension, embedding model, index type
+- vectors.f32    : row-major float32 matrix (L2-normalised), memory-mapped at load time
+- rows.json      : row values in column order
+- ivf_*.npy      : optional inverted-file lists (coarse centroids + row order + offsets)
+- hnsw.bin       : optional HNSW graph (requires hnswlib)
+- sq8_*.npy / pq_*.npy : optional compact codes (rag_model.quantize), searched in RAM and rescored
+                   against vectors.f32
+
+Build one offline (CI / local dev) from the seed CSV:
+    python -m rag_model.local_index build --csv data/diabetes_treatment_faq.csv --out /tmp/faq_index
+    python -m rag_model.local_index query --index /tmp/faq_index --text "what is diabetes?"
+    python -m rag_model.local_index build --csv data/diabetes_treatment_faq.csv --out /tmp/faq_pq --quantization pq
+"""
+
+import argparse
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from rag_model.embeddings import HashingEmbedder, get_embedder, normalize_rows
+from rag_model.quantize import QUANTIZATION_TYPES, RESCORE_FACTORS, load_codes, save_codes, train_quantizer
+from rag_model.results import build_result
+
+SNAPSHOT_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+ROWS_FILE = "rows.json"
+IVF_CENTROIDS_FILE = "ivf_centroids.npy"
+IVF_ORDER_FILE = "ivf_order.npy"
+IVF_OFFSETS_FILE = "ivf_offsets.npy"
+HNSW_FILE = "hnsw.bin"
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+ASSIGN_CHUNK_ROWS = 65536
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first (argpartition, then sort only the k winners).
+    """
+    n = scores.shape[0]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(n)
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], ASSIGN_CHUNK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_CHUNK_ROWS], dtype=np.float32)
+        out[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def train_ivf(vectors: np.ndarray, nlist: int, iters: int = 10, seed: int = 0):
+    """
+    Spherical k-means for the IVF coarse quantizer. Returns (centroids, assignments).
+    """
+    n = vectors.shape[0]
+    nlist = max(1, min(int(nlist), n))
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(n, size=nlist, replace=False)], dtype=np.float32)
+    assignments = _assign(vectors, centroids)
+    for _ in range(iters):
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, np.asarray(vectors, dtype=np.float32))
+        counts = np.bincount(assignments, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(n, size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+        new_assignments = _assign(vectors, centroids)
+        if np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+    return centroids, assignments
+
+
+def build_snapshot(
+    out_dir,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    vectors: np.ndarray,
+    embedding_model: str,
+    index_type: str = "flat",
+    nlist: Optional[int] = None,
+    primary_key: Optional[str] = None,
+    embedding_source_column: Optional[str] = None,
+    quantization: Optional[str] = None,
+    pq_m: Optional[int] = None,
+) -> Path:
+    """
+    Write a local index snapshot. ``rows`` are in ``columns`` order and aligned with ``vectors``.
+    ``quantization`` ("sq8" or "pq") adds compact codes next to the float32 matrix.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"index_type must be one of {INDEX_TYPES}, got {index_type!r}")
+    if quantization == "none":
+        quantization = None
+    if quantization is not None and index_type == "hnsw":
+        raise ValueError("quantization applies to flat and ivf snapshots; hnswlib keeps its own vectors.")
+    vectors = normalize_rows(vectors)
+    if vectors.shape[0] != len(rows):
+        raise ValueError(f"Got {vectors.shape[0]} vectors for {len(rows)} rows.")
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    count, dim = vectors.shape
+
+    matrix = np.memmap(out / VECTORS_FILE, dtype=np.float32, mode="w+", shape=(count, dim))
+    matrix[:] = vectors
+    matrix.flush()
+    del matrix
+
+    (out / ROWS_FILE).write_text(json.dumps([list(row) for row in rows]), encoding="utf-8")
+
+    meta = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "count": int(count),
+        "dim": int(dim),
+        "columns": list(columns),
+        "primary_key": primary_key,
+        "embedding_source_column": embedding_source_column,
+        "embedding_model": embedding_model,
+        "index_type": index_type,
+        "created_at": int(time.time()),
+    }
+
+    if index_type == "ivf":
+        nlist = nlist or max(1, int(np.sqrt(count)))
+        centroids, assignments = train_ivf(vectors, nlist)
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=centroids.shape[0]))])
+        np.save(out / IVF_CENTROIDS_FILE, centroids)
+        np.save(out / IVF_ORDER_FILE, order)
+        np.save(out / IVF_OFFSETS_FILE, offsets.astype(np.int64))
+        meta["ivf"] = {"nlist": int(centroids.shape[0])}
+    elif index_type == "hnsw":
+        try:
+            import hnswlib
+        except ImportError as exc:
+            raise ImportError("index_type='hnsw' requires hnswlib (pip install hnswlib).") from exc
+        graph = hnswlib.Index(space="ip", dim=dim)
+        graph.init_index(max_elements=count, ef_construction=200, M=16)
+        graph.add_items(vectors, np.arange(count))
+        graph.save_index(str(out / HNSW_FILE))
+        meta["hnsw"] = {"M": 16, "ef_construction": 200}
+
+    if quantization is not None:
+        quantizer = train_quantizer(vectors, quantization, pq_m=pq_m)
+        meta["quantization"] = save_codes(out, quantizer, quantizer.encode(vectors))
+
+    (out / META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return out
+
+
+def snapshot_from_records(
+    out_dir,
+    records: Sequence[dict],
+    embed_fn: Callable,
+    columns: Sequence[str] = ("Topic", "Description"),
+    text_column: str = "Description",
+    primary_key: Optional[str] = "Topic",
+    index_type: str = "flat",
+    nlist: Optional[int] = None,
+    quantization: Optional[str] = None,
+    pq_m: Optional[int] = None,
+) -> Path:
+    """
+    Embed ``text_column`` for each record and write a snapshot (e.g. from ``spark.table(...).toPandas()``).
+    """
+    rows = [[record.get(col) for col in columns] for record in records]
+    vectors = embed_fn([record.get(text_column) or "" for record in records])
+    return build_snapshot(
+        out_dir,
+        columns,
+        rows,
+        vectors,
+        embedding_model=getattr(embed_fn, "model_name", "custom"),
+        index_type=index_type,
+        nlist=nlist,
+        primary_key=primary_key,
+        embedding_source_column=text_column,
+        quantization=quantization,
+        pq_m=pq_m,
+    )
+
+
+class LocalVectorIndex:
+    """
+    Memory-mapped cosine index exposing ``similarity_search(query_text, columns, num_results)``.
+
+    With quantized codes, candidates are ranked on the codes and the best ``k * rescore_factor``
+    (default per quantization type) are rescored exactly from the memory-mapped float32 matrix;
+    ``rescore_factor=0`` returns the approximate scores as is.
+    """
+
+    def __init__(
+        self,
+        path,
+        meta: dict,
+        vectors: np.ndarray,
+        rows: list,
+        embed_fn: Callable,
+        nprobe: int = 8,
+        rescore_factor: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.meta = meta
+        self.vectors = vectors
+        self.rows = rows
+        self.columns = list(meta["columns"])
+        self.embed_fn = embed_fn
+        self.nprobe = int(nprobe)
+        self.index_type = meta.get("index_type", "flat")
+        self._ivf = None
+        self._hnsw = None
+        self._codes = None
+        if meta.get("quantization"):
+            self._codes = load_codes(self.path, meta["quantization"])
+            if rescore_factor is None:
+                rescore_factor = RESCORE_FACTORS[meta["quantization"]["type"]]
+        self.rescore_factor = float(rescore_factor or 0.0)
+        if self.index_type == "ivf":
+            self._ivf = (
+                np.load(self.path / IVF_CENTROIDS_FILE),
+                np.load(self.path / IVF_ORDER_FILE, mmap_mode="r"),
+                np.load(self.path / IVF_OFFSETS_FILE),
+            )
+        elif self.index_type == "hnsw":
+            import hnswlib
+
+            self._hnsw = hnswlib.Index(space="ip", dim=int(meta["dim"]))
+            self._hnsw.load_index(str(self.path / HNSW_FILE), max_elements=int(meta["count"]))
+
+    @classmethod
+    def load(
+        cls,
+        path,
+        embed_fn: Optional[Callable] = None,
+        nprobe: int = 8,
+        index_type: Optional[str] = None,
+        quantization: Optional[str] = None,
+        rescore_factor: Optional[float] = None,
+    ):
+        """
+        Open a snapshot. The embedder defaults to the one recorded in meta.json.
+        ``index_type="flat"`` forces exact search on an IVF/HNSW snapshot; ``quantization="none"``
+        ignores its quantized codes.
+        """
+        path = Path(path)
+        meta = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+        if meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise RuntimeError(f"Unsupported local index format: {meta.get('format_version')}")
+        if index_type is not None:
+            meta = dict(meta, index_type=index_type)
+        if quantization == "none" or meta.get("index_type") == "hnsw":
+            meta = dict(meta, quantization=None)
+        vectors = np.memmap(
+            path / VECTORS_FILE,
+            dtype=np.float32,
+            mode="r",
+            shape=(int(meta["count"]), int(meta["dim"])),
+        )
+        rows = json.loads((path / ROWS_FILE).read_text(encoding="utf-8"))
+        if embed_fn is None:
+            embed_fn = get_embedder(meta["embedding_model"], dim=int(meta["dim"]))
+        return cls(path, meta, vectors, rows, embed_fn, nprobe=nprobe, rescore_factor=rescore_factor)
+
+    def describe(self) -> dict:
+        # Mirrors the Vector Search index.describe() fields the notebook polls.
+        return {
+            "name": str(self.path),
+            "index_type": f"LOCAL_{self.index_type.upper()}",
+            "quantization": (self.meta.get("quantization") or {}).get("type", "none"),
+            "primary_key": self.meta.get("primary_key"),
+            "status": {
+                "ready": True,
+                "detailed_state": "ONLINE_LOCAL",
+                "indexed_row_count": int(self.meta["count"]),
+            },
+        }
+
+    def embed_query(self, query_text: str) -> np.ndarray:
+        return normalize_rows(self.embed_fn([query_text]))[0]
+
+    def search_vector(self, query_vector, k: int):
+        """
+        Return (row_ids, scores) for the k nearest rows, best first.
+        """
+        q = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        if self._hnsw is not None:
+            k = min(int(k), int(self.meta["count"]))
+            self._hnsw.set_ef(max(2 * k, 50))
+            labels, distances = self._hnsw.knn_query(q, k=k)
+            return labels[0].astype(np.int64), 1.0 - distances[0]
+        if self._ivf is not None:
+            centroids, order, offsets = self._ivf
+            lists = top_k(centroids @ q, self.nprobe)
+            candidates = np.concatenate([order[offsets[l]:offsets[l + 1]] for l in lists])
+            if candidates.shape[0] >= k:
+                if self._codes is not None:
+                    return self._search_codes(q, k, candidates)
+                candidates = np.sort(candidates)
+                scores = np.asarray(self.vectors[candidates]) @ q
+                best = top_k(scores, k)
+                return candidates[best], scores[best]
+        if self._codes is not None:
+            return self._search_codes(q, k)
+        scores = np.asarray(self.vectors @ q)
+        best = top_k(scores, k)
+        return best, scores[best]
+
+    def _search_codes(self, q: np.ndarray, k: int, candidates: Optional[np.ndarray] = None):
+        quantizer, codes = self._codes
+        approx = quantizer.scores(codes if candidates is None else quantizer.select(codes, candidates), q)
+        if self.rescore_factor <= 0:
+            best = top_k(approx, k)
+            return (best if candidates is None else candidates[best]), approx[best]
+        shortlist = top_k(approx, max(int(k), int(np.ceil(k * self.rescore_factor))))
+        ids = np.sort(shortlist if candidates is None else candidates[shortlist])
+        # Only the shortlisted rows of the float32 matrix are paged in.
+        scores = np.asarray(self.vectors[ids]) @ q
+        best = top_k(scores, k)
+        return ids[best], scores[best]
+
+    def similarity_search(
+        self,
+        query_text: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        num_results: int = 10,
+        query_vector=None,
+        **kwargs,
+    ) -> dict:
+        if query_vector is None:
+            if query_text is None:
+                raise ValueError("similarity_search needs query_text or query_vector.")
+            query_vector = self.embed_query(query_text)
+        else:
+            query_vector = normalize_rows(query_vector)[0]
+        columns = list(columns or self.columns)
+        missing = [col for col in columns if col not in self.columns]
+        if missing:
+            raise ValueError(f"Unknown columns {missing}; snapshot has {self.columns}.")
+        positions = [self.columns.index(col) for col in columns]
+        ids, scores = self.search_vector(query_vector, num_results)
+        rows = [[self.rows[i][p] for p in positions] for i in ids]
+        return build_result(columns, rows, scores)
+
+
+def read_csv_records(path) -> list:
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query a local vector index snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build a snapshot from a CSV using the offline hashing embedder")
+    build.add_argument("--csv", required=True, help="CSV with Topic/Description columns")
+    build.add_argument("--out", required=True, help="Output snapshot directory")
+    build.add_argument("--text-column", default="Description", help="Column to embed")
+    build.add_argument("--columns", default="Topic,Description", help="Comma-separated columns to store")
+    build.add_argument("--primary-key", default="Topic", help="Primary key column")
+    build.add_argument("--index-type", default="flat", choices=INDEX_TYPES, help="Index structure")
+    build.add_argument("--nlist", type=int, default=None, help="IVF list count (default sqrt(n))")
+    build.add_argument("--dim", type=int, default=256, help="Hashing embedder dimension")
+    build.add_argument("--quantization", default="none", choices=("none",) + QUANTIZATION_TYPES, help="Compact codes to add")
+    build.add_argument("--pq-m", type=int, default=None, help="PQ subspaces (default dim / 8)")
+
+    query = sub.add_parser("query", help="Run a similarity search against a snapshot")
+    query.add_argument("--index", required=True, help="Snapshot directory")
+    query.add_argument("--text", required=True, help="Query text")
+    query.add_argument("--num-results", "-k", type=int, default=3, help="Number of results")
+    query.add_argument("--nprobe", type=int, default=8, help="IVF lists to probe")
+    query.add_argument("--rescore-factor", type=float, default=None, help="Quantized candidates rescored per result")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        records = read_csv_records(args.csv)
+        out = snapshot_from_records(
+            args.out,
+            records,
+            HashingEmbedder(dim=args.dim),
+            columns=[c.strip() for c in args.columns.split(",") if c.strip()],
+            text_column=args.text_column,
+            primary_key=args.primary_key,
+            index_type=args.index_type,
+            nlist=args.nlist,
+            quantization=args.quantization,
+            pq_m=args.pq_m,
+        )
+        print(f"Wrote {len(records)} rows to {out}")
+        return 0
+
+    index = LocalVectorIndex.load(args.index, nprobe=args.nprobe, rescore_factor=args.rescore_factor)
+    start = time.perf_counter()
+    res = index.similarity_search(query_text=args.text, num_results=args.num_results)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(json.dumps(res, indent=2))
+    print(f"similarity_search took {elapsed_ms:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
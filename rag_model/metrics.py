@@ -0,0 +1,258 @@
+"""
+Lightweight per-stage latency metrics for the served RAG model.
+
+- Fixed-bucket histograms (one bisect + one locked increment per observation).
+- Side channels: periodic structured-log snapshots, an optional Prometheus text file,
+  sampled per-request JSON log lines and sampled MLflow traces.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from typing import Optional
+
+logger = logging.getLogger("rag_model.metrics")
+
+# Seconds; tuned for the retrieval (ms) to chat completion (s) range.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def state(self):
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation inside the matching bucket.
+        """
+        counts, _, count = self.state()
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+
+
+class MetricsRegistry:
+    """
+    Process-wide stage histograms and counters.
+    """
+
+    def __init__(self, prefix: str = "rag", buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        hist = self.histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(stage, Histogram(self.buckets))
+        return hist
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.histogram(stage).observe(seconds)
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def _items(self) -> tuple:
+        # Request threads add stage histograms while the reporter thread iterates.
+        with self._lock:
+            return sorted(self.histograms.items()), dict(self.counters)
+
+    def snapshot(self) -> dict:
+        histograms, counters = self._items()
+        stages = {}
+        for stage, hist in histograms:
+            _, total, count = hist.state()
+            stages[stage] = {
+                "count": count,
+                "mean_ms": round(1000 * total / count, 3) if count else None,
+                "p50_ms": _ms(hist.quantile(0.50)),
+                "p95_ms": _ms(hist.quantile(0.95)),
+                "p99_ms": _ms(hist.quantile(0.99)),
+            }
+        return {"stages": stages, "counters": counters}
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (histograms + counters).
+        """
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} RAG model stage latency.",
+            f"# TYPE {name} histogram",
+        ]
+        histograms, counters = self._items()
+        for stage, hist in histograms:
+            counts, total, count = hist.state()
+            cumulative = 0
+            for bound, bucket_count in zip(hist.bounds, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        for counter, value in sorted(counters.items()):
+            lines.append(f"# TYPE {self.prefix}_{counter} counter")
+            lines.append(f"{self.prefix}_{counter} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+class RequestTimer:
+    """
+    Times the stages of one request. ``trace`` opens MLflow spans; ``log`` emits a JSON line on exit.
+    """
+
+    def __init__(self, registry: MetricsRegistry, trace: bool = False, log: bool = False):
+        self.registry = registry
+        self.trace = trace
+        self.log = log
+        self.stages = {}
+        self.usage = {}
+        self._stack = None
+        self._start = None
+
+    @classmethod
+    def sampled(cls, registry: MetricsRegistry, trace_rate: float = 0.0, log_rate: float = 0.0):
+        return cls(
+            registry,
+            trace=trace_rate > 0 and random.random() < trace_rate,
+            log=log_rate > 0 and random.random() < log_rate,
+        )
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        if self.trace:
+            import mlflow
+
+            self._stack.enter_context(mlflow.start_span(name="rag_predict"))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        self.stages["total"] = elapsed
+        self.registry.observe("total", elapsed)
+        self.registry.inc("errors_total" if exc_type else "requests_total")
+        self._stack.__exit__(exc_type, exc, tb)
+        if self.log:
+            logger.info(json.dumps({
+                "event": "rag_request",
+                "ok": exc_type is None,
+                "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+                **self.usage,
+            }))
+        return False
+
+    @contextmanager
+    def stage(self, name: str):
+        with ExitStack() as stack:
+            if self.trace:
+                import mlflow
+
+                stack.enter_context(mlflow.start_span(name=name))
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.mark(name, time.perf_counter() - start)
+
+    def mark(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.registry.observe(name, seconds)
+
+    def add_usage(self, usage) -> None:
+        """
+        Record token counts from a chat completion ``usage`` payload.
+        """
+        if usage is None:
+            return
+        for key in ("prompt_tokens", "completion_tokens"):
+            value = getattr(usage, key, None)
+            if value is None and isinstance(usage, dict):
+                value = usage.get(key)
+            if value:
+                self.usage[key] = self.usage.get(key, 0) + int(value)
+                self.registry.inc(f"{key}_total", int(value))
+        # Prompt tokens served from the provider's prompt cache.
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is None and isinstance(usage, dict):
+            details = usage.get("prompt_tokens_details")
+        cached = getattr(details, "cached_tokens", None)
+        if cached is None and isinstance(details, dict):
+            cached = details.get("cached_tokens")
+        if cached:
+            self.usage["cached_tokens"] = self.usage.get("cached_tokens", 0) + int(cached)
+            self.registry.inc("cached_tokens_total", int(cached))
+
+
+class MetricsReporter:
+    """
+    Background thread that logs a JSON snapshot and rewrites a Prometheus text file periodically.
+    """
+
+    def __init__(self, registry: MetricsRegistry, interval_s: float = 60.0, prom_file: Optional[str] = None):
+        self.registry = registry
+        self.interval_s = float(interval_s)
+        self.prom_file = prom_file
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "MetricsReporter":
+        if self.interval_s > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rag-metrics", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def flush(self) -> None:
+        logger.info(json.dumps({"event": "rag_metrics", **self.registry.snapshot()}))
+        if self.prom_file:
+            tmp_path = f"{self.prom_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.registry.render_prometheus())
+            os.replace(tmp_path, self.prom_file)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Metrics flush failed.")
@@ -0,0 +1,12 @@
+"""
+Models-from-code entry point for the served RAG model (``rag_model.serving.RAGModel``).
+
+    mlflow.pyfunc.log_model(python_model="rag_model/model_entry.py", code_paths=["rag_model"],
+                            model_config={...}, ...)
+"""
+
+from mlflow.models import set_model
+
+from rag_model.serving import RAGModel
+
+set_model(RAGModel())
@@ -0,0 +1,162 @@
+"""
+Compact vector codes for the local index: int8 scalar quantization and product quantization.
+
+Codes are small enough to keep in RAM (int8: 1 byte per dimension; PQ: ``m`` bytes per vector)
+while the float32 matrix stays memory-mapped on disk. Search scores every candidate on the codes,
+then rescores the best ``k * rescore_factor`` against the full-precision vectors, so only those
+rows are paged in.
+
+- sq8 : per-dimension symmetric scale (max |x| / 127); score = codes @ (q * scale).
+- pq  : ``m`` subspaces x 256 centroids (k-means on a sample); asymmetric distance via a
+        per-query lookup table (score = sum of table[j, code_j]). Codes are stored subspace-major
+        (m x count) so each table lookup is a contiguous gather.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+QUANTIZATION_TYPES = ("sq8", "pq")
+# Default shortlist size per result; PQ codes are coarser, so more candidates get rescored.
+RESCORE_FACTORS = {"sq8": 4.0, "pq": 16.0}
+SQ8_CODES_FILE = "sq8_codes.npy"
+SQ8_SCALE_FILE = "sq8_scale.npy"
+PQ_CODES_FILE = "pq_codes.npy"
+PQ_CODEBOOKS_FILE = "pq_codebooks.npy"
+PQ_KSUB = 256
+PQ_TRAIN_ROWS = 64 * PQ_KSUB
+ENCODE_CHUNK_ROWS = 65536
+# Small enough for the upcast block to stay in cache.
+SCORE_CHUNK_ROWS = 1024
+
+
+class ScalarQuantizer:
+    def __init__(self, scale: np.ndarray):
+        self.scale = np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def train(cls, vectors: np.ndarray) -> "ScalarQuantizer":
+        peak = np.zeros(vectors.shape[1], dtype=np.float32)
+        for start in range(0, vectors.shape[0], ENCODE_CHUNK_ROWS):
+            block = np.abs(np.asarray(vectors[start:start + ENCODE_CHUNK_ROWS], dtype=np.float32))
+            peak = np.maximum(peak, block.max(axis=0))
+        peak[peak == 0] = 1.0
+        return cls(peak / 127.0)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty(vectors.shape, dtype=np.int8)
+        for start in range(0, vectors.shape[0], ENCODE_CHUNK_ROWS):
+            block = np.asarray(vectors[start:start + ENCODE_CHUNK_ROWS], dtype=np.float32)
+            codes[start:start + block.shape[0]] = np.clip(np.rint(block / self.scale), -127, 127)
+        return codes
+
+    def select(self, codes: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        return codes[ids]
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        weights = query.astype(np.float32) * self.scale
+        out = np.empty(codes.shape[0], dtype=np.float32)
+        # Chunked so the int8 -> float32 upcast never materializes the whole matrix.
+        for start in range(0, codes.shape[0], SCORE_CHUNK_ROWS):
+            block = codes[start:start + SCORE_CHUNK_ROWS]
+            out[start:start + block.shape[0]] = block.astype(np.float32) @ weights
+        return out
+
+
+class ProductQuantizer:
+    def __init__(self, codebooks: np.ndarray):
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)
+        self.m, self.ksub, self.dsub = self.codebooks.shape
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, m: int, iters: int = 15, seed: int = 0, sample_rows: int = PQ_TRAIN_ROWS) -> "ProductQuantizer":
+        count, dim = vectors.shape
+        if dim % m:
+            raise ValueError(f"PQ needs dim ({dim}) divisible by m ({m}).")
+        dsub = dim // m
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, size=min(count, sample_rows), replace=False))], dtype=np.float32)
+        # Small corpora train fewer centroids; codebooks hold only trained ones, so encode never picks an empty slot.
+        ksub = min(PQ_KSUB, sample.shape[0])
+        codebooks = np.zeros((m, ksub, dsub), dtype=np.float32)
+        for j in range(m):
+            sub = sample[:, j * dsub:(j + 1) * dsub]
+            codebooks[j] = _kmeans(sub, ksub, iters, rng)
+        return cls(codebooks)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.empty((self.m, vectors.shape[0]), dtype=np.uint8)
+        norms = (self.codebooks ** 2).sum(axis=2)
+        for start in range(0, vectors.shape[0], ENCODE_CHUNK_ROWS):
+            block = np.asarray(vectors[start:start + ENCODE_CHUNK_ROWS], dtype=np.float32)
+            for j in range(self.m):
+                sub = block[:, j * self.dsub:(j + 1) * self.dsub]
+                # argmin ||x - c||^2 == argmax (2 x.c - ||c||^2)
+                codes[j, start:start + block.shape[0]] = np.argmax(2.0 * sub @ self.codebooks[j].T - norms[j], axis=1)
+        return codes
+
+    def select(self, codes: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        return codes[:, ids]
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        table = np.einsum("jkd,jd->jk", self.codebooks, query.astype(np.float32).reshape(self.m, self.dsub))
+        out = np.zeros(codes.shape[1], dtype=np.float32)
+        for j in range(self.m):
+            out += np.take(table[j], codes[j])
+        return out
+
+
+def _kmeans(data: np.ndarray, k: int, iters: int, rng) -> np.ndarray:
+    centroids = data[rng.choice(data.shape[0], size=k, replace=False)].copy()
+    for _ in range(iters):
+        distances = (data ** 2).sum(axis=1, keepdims=True) - 2.0 * data @ centroids.T + (centroids ** 2).sum(axis=1)
+        assignments = np.argmin(distances, axis=1)
+        sums = np.stack([np.bincount(assignments, weights=data[:, d], minlength=k) for d in range(data.shape[1])], axis=1)
+        counts = np.bincount(assignments, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def train_quantizer(vectors: np.ndarray, quantization: str, pq_m: Optional[int] = None):
+    if quantization == "sq8":
+        return ScalarQuantizer.train(vectors)
+    if quantization == "pq":
+        return ProductQuantizer.train(vectors, pq_m or default_pq_m(vectors.shape[1]))
+    raise ValueError(f"quantization must be one of {QUANTIZATION_TYPES}, got {quantization!r}")
+
+
+def default_pq_m(dim: int) -> int:
+    """
+    Largest divisor of ``dim`` up to dim / 8 (8-dimensional subspaces, e.g. 128 codes for 1024-dim).
+    """
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def save_codes(out, quantizer, codes: np.ndarray) -> dict:
+    """
+    Write codes + quantizer parameters into a snapshot directory; returns the meta.json entry.
+    """
+    if isinstance(quantizer, ScalarQuantizer):
+        np.save(out / SQ8_SCALE_FILE, quantizer.scale)
+        np.save(out / SQ8_CODES_FILE, codes)
+        return {"type": "sq8"}
+    np.save(out / PQ_CODEBOOKS_FILE, quantizer.codebooks)
+    np.save(out / PQ_CODES_FILE, codes)
+    return {"type": "pq", "m": int(quantizer.m), "ksub": int(quantizer.ksub)}
+
+
+def load_codes(path, meta: dict):
+    """
+    (quantizer, codes) for a snapshot's ``quantization`` meta entry. Codes are read into RAM.
+    """
+    kind = meta["type"]
+    if kind == "sq8":
+        return ScalarQuantizer(np.load(path / SQ8_SCALE_FILE)), np.load(path / SQ8_CODES_FILE)
+    if kind == "pq":
+        return ProductQuantizer(np.load(path / PQ_CODEBOOKS_FILE)), np.load(path / PQ_CODES_FILE)
+    raise RuntimeError(f"Unsupported quantization: {kind}")
+
@@ -0,0 +1,173 @@
+"""
+Token-bucket rate limiting for Azure OpenAI calls (requests and tokens per minute).
+
+Azure OpenAI evaluates per-minute quotas over short windows, so buckets only hold
+``burst_s`` seconds worth of quota instead of a full minute. The limiter also follows the
+service: ``x-ratelimit-remaining-*`` headers cap the local buckets (other clients share the
+deployment), and a 429 empties them for the ``Retry-After`` period.
+"""
+
+import threading
+import time
+from typing import Optional, Sequence
+
+# Azure OpenAI GlobalStandard / Standard: one capacity unit = 1k tokens/min and 6 requests/min.
+TOKENS_PER_CAPACITY_UNIT = 1000
+REQUESTS_PER_CAPACITY_UNIT = 6
+CHARS_PER_TOKEN = 4
+
+
+def quota_from_capacity(
+    capacity: float,
+    tokens_per_unit: float = TOKENS_PER_CAPACITY_UNIT,
+    requests_per_unit: float = REQUESTS_PER_CAPACITY_UNIT,
+):
+    """
+    (requests_per_minute, tokens_per_minute) for a deployment's capacity units.
+    """
+    return float(capacity) * requests_per_unit, float(capacity) * tokens_per_unit
+
+
+def estimate_tokens(messages: Sequence[dict], completion_tokens: int = 256) -> int:
+    """
+    Rough token estimate for a chat call (prompt characters / 4 plus the expected completion).
+    """
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return chars // CHARS_PER_TOKEN + int(completion_tokens)
+
+
+def retry_after_s(headers) -> Optional[float]:
+    if not headers:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+class RateLimitTimeout(RuntimeError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst_s: float = 10.0):
+        self.rate_per_s = float(per_minute) / 60.0
+        self.capacity = max(1.0, self.rate_per_s * float(burst_s))
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate_per_s)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """
+        Seconds until ``amount`` is available (0 when it already is). Call after ``refill``.
+        """
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate_per_s
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter over requests/minute and tokens/minute. ``acquire`` blocks until both
+    buckets allow the call, or raises ``RateLimitTimeout`` if that would take over ``max_wait_s``.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_wait_s: float = 60.0,
+        burst_s: float = 10.0,
+    ):
+        self.requests = TokenBucket(requests_per_minute, burst_s) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst_s) if tokens_per_minute else None
+        self.max_wait_s = float(max_wait_s)
+        self._lock = threading.Lock()
+
+    def _buckets(self, tokens: float):
+        if self.requests is not None:
+            yield self.requests, 1.0
+        if self.tokens is not None and tokens:
+            yield self.tokens, float(tokens)
+
+    def acquire(self, tokens: float = 0, max_wait_s: Optional[float] = None) -> float:
+        """
+        Reserve one request and ``tokens`` estimated tokens. Returns the seconds spent waiting.
+        """
+        max_wait_s = self.max_wait_s if max_wait_s is None else float(max_wait_s)
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                for bucket, amount in self._buckets(tokens):
+                    bucket.refill(now)
+                    wait = max(wait, bucket.wait_for(amount))
+                if wait == 0.0:
+                    for bucket, amount in self._buckets(tokens):
+                        bucket.level -= min(amount, bucket.capacity)
+                    return now - start
+            if now - start + wait > max_wait_s:
+                raise RateLimitTimeout(f"Rate limit wait of {wait:.1f}s exceeds max_wait_s={max_wait_s:g}.")
+            time.sleep(min(wait, 1.0))
+
+    def headroom(self) -> float:
+        """
+        Fraction of burst capacity currently available (the tighter of the two buckets).
+        """
+        with self._lock:
+            now = time.monotonic()
+            levels = [1.0]
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.refill(now)
+                    levels.append(max(0.0, bucket.level) / bucket.capacity)
+            return min(levels)
+
+    def observe_headers(self, headers) -> None:
+        """
+        Cap the buckets at the service's ``x-ratelimit-remaining-requests`` / ``-tokens``.
+        """
+        if not headers:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for bucket, name in ((self.requests, "x-ratelimit-remaining-requests"), (self.tokens, "x-ratelimit-remaining-tokens")):
+                value = headers.get(name)
+                if bucket is None or value is None:
+                    continue
+                try:
+                    remaining = float(value)
+                except ValueError:
+                    continue
+                bucket.refill(now)
+                bucket.level = min(bucket.level, remaining)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Hold all callers for ``seconds`` (after a 429): buckets go negative by that much quota.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, -bucket.rate_per_s * float(seconds))
+
+    def settle(self, estimated: float, actual: float) -> None:
+        """
+        Refund (or charge) the difference between the estimated and the reported token usage.
+        """
+        if self.tokens is None or actual is None:
+            return
+        with self._lock:
+            charged = min(float(estimated), self.tokens.capacity)
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + charged - float(actual))
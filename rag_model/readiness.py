@@ -0,0 +1,194 @@
+"""
+Readiness waits for Vector Search endpoints/indexes and serving endpoints.
+
+Polls start fast and back off exponentially with jitter (0.5 s, 0.75 s, ... capped at
+``max_delay_s``), so a resource that is already up costs one status read and one that takes
+minutes is noticed within a few seconds without being hammered. Probes read the cheapest status
+source: ``get_endpoint(name)`` instead of listing every endpoint (the list is only used when the
+client has no working ``get_endpoint``), and ``index.describe()`` for indexes.
+
+``wait_all`` runs several waits concurrently and returns how long each one took:
+
+    results = wait_all({
+        "endpoint": vector_search_endpoint_probe(vector_client, endpoint_name),
+        "index": vector_search_index_probe(index),
+    })
+    print(format_waits(results))
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+ENDPOINT_READY_STATES = ("ONLINE", "READY")
+FAILED_MARKERS = ("FAILED", "ERROR")
+
+
+class ResourceFailed(RuntimeError):
+    """
+    Raised by a probe when the resource reached a terminal failure state; other probe errors are
+    treated as transient and retried.
+    """
+
+
+class Backoff:
+    def __init__(self, initial_s: float = 0.5, max_delay_s: float = 10.0, factor: float = 1.5, jitter: float = 0.2, rng=None):
+        self.initial_s = float(initial_s)
+        self.max_delay_s = float(max_delay_s)
+        self.factor = float(factor)
+        self.jitter = float(jitter)
+        self._rng = rng or random.Random()
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial_s
+        while True:
+            # Jitter spreads concurrent waiters (and notebook re-runs) apart.
+            yield delay * (1.0 - self.jitter * self._rng.random())
+            delay = min(self.max_delay_s, delay * self.factor)
+
+
+class WaitResult:
+    def __init__(self, name: str, state, info, elapsed_s: float, polls: int):
+        self.name = name
+        self.state = state
+        self.info = info
+        self.elapsed_s = elapsed_s
+        self.polls = polls
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "state": self.state, "elapsed_s": round(self.elapsed_s, 2), "polls": self.polls}
+
+
+def _log_state(name: str, state, elapsed_s: float) -> None:
+    print(f"[{time.strftime('%H:%M:%S')}] {name}: {state} (+{elapsed_s:.1f}s)")
+
+
+def wait_until(
+    name: str,
+    probe: Callable,
+    timeout_s: float = 1800,
+    backoff: Optional[Backoff] = None,
+    log: Optional[Callable] = _log_state,
+) -> WaitResult:
+    """
+    Poll ``probe() -> (ready, state, info)`` until ready. Logs state changes only.
+    Raises ``ResourceFailed`` from the probe, or TimeoutError after ``timeout_s``.
+    """
+    backoff = backoff or Backoff()
+    start = time.monotonic()
+    deadline = start + timeout_s
+    last_state, last_info, polls = object(), None, 0
+    for delay in backoff.delays():
+        polls += 1
+        try:
+            ready, state, info = probe()
+        except ResourceFailed:
+            raise
+        except Exception as exc:
+            ready, state, info = False, f"poll error: {type(exc).__name__}: {exc}", last_info
+        elapsed = time.monotonic() - start
+        if state != last_state and log is not None:
+            log(name, state, elapsed)
+        last_state, last_info = state, info
+        if ready:
+            return WaitResult(name, state, info, elapsed, polls)
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"{name} not ready after {timeout_s:.0f}s ({polls} polls). Last state: {state}")
+        time.sleep(delay)
+
+
+def wait_all(probes: dict, timeout_s: float = 1800, backoff: Optional[Backoff] = None, log: Optional[Callable] = _log_state) -> dict:
+    """
+    Run ``wait_until`` for each {name: probe} concurrently. Returns {name: WaitResult} once all
+    are ready; the first failure is raised after the other waits finish.
+    """
+    if not probes:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="readiness") as pool:
+        futures = {
+            name: pool.submit(wait_until, name, probe, timeout_s, backoff or Backoff(), log)
+            for name, probe in probes.items()
+        }
+        errors = [future.exception() for future in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: future.result() for name, future in futures.items()}
+
+
+def format_waits(results: dict) -> str:
+    return "\n".join(
+        f"  {result.name:<20} {result.state!s:<24} {result.elapsed_s:>7.1f}s  {result.polls:>3} polls"
+        for result in results.values()
+    )
+
+
+def vector_search_endpoint_probe(client, name: str) -> Callable:
+    """
+    Vector Search endpoint status via ``get_endpoint``; falls back to ``list_endpoints`` only if
+    ``get_endpoint`` is missing or unsupported on this client version.
+    """
+    use_list = not hasattr(client, "get_endpoint")
+
+    def fetch():
+        nonlocal use_list
+        if not use_list:
+            try:
+                info = client.get_endpoint(name)
+                # Some versions wrap: {"endpoint": {...}}
+                if isinstance(info, dict) and isinstance(info.get("endpoint"), dict):
+                    info = info["endpoint"]
+                return info
+            except (AttributeError, NotImplementedError, TypeError):
+                use_list = True
+        resp = client.list_endpoints()
+        endpoints = (resp.get("endpoints") or resp.get("vector_search_endpoints") or []) if isinstance(resp, dict) else (resp or [])
+        return next((ep for ep in endpoints if isinstance(ep, dict) and ep.get("name") == name), None)
+
+    def probe():
+        info = fetch()
+        state = (info.get("endpoint_status") or {}).get("state") if isinstance(info, dict) else None
+        if isinstance(state, str) and any(marker in state for marker in FAILED_MARKERS):
+            raise ResourceFailed(f"Endpoint {name} failed: {info}")
+        return state in ENDPOINT_READY_STATES, state, info
+
+    return probe
+
+
+def vector_search_index_probe(index) -> Callable:
+    def probe():
+        info = index.describe()
+        status = info.get("status") or {}
+        state = status.get("detailed_state")
+        if isinstance(state, str) and any(marker in state for marker in FAILED_MARKERS):
+            raise ResourceFailed(f"Index failed: {info}")
+        return status.get("ready") is True, state, info
+
+    return probe
+
+
+def vector_search_index_exists_probe(client, endpoint_name: str, index_name: str) -> Callable:
+    """
+    Ready once ``get_index`` succeeds (an index that is still being created); info is the index.
+    """
+    def probe():
+        return True, "EXISTS", client.get_index(endpoint_name, index_name)
+
+    return probe
+
+
+def serving_endpoint_probe(fetch: Callable, name: str) -> Callable:
+    """
+    Model serving endpoint: ``fetch()`` returns the GET /api/2.0/serving-endpoints/{name} payload.
+    Ready when ``state.ready == "READY"`` and no config update is in progress.
+    """
+    def probe():
+        info = fetch() or {}
+        state = info.get("state") or {}
+        ready, update = state.get("ready"), state.get("config_update")
+        if update == "UPDATE_FAILED":
+            raise ResourceFailed(f"Serving endpoint {name} config update failed: {state}")
+        return ready == "READY" and update in (None, "NOT_UPDATING"), f"{ready}/{update}", info
+
+    return probe
@@ -0,0 +1,143 @@
+"""
+Rerankers applied between retrieval and generation.
+
+The model over-fetches candidates (e.g. 20), reranks them and keeps the best few.
+``BudgetedReranker.rerank`` enforces a hard latency budget: if scoring does not finish in
+time the candidates are returned in their original (retrieval) order.
+
+Counters: ``rerank_skipped_total`` (every worker busy), ``rerank_over_budget_total``.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional, Sequence
+
+from rag_model.lexical import analyze
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class LexicalOverlapReranker:
+    """
+    LLM-free scorer: query term coverage of the title field (weighted) plus the body field.
+    """
+
+    # Microseconds per candidate: scored on the request thread, outside the budget pool.
+    inline = True
+
+    def __init__(self, title_field: str = "Topic", body_field: str = "Description", title_weight: float = 2.0):
+        self.title_field = title_field
+        self.body_field = body_field
+        self.title_weight = float(title_weight)
+
+    def score(self, query: str, rows: Sequence[dict]) -> list:
+        terms = set(analyze(query))
+        if not terms:
+            return [0.0] * len(rows)
+        scores = []
+        for row in rows:
+            title = set(analyze(row.get(self.title_field) or ""))
+            body = set(analyze(row.get(self.body_field) or ""))
+            coverage = (self.title_weight * len(terms & title) + len(terms & body)) / len(terms)
+            scores.append(coverage)
+        return scores
+
+
+class CrossEncoderReranker:
+    """
+    Small local cross-encoder (sentence-transformers) scoring (query, passage) pairs on CPU.
+    """
+
+    inline = False
+
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER, title_field: str = "Topic", body_field: str = "Description"):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as exc:
+            raise ImportError("The cross-encoder reranker requires sentence-transformers.") from exc
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.title_field = title_field
+        self.body_field = body_field
+
+    def score(self, query: str, rows: Sequence[dict]) -> list:
+        pairs = [(query, f"{row.get(self.title_field) or ''}\n{row.get(self.body_field) or ''}") for row in rows]
+        return [float(s) for s in self.model.predict(pairs)]
+
+
+def get_reranker(name: Optional[str]):
+    """
+    Resolve a reranker from config: "none", "lexical", "cross-encoder" or "cross-encoder:<model>".
+    """
+    name = (name or "none").strip()
+    if name in ("", "none"):
+        return None
+    if name == "lexical":
+        return LexicalOverlapReranker()
+    if name == "cross-encoder" or name.startswith("cross-encoder:"):
+        _, _, model_name = name.partition(":")
+        return CrossEncoderReranker(model_name or DEFAULT_CROSS_ENCODER)
+    raise ValueError(f"Unknown reranker: {name!r}")
+
+
+class BudgetedReranker:
+    """
+    Runs a reranker under a hard latency budget on a dedicated pool of ``max_workers`` (size it to
+    the requests served concurrently). A job that overruns keeps its worker until it finishes, so a
+    request that finds every worker busy keeps retrieval order at once instead of queueing (its
+    budget would expire in the queue). Rerankers marked ``inline`` are scored on the calling thread.
+    """
+
+    def __init__(self, reranker, budget_ms: float = 50.0, max_workers: int = 4, registry=None):
+        self.reranker = reranker
+        self.budget_s = float(budget_ms) / 1000.0
+        self.registry = registry
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rerank")
+        self._free = threading.BoundedSemaphore(max_workers)
+
+    def _inc(self, name: str) -> None:
+        if self.registry is not None:
+            self.registry.inc(name)
+
+    def _score(self, query: str, rows: list):
+        """
+        Scores, or None when every worker is busy or the budget ran out.
+        """
+        if getattr(self.reranker, "inline", False):
+            return self.reranker.score(query, rows)
+        if not self._free.acquire(blocking=False):
+            self._inc("rerank_skipped_total")
+            return None
+        future = self._pool.submit(self.reranker.score, query, rows)
+        future.add_done_callback(lambda _: self._free.release())
+        try:
+            return future.result(timeout=self.budget_s)
+        except FutureTimeoutError:
+            self._inc("rerank_over_budget_total")
+            logger.debug("Rerank exceeded %.0f ms budget; keeping retrieval order.", self.budget_s * 1000)
+            return None
+
+    def rerank(self, query: str, rows: Sequence[dict], top_n: int):
+        """
+        Return (rows, reranked). Falls back to the incoming order when the budget is exceeded
+        or the reranker fails.
+        """
+        rows = list(rows)
+        if len(rows) <= 1:
+            return rows[:top_n], False
+        start = time.perf_counter()
+        try:
+            scores = self._score(query, rows)
+        except Exception:
+            logger.exception("Rerank failed; keeping retrieval order.")
+            return rows[:top_n], False
+        if scores is None:
+            return rows[:top_n], False
+        # Stable sort keeps retrieval order between equal scores.
+        order = sorted(range(len(rows)), key=lambda i: scores[i], reverse=True)
+        logger.debug("Reranked %d candidates in %.1f ms", len(rows), (time.perf_counter() - start) * 1000)
+        return [rows[i] for i in order[:top_n]], True
@@ -0,0 +1,50 @@
+"""
+Helpers for the Vector Search ``similarity_search`` response shape.
+
+Every retrieval backend in this package returns the same payload as
+``databricks.vector_search`` so they can be swapped behind the model:
+{"manifest": {"columns": [{"name": ...}, ..., {"name": "score"}]},
+ "result": {"row_count": n, "data_array": [[...values, score], ...]}}
+"""
+
+from typing import Any, Iterable, Sequence
+
+
+def build_result(columns: Sequence[str], rows: Iterable[Sequence[Any]], scores: Iterable[float]) -> dict:
+    """
+    Build a similarity_search-shaped payload from rows (in column order) and scores.
+    """
+    data_array = [list(row) + [float(score)] for row, score in zip(rows, scores)]
+    names = list(columns) + ["score"]
+    return {
+        "manifest": {
+            "column_count": len(names),
+            "columns": [{"name": name} for name in names],
+        },
+        "result": {
+            "row_count": len(data_array),
+            "data_array": data_array,
+        },
+    }
+
+
+def result_columns(res: dict) -> list:
+    """
+    Column names from a similarity_search payload (falls back to positional names).
+    """
+    columns = ((res or {}).get("manifest") or {}).get("columns") or []
+    return [col.get("name") if isinstance(col, dict) else str(col) for col in columns]
+
+
+def result_rows(res: dict) -> list:
+    """
+    Normalise a similarity_search payload into a list of dicts (one per hit).
+    """
+    data_array = ((res or {}).get("result") or {}).get("data_array") or []
+    names = result_columns(res)
+    rows = []
+    for values in data_array:
+        if len(names) < len(values):
+            names = names + [f"col_{i}" for i in range(len(names), len(values))]
+        rows.append(dict(zip(names, values)))
+    return rows
@@ -0,0 +1,282 @@
+"""
+Blue/green rollout of a new model version on a Databricks serving endpoint.
+
+Bumping ``entity_version`` in place swaps the only served entity for a cold replica. Instead:
+
+1. the new version ("green") is added next to the current one ("blue") at 0% traffic;
+2. the endpoint is waited on until READY (``rag_model.readiness``);
+3. green is warmed with synthetic queries sent straight to it
+   (``/serving-endpoints/<endpoint>/served-models/<name>/invocations``);
+4. traffic moves to green in steps (e.g. 10, 25, 50, 100%). At each step both entities are
+   probed with the same queries, interleaved, and green's p95 is compared with blue's;
+5. if green fails a request or its p95 regresses by more than ``max_p95_regression`` (and by at
+   least ``min_p95_delta_ms``), traffic goes back to blue and green is removed. Otherwise blue
+   is removed once green serves 100%.
+
+``api(method, path, payload=None, timeout=None) -> dict`` is any authenticated Databricks REST
+caller (``scripts/deploy.py`` passes its own). Synthetic queries pass ``timeout=invoke_timeout_s``,
+so a hung replica counts as a failed query instead of stalling the rollout:
+
+    rollout = BlueGreenRollout(api, "rag-model-endpoint-otter", queries, steps=(10, 50, 100))
+    result = rollout.run("rag-model-7", "main.rag.rag_model", "7")
+    print(format_rollout(result))
+"""
+
+import time
+from typing import Callable, Optional, Sequence
+
+from rag_model.bench.loadgen import percentile
+from rag_model.readiness import serving_endpoint_probe, wait_until
+
+# Served entity fields that can be sent back in a config update.
+WRITABLE_ENTITY_FIELDS = (
+    "name",
+    "entity_name",
+    "entity_version",
+    "workload_size",
+    "workload_type",
+    "scale_to_zero_enabled",
+    "min_provisioned_concurrency",
+    "max_provisioned_concurrency",
+    "environment_vars",
+    "instance_profile_arn",
+)
+DEFAULT_STEPS = (10, 25, 50, 100)
+
+
+class RolloutError(RuntimeError):
+    """
+    Raised when the endpoint cannot be rolled out (missing endpoint, unexpected config).
+    """
+
+
+def _p95(latencies: Sequence[float]) -> Optional[float]:
+    return percentile(sorted(latencies), 95)
+
+
+class StepResult:
+    def __init__(self, traffic: int, blue_p95_ms: Optional[float], green_p95_ms: Optional[float], green_errors: int, regressed: bool):
+        self.traffic = traffic
+        self.blue_p95_ms = blue_p95_ms
+        self.green_p95_ms = green_p95_ms
+        self.green_errors = green_errors
+        self.regressed = regressed
+
+    def to_dict(self) -> dict:
+        return {
+            "traffic": self.traffic,
+            "blue_p95_ms": self.blue_p95_ms,
+            "green_p95_ms": self.green_p95_ms,
+            "green_errors": self.green_errors,
+            "regressed": self.regressed,
+        }
+
+
+class RolloutResult:
+    def __init__(self, blue: str, green: str, status: str, steps: list, warmup_ms: list, reason: str = ""):
+        self.blue = blue
+        self.green = green
+        # "promoted", "rolled_back" or "unchanged".
+        self.status = status
+        self.steps = steps
+        self.warmup_ms = warmup_ms
+        self.reason = reason
+
+    @property
+    def promoted(self) -> bool:
+        return self.status == "promoted"
+
+
+class BlueGreenRollout:
+    def __init__(
+        self,
+        api: Callable,
+        endpoint_name: str,
+        queries: Sequence[str],
+        steps: Sequence[int] = DEFAULT_STEPS,
+        warmup_queries: int = 20,
+        probe_queries: int = 20,
+        max_p95_regression: float = 0.25,
+        min_p95_delta_ms: float = 200.0,
+        ready_timeout_s: float = 1800.0,
+        invoke_timeout_s: float = 60.0,
+        log: Callable = print,
+    ):
+        if not queries:
+            raise ValueError("Rollout needs at least one synthetic query.")
+        steps = [int(step) for step in steps]
+        if not steps or steps[-1] != 100 or any(not 0 < s <= 100 for s in steps) or steps != sorted(steps):
+            raise ValueError(f"Traffic steps must increase and end at 100, got {steps}.")
+        self.api = api
+        self.endpoint_name = endpoint_name
+        self.queries = list(queries)
+        self.steps = steps
+        self.warmup_queries = warmup_queries
+        self.probe_queries = probe_queries
+        self.max_p95_regression = max_p95_regression
+        self.min_p95_delta_ms = min_p95_delta_ms
+        self.ready_timeout_s = ready_timeout_s
+        self.invoke_timeout_s = invoke_timeout_s
+        self.log = log
+        self._query_index = 0
+
+    # Endpoint config -------------------------------------------------------------------------
+
+    def get_endpoint(self) -> dict:
+        return self.api("GET", f"/api/2.0/serving-endpoints/{self.endpoint_name}")
+
+    def served_entities(self) -> list:
+        endpoint = self.get_endpoint()
+        config = endpoint.get("config") or endpoint.get("pending_config") or {}
+        entities = config.get("served_entities") or config.get("served_models") or []
+        if not entities:
+            raise RolloutError(f"Endpoint {self.endpoint_name} has no served entities.")
+        return [{key: entity[key] for key in WRITABLE_ENTITY_FIELDS if entity.get(key) is not None} for entity in entities]
+
+    def put_config(self, entities: list, traffic: dict) -> None:
+        self.log(f"Traffic: {', '.join(f'{name}={pct}%' for name, pct in traffic.items())}")
+        self.api(
+            "PUT",
+            f"/api/2.0/serving-endpoints/{self.endpoint_name}/config",
+            {
+                "served_entities": entities,
+                "traffic_config": {
+                    "routes": [{"served_model_name": name, "traffic_percentage": pct} for name, pct in traffic.items()]
+                },
+            },
+        )
+        self.wait_ready()
+
+    def wait_ready(self):
+        return wait_until(
+            f"endpoint {self.endpoint_name}",
+            serving_endpoint_probe(self.get_endpoint, self.endpoint_name),
+            timeout_s=self.ready_timeout_s,
+        )
+
+    # Synthetic traffic -----------------------------------------------------------------------
+
+    def _next_query(self) -> str:
+        query = self.queries[self._query_index % len(self.queries)]
+        self._query_index += 1
+        return query
+
+    def invoke(self, served_name: str, query: str) -> tuple:
+        """
+        One query sent to ``served_name`` only. Returns (latency_s, error or None).
+        """
+        payload = {"dataframe_split": {"columns": ["query"], "data": [[query]]}}
+        start = time.perf_counter()
+        try:
+            self.api(
+                "POST",
+                f"/serving-endpoints/{self.endpoint_name}/served-models/{served_name}/invocations",
+                payload,
+                timeout=self.invoke_timeout_s,
+            )
+        except Exception as exc:
+            return time.perf_counter() - start, str(exc)
+        return time.perf_counter() - start, None
+
+    def warm(self, served_name: str) -> list:
+        latencies = []
+        for _ in range(self.warmup_queries):
+            latency, error = self.invoke(served_name, self._next_query())
+            if error:
+                raise RolloutError(f"Warm-up query to {served_name} failed: {error}")
+            latencies.append(latency * 1000)
+        return latencies
+
+    def probe(self, blue: str, green: str, traffic: int) -> StepResult:
+        blue_s, green_s, green_errors = [], [], 0
+        for _ in range(self.probe_queries):
+            query = self._next_query()
+            # Same query to both sides, interleaved, so drift in upstream latency hits both.
+            latency, error = self.invoke(blue, query)
+            if error is None:
+                blue_s.append(latency)
+            latency, error = self.invoke(green, query)
+            if error is None:
+                green_s.append(latency)
+            else:
+                green_errors += 1
+        blue_p95 = _p95(blue_s)
+        green_p95 = _p95(green_s)
+        regressed = green_errors > 0 or self.is_regression(blue_p95, green_p95)
+        return StepResult(
+            traffic,
+            None if blue_p95 is None else blue_p95 * 1000,
+            None if green_p95 is None else green_p95 * 1000,
+            green_errors,
+            regressed,
+        )
+
+    def is_regression(self, blue_p95: Optional[float], green_p95: Optional[float]) -> bool:
+        if green_p95 is None:
+            return True
+        if blue_p95 is None:
+            return False
+        delta_ms = (green_p95 - blue_p95) * 1000
+        return green_p95 > blue_p95 * (1.0 + self.max_p95_regression) and delta_ms >= self.min_p95_delta_ms
+
+    # Rollout ---------------------------------------------------------------------------------
+
+    def run(self, green_name: str, entity_name: str, entity_version: str) -> RolloutResult:
+        entities = self.served_entities()
+        if len(entities) != 1:
+            raise RolloutError(
+                f"Expected one served entity on {self.endpoint_name}, found {[e['name'] for e in entities]}. "
+                "Finish or undo the previous rollout first."
+            )
+        blue = entities[0]
+        if str(blue.get("entity_version")) == str(entity_version) and blue.get("entity_name") == entity_name:
+            return RolloutResult(blue["name"], blue["name"], "unchanged", [], [], "already serving this version")
+        if blue["name"] == green_name:
+            raise RolloutError(f"Served entity name {green_name} is already taken by version {blue.get('entity_version')}.")
+        green = dict(blue, name=green_name, entity_name=entity_name, entity_version=str(entity_version))
+
+        self.log(f"Adding {green_name} ({entity_name} v{entity_version}) next to {blue['name']} at 0% traffic.")
+        steps, warmup_ms = [], []
+        try:
+            self.put_config([blue, green], {blue["name"]: 100, green_name: 0})
+            warmup_ms = self.warm(green_name)
+            self.log(f"Warmed {green_name}: {len(warmup_ms)} queries, first {warmup_ms[0]:.0f} ms, last {warmup_ms[-1]:.0f} ms.")
+            baseline = self.probe(blue["name"], green_name, 0)
+            steps.append(baseline)
+            self.log(format_step(baseline))
+            if baseline.regressed:
+                return self.roll_back(blue, green_name, steps, warmup_ms, "regressed at 0% traffic")
+            for pct in self.steps:
+                self.put_config([blue, green], {blue["name"]: 100 - pct, green_name: pct})
+                step = self.probe(blue["name"], green_name, pct)
+                steps.append(step)
+                self.log(format_step(step))
+                if step.regressed:
+                    return self.roll_back(blue, green_name, steps, warmup_ms, f"regressed at {pct}% traffic")
+        except Exception as exc:
+            # RolloutError, ResourceFailed (config update failed), an API or network error: whatever
+            # stopped the rollout, green must not be left serving traffic.
+            return self.roll_back(blue, green_name, steps, warmup_ms, str(exc))
+
+        self.log(f"Removing {blue['name']}.")
+        self.put_config([green], {green_name: 100})
+        return RolloutResult(blue["name"], green_name, "promoted", steps, warmup_ms)
+
+    def roll_back(self, blue: dict, green_name: str, steps: list, warmup_ms: list, reason: str) -> RolloutResult:
+        self.log(f"Rolling back to {blue['name']}: {reason}.")
+        self.put_config([blue], {blue["name"]: 100})
+        return RolloutResult(blue["name"], green_name, "rolled_back", steps, warmup_ms, reason)
+
+
+def format_step(step: StepResult) -> str:
+    def ms(value):
+        return "-" if value is None else f"{value:.0f} ms"
+
+    flag = "REGRESSED" if step.regressed else "ok"
+    return f"  green {step.traffic:>3}%: p95 blue {ms(step.blue_p95_ms)}, green {ms(step.green_p95_ms)}, green errors {step.green_errors} -> {flag}"
+
+
+def format_rollout(result: RolloutResult) -> str:
+    lines = [f"Rollout {result.blue} -> {result.green}: {result.status}" + (f" ({result.reason})" if result.reason else "")]
+    lines += [format_step(step) for step in result.steps]
+    return "\n".join(lines)
@@ -0,0 +1,681 @@
+"""
+The served RAG model (MLflow pyfunc), shipped as part of the ``rag_model`` package.
+
+The notebook logs ``rag_model/model_entry.py`` as a models-from-code model with this package in
+``code_paths`` and its config constants as ``model_config``; ``RAG_<KEY>`` env vars on the endpoint
+override them. Cold start is kept short:
+- importing this module pulls in nothing beyond MLflow and pandas (which the serving container
+  loads anyway); openai, azure-identity, databricks-vectorsearch, the embedder and the reranker
+  are imported by the load step that needs them;
+- ``load_context`` builds the index client, Azure OpenAI clients, query embedder, reranker and
+  answer table in parallel, then (``WARMUP``) opens the Azure OpenAI connections and runs one
+  dummy retrieval, so the first real request does not pay for connection setup.
+``serving_requirements`` pins the minimal dependency set to the versions the notebook tested with;
+``serving_constraints`` pins their whole dependency closure for the model's constraints file.
+"""
+
+import importlib.metadata
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterator, Optional
+
+import pandas as pd
+from mlflow.pyfunc import PythonModel
+
+from rag_model.keepwarm import HEALTH_ANSWER, HEALTH_QUERY
+from rag_model.metrics import MetricsRegistry, MetricsReporter, RequestTimer
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_SCOPE = "2ff814a6-3304-4ab8-85cb-cd0e6f879c1d/.default"
+PRIMARY_KEY = "Topic"
+CONTEXT_COLUMNS = ["Topic", "Description"]
+CONFIG_ENV_PREFIX = "RAG_"
+# Optional local index snapshot (rag_model.local_index); env var wins over the logged artifact.
+LOCAL_INDEX_ENV = "RAG_LOCAL_INDEX_DIR"
+LOCAL_INDEX_ARTIFACT = "local_index"
+LEXICAL_INDEX_ENV = "RAG_LEXICAL_INDEX_DIR"
+LEXICAL_INDEX_ARTIFACT = "lexical_index"
+PROMPT_TEMPLATE_ENV = "RAG_PROMPT_TEMPLATE"
+PROMPT_TEMPLATE_ARTIFACT = "prompt_template"
+# Precomputed answers (rag_model.answers snapshot, local or /Volumes path) checked before retrieval.
+ANSWER_TABLE_ENV = "RAG_ANSWER_TABLE_PATH"
+METRICS_PROM_FILE_ENV = "RAG_METRICS_PROM_FILE"
+# Rebuild the Vector Search client this long before its AAD token expires.
+TOKEN_REFRESH_MARGIN_S = 300
+
+# Every key can be set in the notebook's log-model cell (model_config) or as RAG_<KEY> on the endpoint.
+CONFIG_DEFAULTS = {
+    "ENDPOINT_NAME": "vector_search_endpoint",
+    "INDEX_NAME": "",
+    "DEPLOYMENT_NAME": "",
+    "TOP_K": 1,
+    # Sharded retrieval (rag_model.sharding): JSON list of per-domain / per-tenant indexes searched
+    # concurrently and merged; "" searches INDEX_NAME only.
+    "INDEX_SHARDS": "",
+    # "all" (every shard of the request's tenant) or "keywords" (shards whose keywords match the query).
+    "SHARD_ROUTING": "all",
+    "SHARD_TIMEOUT_MS": 1000.0,
+    # Score scale for the merge: "none" (shards share an embedding model) or "minmax" (rescaled per shard).
+    "SHARD_SCORE_NORM": "none",
+    # Hedged Vector Search calls (rag_model.hedging): a duplicate query once the first has run past
+    # the HEDGE_PERCENTILE of recent latencies, first answer wins; HEDGE_BUDGET caps the extra load.
+    "HEDGE_REQUESTS": False,
+    "HEDGE_PERCENTILE": 95.0,
+    "HEDGE_BUDGET": 0.05,
+    "HEDGE_MIN_DELAY_MS": 20.0,
+    # "vector" or "hybrid" (vector + BM25 fused with reciprocal rank fusion).
+    "RETRIEVAL_MODE": "vector",
+    "HYBRID_CANDIDATES": 20,
+    # Reranker between retrieval and chat: "none", "lexical" or "cross-encoder[:<model>]".
+    "RERANKER": "none",
+    "RERANK_CANDIDATES": 20,
+    "RERANK_BUDGET_MS": 50.0,
+    # Scoring threads for pooled rerankers (cross-encoder); match the requests one replica serves at
+    # once (4 for a Small workload). Requests that find every thread busy keep retrieval order.
+    "RERANK_WORKERS": 4,
+    # Embed queries in the model (LRU-cached) and search by query_vector; "" lets Vector Search
+    # embed query_text server-side. Required for indexes with self-managed embeddings.
+    "QUERY_EMBEDDING": "",
+    "QUERY_EMBEDDING_CACHE_SIZE": 10000,
+    # rag_model.prompts "<name>@<version>"; RAG_PROMPT_TEMPLATE wins over the logged artifact.
+    "PROMPT_TEMPLATE": "rag-faq@1",
+    "ANSWER_MIN_SIMILARITY": 0.8,
+    # Concurrent identical queries (normalized, same tenant) share one retrieval + completion.
+    "COALESCE_QUERIES": True,
+    # Metrics side channel: sampled MLflow traces / per-request log lines, periodic snapshots.
+    "TRACE_SAMPLE_RATE": 0.0,
+    "METRICS_LOG_SAMPLE_RATE": 0.01,
+    "METRICS_FLUSH_S": 60.0,
+    # Azure OpenAI quota for this process (0 disables the limiter); calls wait at most AOAI_MAX_WAIT_S.
+    "AOAI_RPM": 0.0,
+    "AOAI_TPM": 0.0,
+    "AOAI_MAX_WAIT_S": 10.0,
+    "AOAI_COMPLETION_TOKENS": 256,
+    "AOAI_MAX_RETRIES": 3,
+    # Extra deployments (RAG_AOAI_POOL_* JSON) share the load; a failing one sits out this long.
+    "AOAI_COOLDOWN_S": 30.0,
+    # Open connections and run one dummy retrieval in load_context.
+    "WARMUP": True,
+    "WARMUP_QUERY": "what is diabetes?",
+}
+
+METRICS = MetricsRegistry()
+
+
+def _cast(default, value):
+    if isinstance(default, bool):
+        return value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, (int, float)):
+        return type(default)(float(value)) if isinstance(default, int) else float(value)
+    if isinstance(value, (list, dict)):
+        # Structured settings (INDEX_SHARDS) are held as JSON, like their RAG_<KEY> env form.
+        return json.dumps(value)
+    return str(value)
+
+
+def load_config(model_config: Optional[dict] = None) -> dict:
+    """
+    ``CONFIG_DEFAULTS``, then ``model_config`` (the logged notebook constants), then ``RAG_<KEY>`` env vars.
+    """
+    config = dict(CONFIG_DEFAULTS)
+    for key, value in (model_config or {}).items():
+        if key in config and value is not None:
+            config[key] = _cast(CONFIG_DEFAULTS[key], value)
+    for key, default in CONFIG_DEFAULTS.items():
+        raw = os.getenv(f"{CONFIG_ENV_PREFIX}{key}")
+        if raw is not None:
+            config[key] = _cast(default, raw)
+    return config
+
+
+def _pin(name: str) -> str:
+    try:
+        return f"{name}=={importlib.metadata.version(name)}"
+    except importlib.metadata.PackageNotFoundError:
+        return name
+
+
+def serving_requirements(config: dict, local_index_type: Optional[str] = None) -> list:
+    """
+    Minimal pip requirements for ``config``, pinned to the versions installed here.
+    ``local_index_type`` is set when a local snapshot is bundled (no Vector Search client needed).
+    """
+    names = ["mlflow", "pandas", "numpy", "openai", "databricks-sdk"]
+    if local_index_type is None:
+        names += ["databricks-vectorsearch", "azure-identity"]
+    elif local_index_type == "hnsw":
+        names.append("hnswlib")
+    if str(config.get("RERANKER", "none")).startswith("cross-encoder"):
+        names.append("sentence-transformers")
+    return [_pin(name) for name in names]
+
+
+def serving_constraints(requirements: list) -> list:
+    """
+    ``name==version`` for the installed dependency closure of ``requirements``, for the model's
+    constraints file: the serving build then installs exactly the versions the notebook ran with
+    (the cluster's locked wheelhouse) instead of resolving the closure again.
+    """
+    from packaging.requirements import Requirement
+    from packaging.utils import canonicalize_name
+
+    pins, pending = {}, [(Requirement(spec), "") for spec in requirements if not spec.startswith("-")]
+    while pending:
+        requirement, extra = pending.pop()
+        if requirement.marker is not None and not requirement.marker.evaluate({"extra": extra}):
+            continue
+        name = canonicalize_name(requirement.name)
+        if name in pins:
+            continue
+        try:
+            distribution = importlib.metadata.distribution(requirement.name)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+        pins[name] = distribution.version
+        for extra_name in [""] + sorted(requirement.extras):
+            pending += [(Requirement(spec), extra_name) for spec in distribution.requires or []]
+    return [f"{name}=={version}" for name, version in sorted(pins.items())]
+
+
+class _VectorIndexHandle:
+    """
+    A Vector Search index whose client can be replaced. The wrappers around it (hedging, hybrid,
+    shards) hold the handle, so a token refresh reopens the index without rebuilding them.
+    """
+
+    def __init__(self, endpoint: str, index_name: str):
+        self.endpoint = endpoint
+        self.index_name = index_name
+        self.index = None
+
+    def open(self, vsc) -> "_VectorIndexHandle":
+        self.index = vsc.get_index(self.endpoint, self.index_name)
+        return self
+
+    def describe(self) -> dict:
+        return self.index.describe()
+
+    def similarity_search(self, **kwargs) -> dict:
+        return self.index.similarity_search(**kwargs)
+
+
+class RAGModel(PythonModel):
+    def __init__(self, config: Optional[dict] = None):
+        self._model_config = dict(config or {})
+        self.config = load_config(self._model_config)
+        self.top_k = self.config["TOP_K"]
+        self.token_expires_on = None
+        self.sharded = False
+        # Vector Search indexes in use; reopened with a new client on token refresh.
+        self.vector_indexes = []
+        self.inflight = None
+        self.load_timings = {}
+
+    def _build_vector_client(self):
+        from azure.identity import ClientSecretCredential
+        from databricks.vector_search.client import VectorSearchClient
+
+        host = os.getenv("DATABRICKS_HOST")
+        client_id = os.getenv("DATABRICKS_CLIENT_ID")
+        client_secret = os.getenv("DATABRICKS_CLIENT_SECRET")
+        tenant_id = os.getenv("DATABRICKS_TENANT_ID")
+
+        if not (host and client_id and client_secret and tenant_id):
+            raise RuntimeError(
+                "Missing Databricks OAuth env vars. "
+                "Set DATABRICKS_HOST, DATABRICKS_CLIENT_ID, DATABRICKS_CLIENT_SECRET, DATABRICKS_TENANT_ID."
+            )
+
+        if host and not host.startswith("https://"):
+            host = f"https://{host}"
+
+        credential = ClientSecretCredential(
+            tenant_id=tenant_id,
+            client_id=client_id,
+            client_secret=client_secret,
+        )
+        access_token = credential.get_token(RESOURCE_SCOPE)
+        token = access_token.token
+        self.token_expires_on = access_token.expires_on
+
+        for kwargs in (
+            {"workspace_url": host, "personal_access_token": token},
+            {"host": host, "token": token},
+            {"endpoint": host, "token": token},
+        ):
+            try:
+                return VectorSearchClient(disable_notice=True, **kwargs)
+            except TypeError:
+                continue
+        raise RuntimeError("VectorSearchClient init failed; check databricks-vectorsearch version.")
+
+    def _open_vector_index(self, vsc, endpoint: str, index_name: str):
+        handle = _VectorIndexHandle(endpoint, index_name).open(vsc)
+        self.vector_indexes.append(handle)
+        return handle
+
+    def _resolve_path(self, context: Any, env_name: str, artifact_name: str):
+        path = os.getenv(env_name)
+        if path:
+            return path
+        artifacts = getattr(context, "artifacts", None) or {}
+        return artifacts.get(artifact_name)
+
+    def _load_lexical_index(self, lexical_dir: Optional[str], vector_index):
+        from rag_model.lexical import BM25Index
+
+        if lexical_dir:
+            return BM25Index.load(lexical_dir)
+        if hasattr(vector_index, "rows"):
+            # Local snapshots already hold the rows; index them in memory.
+            return BM25Index.from_rows(vector_index.columns, vector_index.rows)
+        raise RuntimeError(
+            "Hybrid retrieval needs a BM25 index. "
+            f"Log the '{LEXICAL_INDEX_ARTIFACT}' artifact or set {LEXICAL_INDEX_ENV} "
+            "(for index shards: the shard's lexical_dir)."
+        )
+
+    def _with_hybrid(self, index, lexical_dir: Optional[str]):
+        if self.config["RETRIEVAL_MODE"] != "hybrid":
+            return index
+        from rag_model.hybrid import HybridIndex
+
+        return HybridIndex(
+            index,
+            self._load_lexical_index(lexical_dir, index),
+            key_column=PRIMARY_KEY,
+            candidates=self.config["HYBRID_CANDIDATES"],
+        )
+
+    def _with_hedging(self, index):
+        if not self.config["HEDGE_REQUESTS"]:
+            return index
+        from rag_model.hedging import HedgedIndex
+
+        return HedgedIndex(
+            index,
+            percentile=self.config["HEDGE_PERCENTILE"],
+            budget=self.config["HEDGE_BUDGET"],
+            min_delay_ms=self.config["HEDGE_MIN_DELAY_MS"],
+            registry=METRICS,
+        )
+
+    def _load_sharded_index(self, shards: list):
+        from rag_model.sharding import ShardedIndex
+
+        vsc = self._build_vector_client() if any(shard.local_dir is None for shard in shards) else None
+
+        def load(shard):
+            if shard.local_dir:
+                from rag_model.local_index import LocalVectorIndex
+
+                index = LocalVectorIndex.load(shard.local_dir)
+            else:
+                index = self._with_hedging(self._open_vector_index(vsc, shard.endpoint or self.config["ENDPOINT_NAME"], shard.index))
+            return self._with_hybrid(index, shard.lexical_dir)
+
+        # get_index is a network round trip per shard; open them together.
+        with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="rag-shard-load") as pool:
+            indexes = dict(zip([shard.name for shard in shards], pool.map(load, shards)))
+        return ShardedIndex(
+            shards,
+            indexes,
+            routing=self.config["SHARD_ROUTING"],
+            timeout_ms=self.config["SHARD_TIMEOUT_MS"],
+            score_norm=self.config["SHARD_SCORE_NORM"],
+            text_with_vector=self.config["RETRIEVAL_MODE"] == "hybrid",
+            registry=METRICS,
+        )
+
+    def _load_index(self, context: Any):
+        from rag_model.sharding import parse_shards
+
+        shards = parse_shards(self.config["INDEX_SHARDS"])
+        self.sharded = bool(shards)
+        if shards:
+            return self._load_sharded_index(shards)
+
+        local_dir = self._resolve_path(context, LOCAL_INDEX_ENV, LOCAL_INDEX_ARTIFACT)
+        if local_dir:
+            from rag_model.local_index import LocalVectorIndex
+
+            index = LocalVectorIndex.load(local_dir)
+        else:
+            vsc = self._build_vector_client()
+            index = self._with_hedging(self._open_vector_index(vsc, self.config["ENDPOINT_NAME"], self.config["INDEX_NAME"]))
+        return self._with_hybrid(index, self._resolve_path(context, LEXICAL_INDEX_ENV, LEXICAL_INDEX_ARTIFACT))
+
+    def _load_answers(self):
+        path = os.getenv(ANSWER_TABLE_ENV)
+        if not path:
+            return None
+        from rag_model.answers import AnswerTable
+
+        try:
+            answers = AnswerTable.load(path, min_similarity=self.config["ANSWER_MIN_SIMILARITY"])
+        except Exception as exc:
+            # Serve without the table rather than fail the endpoint.
+            logger.warning("Answer table %s not loaded: %s", path, exc)
+            return None
+        logger.info("Loaded %d precomputed answers (source version %s).", len(answers), answers.source_version)
+        return answers
+
+    def _load_reranker(self):
+        from rag_model.rerank import BudgetedReranker, get_reranker
+
+        reranker = get_reranker(self.config["RERANKER"])
+        if reranker is None:
+            return None
+        return BudgetedReranker(
+            reranker,
+            budget_ms=self.config["RERANK_BUDGET_MS"],
+            max_workers=max(1, self.config["RERANK_WORKERS"]),
+            registry=METRICS,
+        )
+
+    def _load_query_embedder(self):
+        if not self.config["QUERY_EMBEDDING"]:
+            return None
+        from rag_model.embeddings import CachedEmbedder, get_embedder
+
+        return CachedEmbedder(get_embedder(self.config["QUERY_EMBEDDING"]), max_entries=self.config["QUERY_EMBEDDING_CACHE_SIZE"])
+
+    def _load_prompt(self, context: Any):
+        from rag_model.prompts import get_template
+
+        return get_template(self._resolve_path(context, PROMPT_TEMPLATE_ENV, PROMPT_TEMPLATE_ARTIFACT) or self.config["PROMPT_TEMPLATE"])
+
+    def _build_router(self):
+        from rag_model.aoai_pool import DeploymentRouter, pool_configs_from_env
+
+        aoai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+        aoai_key = os.getenv("AZURE_OPENAI_API_KEY")
+        aoai_version = os.getenv("AZURE_OPENAI_API_VERSION")
+        if not (aoai_endpoint and aoai_key and aoai_version):
+            raise RuntimeError(
+                "Missing Azure OpenAI env vars. "
+                "Set AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_API_KEY / AZURE_OPENAI_API_VERSION."
+            )
+
+        primary = {
+            "name": "primary",
+            "endpoint": aoai_endpoint,
+            "api_key": aoai_key,
+            "api_version": aoai_version,
+            "deployment": self.config["DEPLOYMENT_NAME"],
+            "rpm": self.config["AOAI_RPM"],
+            "tpm": self.config["AOAI_TPM"],
+        }
+        router = DeploymentRouter.from_configs(
+            [primary] + pool_configs_from_env(),
+            cooldown_s=self.config["AOAI_COOLDOWN_S"],
+            max_wait_s=self.config["AOAI_MAX_WAIT_S"],
+        )
+        if self.config["WARMUP"]:
+            for deployment in router.deployments:
+                self._connect(deployment)
+        return router
+
+    @staticmethod
+    def _connect(deployment) -> None:
+        # A free GET opens the (TLS) connection the first chat call would otherwise set up.
+        try:
+            deployment.client.models.list()
+        except Exception as exc:
+            logger.debug("Azure OpenAI warm-up for %s: %s", deployment.name, exc)
+
+    def _timed(self, name: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.load_timings[name] = time.perf_counter() - start
+
+    def load_context(self, context: Any) -> None:
+        start = time.perf_counter()
+        self.context = context
+        model_config = getattr(context, "model_config", None) or {}
+        self.config = load_config({**model_config, **self._model_config})
+        self.top_k = self.config["TOP_K"]
+        self._refresh_lock = threading.Lock()
+        if self.config["COALESCE_QUERIES"]:
+            from rag_model.singleflight import SingleFlight
+
+            self.inflight = SingleFlight()
+
+        # Independent, mostly network-bound loads: AAD token + get_index, Azure OpenAI clients,
+        # embedding endpoint client, reranker model, answer table download.
+        with ThreadPoolExecutor(max_workers=6, thread_name_prefix="rag-load") as pool:
+            index = pool.submit(self._timed, "index", self._load_index, context)
+            router = pool.submit(self._timed, "router", self._build_router)
+            reranker = pool.submit(self._timed, "reranker", self._load_reranker)
+            query_embedder = pool.submit(self._timed, "query_embedder", self._load_query_embedder)
+            answers = pool.submit(self._timed, "answers", self._load_answers)
+            prompt = pool.submit(self._timed, "prompt", self._load_prompt, context)
+            self.index = index.result()
+            self.router = router.result()
+            self.reranker = reranker.result()
+            self.query_embedder = query_embedder.result()
+            self.answers = answers.result()
+            self.prompt = prompt.result()
+
+        if self.config["WARMUP"]:
+            self._timed("warmup_retrieval", self._warm_up)
+        self.reporter = MetricsReporter(
+            METRICS,
+            interval_s=self.config["METRICS_FLUSH_S"],
+            prom_file=os.getenv(METRICS_PROM_FILE_ENV),
+        ).start()
+        self.load_timings["load_context"] = time.perf_counter() - start
+        logger.info("load_context timings (s): %s", {k: round(v, 3) for k, v in self.load_timings.items()})
+
+    def _warm_up(self) -> None:
+        # One retrieval through the real path (query embedding, search, rerank); failures only cost latency.
+        query = self.config["WARMUP_QUERY"]
+        try:
+            self._rerank(query, self._retrieve(query, self._embed_query(query)))
+        except Exception as exc:
+            logger.warning("Warm-up retrieval failed: %s", exc)
+
+    def _refresh_token(self) -> None:
+        # AAD tokens last about an hour; the Vector Search client holds one, so rebuild it before expiry.
+        if self.token_expires_on is None or time.time() < self.token_expires_on - TOKEN_REFRESH_MARGIN_S:
+            return
+        with self._refresh_lock:
+            if time.time() < self.token_expires_on - TOKEN_REFRESH_MARGIN_S:
+                return
+            # Only the Vector Search indexes carry the token: reopen those and keep everything around
+            # them (hedge latency windows, BM25 indexes, shard routing) instead of reloading the model.
+            vsc = self._build_vector_client()
+            handles = self.vector_indexes
+            with ThreadPoolExecutor(max_workers=max(1, len(handles)), thread_name_prefix="rag-index-refresh") as pool:
+                list(pool.map(lambda handle: handle.open(vsc), handles))
+
+    def _embed_query(self, q: str):
+        if self.query_embedder is None:
+            return None
+        return self.query_embedder([q])[0].tolist()
+
+    def _retrieve(self, q: str, query_vector: Optional[list] = None, num_results: Optional[int] = None,
+                  tenant: Optional[str] = None) -> list:
+        from rag_model.results import result_rows
+
+        if num_results is None:
+            # Over-fetch when a reranker will pick the best top_k.
+            num_results = max(self.top_k, self.config["RERANK_CANDIDATES"]) if self.reranker else self.top_k
+        search = {"query_text": q}
+        if query_vector is not None:
+            search = {"query_vector": query_vector}
+            if self.config["RETRIEVAL_MODE"] == "hybrid":
+                # The BM25 side still needs the text.
+                search["query_text"] = q
+        if self.sharded:
+            # The shard router reads the query text and the request's tenant.
+            search.update(query_text=q, tenant=tenant)
+        res = self.index.similarity_search(
+            columns=CONTEXT_COLUMNS,
+            num_results=num_results,
+            **search,
+        )
+        return result_rows(res)
+
+    def _rerank(self, q: str, rows: list) -> list:
+        if self.reranker is None:
+            return rows[: self.top_k]
+        rows, _ = self.reranker.rerank(q, rows, self.top_k)
+        return rows
+
+    def _build_context(self, rows: list) -> str:
+        return "\n\n".join(f"{row.get('Topic')}: {row.get('Description')}" for row in rows)
+
+    def _context_for(self, q: str, timer: RequestTimer, tenant: Optional[str] = None) -> str:
+        with timer.stage("token_refresh"):
+            self._refresh_token()
+        with timer.stage("embed_query"):
+            query_vector = self._embed_query(q)
+        with timer.stage("retrieve"):
+            rows = self._retrieve(q, query_vector, tenant=tenant)
+        with timer.stage("rerank"):
+            rows = self._rerank(q, rows)
+        with timer.stage("build_context"):
+            return self._build_context(rows)
+
+    def _messages(self, q: str, ctx: str) -> list:
+        # Static prefix first, then the retrieved context, then the query (prompt-cache friendly).
+        return self.prompt.render(q, ctx)
+
+    def _create(self, timer: RequestTimer, messages: list, stream: bool = False):
+        from rag_model.ratelimit import estimate_tokens
+
+        estimate = estimate_tokens(messages, self.config["AOAI_COMPLETION_TOKENS"])
+        # Streams report usage only when asked, in a final chunk without choices.
+        extra = {"stream_options": {"include_usage": True}} if stream else {}
+        raw, deployment, waited = self.router.call(
+            lambda d: d.client.chat.completions.with_raw_response.create(
+                model=d.deployment,
+                messages=messages,
+                stream=stream,
+                **extra,
+            ),
+            tokens=estimate,
+            max_retries=self.config["AOAI_MAX_RETRIES"],
+        )
+        timer.mark("rate_limit_wait", waited)
+        return raw.parse(), deployment, estimate
+
+    @staticmethod
+    def _record_usage(timer: RequestTimer, deployment, estimate: float, usage) -> None:
+        # Token metrics, and the limiter's pre-call estimate replaced by the real count.
+        if usage is None:
+            return
+        timer.add_usage(usage)
+        deployment.settle(estimate, usage.total_tokens)
+
+    def _chat(self, q: str, ctx: str, timer: RequestTimer) -> str:
+        with timer.stage("chat"):
+            resp, deployment, estimate = self._create(timer, self._messages(q, ctx))
+        self._record_usage(timer, deployment, estimate, resp.usage)
+        return resp.choices[0].message.content
+
+    def _chat_stream(self, q: str, ctx: str, timer: RequestTimer) -> Iterator[str]:
+        with timer.stage("chat"):
+            start = time.perf_counter()
+            stream, deployment, estimate = self._create(timer, self._messages(q, ctx), stream=True)
+            first = True
+            usage = None
+            try:
+                for chunk in stream:
+                    # Azure sends a leading chunk with no choices (content filter results); the
+                    # usage chunk comes last, also without choices.
+                    if not chunk.choices:
+                        usage = getattr(chunk, "usage", None) or usage
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if first:
+                            timer.mark("chat_first_token", time.perf_counter() - start)
+                            first = False
+                        yield delta
+            finally:
+                self._record_usage(timer, deployment, estimate, usage)
+
+    def _precomputed(self, q: str, timer: RequestTimer) -> Optional[str]:
+        if self.answers is None:
+            return None
+        with timer.stage("answer_lookup"):
+            hit = self.answers.lookup(q)
+        if hit is None:
+            return None
+        timer.registry.inc("answer_table_hits_total")
+        return hit["answer"]
+
+    def _health(self) -> str:
+        # Keep-warm ping (rag_model.keepwarm): exercise retrieval, skip Azure OpenAI and the latency metrics.
+        self._refresh_token()
+        self._warm_up()
+        METRICS.inc("health_checks_total")
+        return HEALTH_ANSWER
+
+    def _answer(self, q: str, timer: RequestTimer, use_answers: bool = True, tenant: Optional[str] = None) -> str:
+        # Precomputed answers come from the shared FAQ, so tenant-scoped queries skip them.
+        answer = self._precomputed(q, timer) if use_answers and tenant is None else None
+        if answer is None:
+            answer = self._chat(q, self._context_for(q, timer, tenant), timer)
+        return answer
+
+    def _coalesced_answer(self, q: str, timer: RequestTimer, tenant: Optional[str] = None) -> str:
+        # Identical queries already in flight on this replica wait for that answer instead of
+        # repeating retrieval and chat; nothing is kept once it returns, so answers are never stale.
+        if self.inflight is None:
+            return self._answer(q, timer, tenant=tenant)
+        from rag_model.answers import normalize_query
+
+        start = time.perf_counter()
+        answer, shared = self.inflight.do((normalize_query(q), tenant), lambda: self._answer(q, timer, tenant=tenant))
+        if shared:
+            timer.mark("coalesced_wait", time.perf_counter() - start)
+            timer.registry.inc("coalesced_requests_total")
+        return answer
+
+    def _timer(self) -> RequestTimer:
+        return RequestTimer.sampled(
+            METRICS,
+            trace_rate=self.config["TRACE_SAMPLE_RATE"],
+            log_rate=self.config["METRICS_LOG_SAMPLE_RATE"],
+        )
+
+    @staticmethod
+    def _tenants(model_input: pd.DataFrame) -> list:
+        # Optional "tenant" column: selects that tenant's index shards (rag_model.sharding).
+        if "tenant" not in model_input.columns:
+            return [None] * len(model_input)
+        return [None if pd.isna(t) or t == "" else str(t) for t in model_input["tenant"]]
+
+    def predict(self, context: Any, model_input: pd.DataFrame, params: Optional[dict] = None) -> pd.DataFrame:
+        queries = model_input["query"].astype(str).tolist()
+        answers = []
+        for q, tenant in zip(queries, self._tenants(model_input)):
+            if q == HEALTH_QUERY:
+                answers.append(self._health())
+                continue
+            with self._timer() as timer:
+                answers.append(self._coalesced_answer(q, timer, tenant))
+        return pd.DataFrame({"answer": answers})
+
+    def predict_stream(self, context: Any, model_input: pd.DataFrame, params: Optional[dict] = None) -> Iterator[str]:
+        # Same retrieval path as predict; tokens are forwarded as Azure OpenAI emits them.
+        queries = model_input["query"].astype(str).tolist()
+        if len(queries) != 1:
+            raise ValueError(f"predict_stream expects exactly one query, got {len(queries)}.")
+        q, tenant = queries[0], self._tenants(model_input)[0]
+        with self._timer() as timer:
+            answer = self._precomputed(q, timer) if tenant is None else None
+            if answer is not None:
+                yield answer
+                return
+            yield from self._chat_stream(q, self._context_for(q, timer, tenant), timer)
@@ -0,0 +1,206 @@
+"""
+Sharded retrieval: one index per knowledge domain or tenant, searched as a single index.
+
+``ShardedIndex`` exposes ``similarity_search`` like the other backends. Per query it picks the
+shards to search (``ShardedIndex.route``):
+- tenant: shards of the request's tenant plus the shared (untenanted) shards; without a tenant,
+  only the shared shards;
+- ``routing="keywords"``: of those, the shards whose keywords occur in the query (a keyword
+  matches the query tokens it prefixes, so ``carb`` matches ``carbs``); all of them when none
+  match, or for shards without keywords. ``routing="all"`` fans out to every eligible shard.
+
+The chosen shards are searched concurrently. A shard that fails or misses ``timeout_ms`` is
+skipped (``shard_errors_total`` / ``shard_timeouts_total``) and the request is answered from the
+others; only when no shard answers does the search fail. Hits are merged by score. Shards that
+share an embedding model and metric already score on one normalized scale (``"none"``, the
+default); shards that do not (other embedding models, hybrid RRF scores) are rescaled per shard
+first (``"minmax"``: best hit 1.0, worst 0.0, ties broken by raw score). Min-max costs ranking
+quality when the scales do match: a shard's best hit scores 1.0 however weak it is.
+
+Shards may live on different Vector Search endpoints. The registry is the model's
+``INDEX_SHARDS`` config, a JSON list (``endpoint`` defaults to ``ENDPOINT_NAME``; ``local_dir``
+is a ``rag_model.local_index`` snapshot instead of an index):
+
+    [{"name": "faq", "index": "main.rag.diabetes_faq_index"},
+     {"name": "nutrition", "index": "main.rag.nutrition_index", "endpoint": "vs-2", "keywords": ["diet", "carb"]},
+     {"name": "acme", "index": "main.rag.acme_faq_index", "tenant": "acme"}]
+"""
+
+import json
+import logging
+import time
+from concurrent.futures import wait
+from typing import Optional, Sequence
+
+from rag_model.embeddings import tokenize
+from rag_model.results import build_result, result_rows
+from rag_model.threads import spawn
+
+logger = logging.getLogger(__name__)
+
+ROUTING_MODES = ("all", "keywords")
+SCORE_NORMS = ("none", "minmax")
+
+
+class NoShardAvailable(RuntimeError):
+    """
+    Raised when none of the routed shards answered in time.
+    """
+
+
+class IndexShard:
+    def __init__(
+        self,
+        name: str,
+        index: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        local_dir: Optional[str] = None,
+        lexical_dir: Optional[str] = None,
+        tenant: Optional[str] = None,
+        keywords: Sequence[str] = (),
+    ):
+        if not (index or local_dir):
+            raise ValueError(f"Shard {name!r} needs an 'index' or a 'local_dir'.")
+        self.name = str(name)
+        self.index = index
+        self.endpoint = endpoint
+        self.local_dir = local_dir
+        self.lexical_dir = lexical_dir
+        self.tenant = tenant
+        self.keywords = tuple(str(keyword).lower() for keyword in keywords)
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "IndexShard":
+        unknown = set(spec) - {"name", "index", "endpoint", "local_dir", "lexical_dir", "tenant", "keywords"}
+        if unknown:
+            raise ValueError(f"Unknown shard keys {sorted(unknown)} in {spec}.")
+        spec = dict(spec)
+        name = spec.pop("name", None) or spec.get("index") or spec.get("local_dir")
+        return cls(name, **spec)
+
+    def serves_tenant(self, tenant: Optional[str]) -> bool:
+        return self.tenant is None or self.tenant == tenant
+
+    def matches(self, tokens: Sequence[str]) -> bool:
+        return any(token.startswith(keyword) for keyword in self.keywords for token in tokens)
+
+
+def parse_shards(spec) -> list:
+    """
+    ``IndexShard`` list from the ``INDEX_SHARDS`` config (JSON string or list of dicts); ``[]`` if empty.
+    """
+    if isinstance(spec, str):
+        spec = json.loads(spec) if spec.strip() else []
+    shards = [IndexShard.from_dict(item) for item in spec or []]
+    names = [shard.name for shard in shards]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate shard names: {', '.join(duplicates)}.")
+    return shards
+
+
+def normalize_scores(scores: Sequence[float], method: str = "none") -> list:
+    if method == "none" or not scores:
+        return [float(score) for score in scores]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [1.0] * len(scores)
+    return [(score - low) / (high - low) for score in scores]
+
+
+class ShardedIndex:
+    """
+    ``similarity_search`` over the routed shards, searched concurrently and merged by score.
+    ``indexes`` maps shard names to their index objects (anything with ``similarity_search``).
+    ``query_text`` is always used for routing; with a ``query_vector`` it is only passed on to the
+    shards when ``text_with_vector`` (hybrid shards, whose BM25 side needs it).
+    """
+
+    def __init__(
+        self,
+        shards: Sequence[IndexShard],
+        indexes: dict,
+        routing: str = "all",
+        timeout_ms: float = 1000.0,
+        score_norm: str = "none",
+        text_with_vector: bool = False,
+        registry=None,
+    ):
+        if routing not in ROUTING_MODES:
+            raise ValueError(f"Unknown shard routing {routing!r}; expected one of {', '.join(ROUTING_MODES)}.")
+        if score_norm not in SCORE_NORMS:
+            raise ValueError(f"Unknown shard score normalization {score_norm!r}; expected one of {', '.join(SCORE_NORMS)}.")
+        self.shards = list(shards)
+        self.indexes = dict(indexes)
+        self.routing = routing
+        self.timeout_s = float(timeout_ms) / 1000.0
+        self.score_norm = score_norm
+        self.text_with_vector = bool(text_with_vector)
+        self.registry = registry
+
+    def describe(self) -> dict:
+        return {"name": "sharded", "shards": [shard.name for shard in self.shards]}
+
+    def _inc(self, name: str) -> None:
+        if self.registry is not None:
+            self.registry.inc(name)
+
+    def route(self, query_text: Optional[str], tenant: Optional[str] = None) -> list:
+        eligible = [shard for shard in self.shards if shard.serves_tenant(tenant)]
+        if self.routing == "keywords" and query_text:
+            tokens = tokenize(query_text)
+            matched = [shard for shard in eligible if not shard.keywords or shard.matches(tokens)]
+            # Only narrow when a keyword matched; otherwise the query is not clearly in any domain.
+            if any(shard.keywords for shard in matched):
+                return matched
+        return eligible
+
+    def similarity_search(
+        self,
+        query_text: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        num_results: int = 10,
+        tenant: Optional[str] = None,
+        **kwargs,
+    ) -> dict:
+        columns = list(columns or [])
+        shards = self.route(query_text, tenant)
+        if not shards:
+            raise NoShardAvailable(f"No index shard serves tenant {tenant!r}.")
+        forward_text = query_text if kwargs.get("query_vector") is None or self.text_with_vector else None
+        # One thread per shard search: on a shared pool, time spent queued behind other requests
+        # would count against timeout_ms.
+        start = time.perf_counter()
+        futures = {
+            spawn(
+                self.indexes[shard.name].similarity_search,
+                name="shard-retrieval",
+                query_text=forward_text,
+                columns=columns,
+                num_results=num_results,
+                **kwargs,
+            ): shard
+            for shard in shards
+        }
+        done, pending = wait(futures, timeout=self.timeout_s)
+        merged, answered = [], 0
+        for future in done:
+            shard = futures[future]
+            try:
+                hits = result_rows(future.result())
+            except Exception as exc:
+                self._inc("shard_errors_total")
+                logger.warning("Shard %s failed: %s", shard.name, exc)
+                continue
+            answered += 1
+            raw = [float(hit.pop("score", 0.0) or 0.0) for hit in hits]
+            merged += [(score, raw_score, hit) for score, raw_score, hit in zip(normalize_scores(raw, self.score_norm), raw, hits)]
+        for future in pending:
+            future.cancel()
+            self._inc("shard_timeouts_total")
+            logger.warning("Shard %s timed out after %.0f ms; answering without it.", futures[future].name, 1000 * (time.perf_counter() - start))
+        if not answered:
+            raise NoShardAvailable(f"None of the shards {[shard.name for shard in shards]} answered within {1000 * self.timeout_s:.0f} ms.")
+        merged.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        merged = merged[: int(num_results)]
+        return build_result(columns, [[hit.get(col) for col in columns] for _, _, hit in merged], [score for score, _, _ in merged])
@@ -0,0 +1,59 @@
+"""
+Single-flight request coalescing: concurrent calls with the same key share one execution.
+
+The first caller for a key runs the function; callers that arrive while it is still running wait
+for it and get the same result (or the same exception) instead of repeating the work. Nothing is
+kept once the call returns, so a later request always runs again: coalescing never serves stale
+answers, it only removes duplicate work that overlaps in time.
+
+The served model keys answers by normalized query (and tenant), so a burst of identical questions
+costs one retrieval and one Azure OpenAI completion per replica:
+
+    flight = SingleFlight()
+    answer, shared = flight.do(("what is diabetes", None), lambda: model_answer("What is diabetes?"))
+"""
+
+import threading
+from typing import Any, Callable, Hashable, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        ``(result, shared)``: ``shared`` is True when the result came from another caller's execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -0,0 +1,32 @@
+"""
+Per-call daemon threads for fan-outs that are timed from submission (hedging, shards).
+
+A shared fixed pool queues calls behind each other under load, and the queueing time counts
+against the caller's hedge delay or timeout. ``spawn`` starts the call at once instead:
+
+    future = spawn(index.similarity_search, name="shard-retrieval", query_text=q, num_results=5)
+    done, pending = wait([future], timeout=1.0)
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+
+def spawn(fn: Callable, *args, name: str = "worker", **kwargs) -> Future:
+    """
+    Run ``fn(*args, **kwargs)`` on its own daemon thread. Cancelling the future before the thread
+    gets to it skips the call; a call already running is left to finish.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
@@ -0,0 +1,146 @@
+"""
+Vector Search endpoint assignment and index options, used by the notebook's index cell and by
+``rag_model.bench.vector_search``.
+
+- Endpoint type (``STANDARD`` or ``STORAGE_OPTIMIZED``) and index sync mode (``TRIGGERED`` or
+  ``CONTINUOUS``) are fixed when the endpoint / index is created; a mismatch with the requested
+  option is reported, never silently accepted.
+- ``ensure_endpoint`` uses the endpoint it is told to use, creating it if missing. When the
+  workspace is at its endpoint quota it fails with the existing endpoints and their index counts,
+  unless reuse is allowed, in which case it picks the least loaded endpoint of the requested type
+  (not "the first" one, which may be busy with another team's indexes).
+
+Deploy-time settings come from ``rag_config.json`` next to the notebook (written by
+``terraform/11_notebooks`` from the ``vector_search_*`` entries of ``scripts/deploy.py``):
+
+    endpoint = ensure_endpoint(client, "rag-vs-standard", endpoint_type="STANDARD")
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+ENDPOINT_TYPES = ("STANDARD", "STORAGE_OPTIMIZED")
+PIPELINE_TYPES = ("TRIGGERED", "CONTINUOUS")
+CONFIG_FILE = "rag_config.json"
+CONFIG_DEFAULTS = {
+    "vector_search_endpoint_name": "vector_search_endpoint",
+    "vector_search_endpoint_type": "STANDARD",
+    "vector_search_pipeline_type": "TRIGGERED",
+    "vector_search_allow_endpoint_reuse": False,
+}
+
+
+class EndpointUnavailable(RuntimeError):
+    """
+    Raised when the requested endpoint cannot be created and reuse is not allowed.
+    """
+
+
+def load_config(path: Optional[str] = None) -> dict:
+    """
+    ``CONFIG_DEFAULTS`` updated from ``rag_config.json`` (``path``, else the working directory).
+    """
+    config = dict(CONFIG_DEFAULTS)
+    config_path = Path(path or os.path.join(os.getcwd(), CONFIG_FILE))
+    if config_path.exists():
+        config.update({k: v for k, v in json.loads(config_path.read_text(encoding="utf-8")).items() if v is not None})
+    return config
+
+
+def check_option(value: str, allowed: tuple, what: str) -> str:
+    value = str(value).upper()
+    if value not in allowed:
+        raise ValueError(f"Unknown {what} {value!r}; expected one of {', '.join(allowed)}.")
+    return value
+
+
+def list_endpoints(client) -> list:
+    """
+    Endpoint dicts across client versions ({"endpoints": [...]}, {"vector_search_endpoints": [...]} or a list).
+    """
+    if not hasattr(client, "list_endpoints"):
+        return []
+    resp = client.list_endpoints()
+    if isinstance(resp, dict):
+        return resp.get("endpoints") or resp.get("vector_search_endpoints") or []
+    return resp or []
+
+
+def get_endpoint(client, name: str) -> Optional[dict]:
+    if hasattr(client, "get_endpoint"):
+        try:
+            info = client.get_endpoint(name)
+            # Some versions wrap: {"endpoint": {...}}
+            if isinstance(info, dict) and isinstance(info.get("endpoint"), dict):
+                return info["endpoint"]
+            return info
+        except Exception:
+            pass
+    for endpoint in list_endpoints(client):
+        if isinstance(endpoint, dict) and endpoint.get("name") == name:
+            return endpoint
+    return None
+
+
+def endpoint_type_of(info: dict) -> str:
+    return str(info.get("endpoint_type") or "STANDARD").upper()
+
+
+def num_indexes(info: dict) -> int:
+    return int(info.get("num_indexes") or 0)
+
+
+def _describe(endpoints: list) -> str:
+    return ", ".join(f"{e.get('name')} ({endpoint_type_of(e)}, {num_indexes(e)} indexes)" for e in endpoints if isinstance(e, dict)) or "none"
+
+
+def _quota_exceeded(exc: Exception) -> bool:
+    message = str(exc)
+    return "QUOTA_EXCEEDED" in message or "Maximum number of vector search endpoints" in message
+
+
+def ensure_endpoint(client, name: str, endpoint_type: str = "STANDARD", allow_reuse: bool = False, log: Callable = print) -> str:
+    """
+    Name of the endpoint to use: ``name`` (created as ``endpoint_type`` if missing) or, at the
+    endpoint quota with ``allow_reuse``, the endpoint of that type with the fewest indexes.
+    """
+    endpoint_type = check_option(endpoint_type, ENDPOINT_TYPES, "endpoint type")
+    info = get_endpoint(client, name)
+    if info is not None:
+        if endpoint_type_of(info) != endpoint_type:
+            log(f"Endpoint {name} is {endpoint_type_of(info)}, not {endpoint_type}; the type is fixed at "
+                "creation, so set another endpoint name to get a new one.")
+        return name
+    try:
+        client.create_endpoint(name=name, endpoint_type=endpoint_type)
+        log(f"Created {endpoint_type} endpoint {name}.")
+        return name
+    except Exception as exc:
+        if not _quota_exceeded(exc):
+            raise
+        endpoints = list_endpoints(client)
+        if not allow_reuse:
+            raise EndpointUnavailable(
+                f"Cannot create endpoint {name}: endpoint quota reached. Existing endpoints: {_describe(endpoints)}. "
+                "Set the endpoint name to one of them or allow endpoint reuse."
+            ) from exc
+        candidates = [e for e in endpoints if isinstance(e, dict) and endpoint_type_of(e) == endpoint_type]
+        if not candidates:
+            raise EndpointUnavailable(
+                f"Cannot create endpoint {name} (quota reached) and no {endpoint_type} endpoint exists to reuse: {_describe(endpoints)}."
+            ) from exc
+        chosen = min(candidates, key=num_indexes)
+        log(f"Endpoint quota reached; reusing {chosen['name']} ({num_indexes(chosen)} indexes), the least loaded {endpoint_type} endpoint.")
+        return chosen["name"]
+
+
+def index_pipeline_type(index) -> Optional[str]:
+    try:
+        info = index.describe()
+    except Exception:
+        return None
+    spec = info.get("delta_sync_index_spec") or {}
+    value = spec.get("pipeline_type") or info.get("pipeline_type")
+    return str(value).upper() if value else None
@@ -0,0 +1,166 @@
+"""
+Pinned wheelhouse for the cluster libraries, built once and installed from a UC volume.
+
+``build`` downloads wheels for the cluster's platform and Python version (``pip download
+--only-binary``, so nothing is compiled or resolved on the cluster) for the requirements and their
+whole dependency closure. It then writes ``requirements.lock`` next to them: every wheel pinned
+with its sha256, installed with ``--no-index --find-links <volume dir>``. The directory name is a
+fingerprint of the inputs, so an unchanged requirement set maps to the wheelhouse already uploaded.
+
+``scripts/deploy.py`` builds it, uploads it to ``/Volumes/<catalog>/<schema>/<volume>/wheelhouse/<fingerprint>/``
+and points the cluster's ``requirements`` library at the lock file (``wheelhouse_enabled``):
+
+    python -m rag_model.wheelhouse build openai==1.56.0 databricks-vectorsearch azure-identity databricks-sdk \
+        --python-version 3.12 --find-links /Volumes/main/rag/raw/wheelhouse --out .wheelhouse
+    python -m rag_model.wheelhouse show .wheelhouse/<fingerprint>/requirements.lock
+
+Standard library only: it runs from deploy.py on a laptop.
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+LOCK_NAME = "requirements.lock"
+MANIFEST_NAME = "manifest.json"
+# Databricks Runtime 15.4+ images are Ubuntu 22.04 (glibc 2.35) on x86_64.
+DEFAULT_PLATFORM = "manylinux_2_31_x86_64"
+DEFAULT_PYTHON_VERSION = "3.12"
+_WHEEL_RE = re.compile(r"^(?P<name>[^-]+)-(?P<version>[^-]+)(-\d[^-]*)?-[^-]+-[^-]+-[^-]+\.whl$")
+
+
+def normalize_name(name: str) -> str:
+    # PEP 503
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def fingerprint(requirements: Sequence[str], python_version: str, platform: str) -> str:
+    key = json.dumps({"requirements": sorted(requirements), "python": python_version, "platform": platform}, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def wheel_entries(wheel_dir) -> list:
+    """
+    (name, version, filename, sha256) for every wheel in ``wheel_dir``, sorted by name.
+    """
+    entries = []
+    for path in sorted(Path(wheel_dir).glob("*.whl")):
+        match = _WHEEL_RE.match(path.name)
+        if match is None:
+            raise ValueError(f"Not a wheel file name: {path.name}")
+        entries.append((normalize_name(match["name"]), match["version"], path.name, _sha256(path)))
+    return sorted(entries)
+
+
+def lock_text(entries: Sequence[tuple], find_links: Optional[str], header: Sequence[str] = ()) -> str:
+    lines = [f"# {line}" for line in header]
+    if find_links:
+        # Install from the wheelhouse only; a missing wheel fails instead of reaching PyPI.
+        lines += ["--no-index", f"--find-links {find_links}"]
+    lines += [f"{name}=={version} --hash=sha256:{sha256}" for name, version, _, sha256 in entries]
+    return "\n".join(lines) + "\n"
+
+
+def read_lock(path) -> dict:
+    """
+    {normalized name: version} from a lock file (options, hashes and comments ignored).
+    """
+    pins = {}
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        name, sep, version = line.split()[0].partition("==")
+        if sep:
+            pins[normalize_name(name)] = version
+    return pins
+
+
+def build(
+    requirements: Sequence[str],
+    out_dir,
+    python_version: str = DEFAULT_PYTHON_VERSION,
+    platform: str = DEFAULT_PLATFORM,
+    find_links: Optional[str] = None,
+    rebuild: bool = False,
+) -> Path:
+    """
+    Download the wheels for ``requirements`` into ``out_dir/<fingerprint>`` and write the lock file and
+    a manifest. ``find_links`` is the directory the wheels will live in on the cluster (the volume path
+    of this wheelhouse). An existing complete wheelhouse is reused unless ``rebuild``.
+    """
+    requirements = list(requirements)
+    key = fingerprint(requirements, python_version, platform)
+    target = Path(out_dir) / key
+    lock_path = target / LOCK_NAME
+    if lock_path.exists() and not rebuild:
+        print(f"Wheelhouse {key} already built: {target}")
+        return target
+    target.mkdir(parents=True, exist_ok=True)
+    subprocess.check_call([
+        sys.executable, "-m", "pip", "download",
+        "--only-binary=:all:",
+        "--platform", platform,
+        "--python-version", python_version,
+        "--implementation", "cp",
+        "--dest", str(target),
+        *requirements,
+    ])
+    entries = wheel_entries(target)
+    links = f"{find_links.rstrip('/')}/{key}" if find_links else None
+    header = [
+        "Generated by python -m rag_model.wheelhouse; do not edit.",
+        f"requirements: {' '.join(requirements)}",
+        f"python {python_version}, {platform}",
+    ]
+    lock_path.write_text(lock_text(entries, links, header), encoding="utf-8")
+    manifest = {
+        "fingerprint": key,
+        "requirements": requirements,
+        "python_version": python_version,
+        "platform": platform,
+        "find_links": links,
+        "wheels": [{"name": n, "version": v, "file": f, "sha256": h} for n, v, f, h in entries],
+    }
+    (target / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    print(f"Wheelhouse {key}: {len(entries)} wheels, {sum(p.stat().st_size for p in target.glob('*.whl')) / 2**20:.1f} MiB -> {target}")
+    return target
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a pinned wheelhouse + lock file for the Databricks cluster.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Download wheels and write requirements.lock")
+    build_parser.add_argument("requirements", nargs="+", help="Requirement specs, e.g. openai==1.56.0")
+    build_parser.add_argument("--out", default=".wheelhouse", help="Local directory holding <fingerprint>/ wheelhouses")
+    build_parser.add_argument("--python-version", default=DEFAULT_PYTHON_VERSION, help="Cluster runtime Python version")
+    build_parser.add_argument("--platform", default=DEFAULT_PLATFORM, help="pip platform tag of the cluster nodes")
+    build_parser.add_argument("--find-links", help="Parent directory of the wheelhouse on the cluster (e.g. a /Volumes path)")
+    build_parser.add_argument("--rebuild", action="store_true", help="Download again even if the wheelhouse exists")
+    show_parser = sub.add_parser("show", help="Print the pins of a lock file")
+    show_parser.add_argument("lock")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build(args.requirements, args.out, args.python_version, args.platform, args.find_links, args.rebuild)
+    else:
+        for name, version in sorted(read_lock(args.lock).items()):
+            print(f"{name}=={version}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
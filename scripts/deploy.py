@@ -5,6 +5,7 @@ import os
 import shutil
 import subprocess
 import sys
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -19,7 +20,14 @@ DEFAULTS = {
     "model_name": "gpt-5-chat",
     "model_version": "2025-10-03",
     "scale_type": "GlobalStandard",
-    "deployment_capacity": 1,
+    # GlobalStandard units of 1k TPM / 6 RPM. One rag-faq@1 answer is ~1.5k tokens (few-shot prefix
+    # included), so a single unit cannot serve even one answer per minute.
+    "deployment_capacity": 20,
+    # Extra Azure OpenAI deployments (existing accounts, any region) load-balanced by the model, keyed
+    # by pool member name (letters, digits, dashes), e.g.
+    # {"westeurope": {"account_name": "aoai-we", "resource_group_name": "rg-aoai-we", "capacity": 10}}
+    # model_name / model_version / scale_type / deployment_name default to the primary deployment.
+    "openai_pool_deployments": {},
     "openai_api_version": "2024-02-15-preview",
     "workspace_name_prefix": "adb-genai",
     "databricks_sku": "premium",
@@ -45,6 +53,32 @@ DEFAULTS = {
     "databricks_sdk_pypi_package": "databricks-sdk",
     "use_ml_runtime": True,
     "mlflow_enable_db_sdk": "true",
+    # Compute stack: single node by default. Set compute_autoscale_max_workers (with
+    # compute_is_single_node False) to autoscale; node_type_id None picks the smallest node type
+    # with at least compute_min_cores / compute_min_memory_gb (Photon-capable when runtime is PHOTON).
+    "compute_is_single_node": True,
+    "compute_runtime_engine": "PHOTON",
+    "compute_node_type_id": None,
+    "compute_driver_node_type_id": None,
+    "compute_min_cores": 0,
+    "compute_min_memory_gb": 0,
+    "compute_num_workers": 0,
+    "compute_autoscale_min_workers": 1,
+    "compute_autoscale_max_workers": None,
+    # Instance pool the driver and workers start from, keeping idle VMs ready.
+    "compute_instance_pool": False,
+    "compute_instance_pool_min_idle": 1,
+    "compute_instance_pool_max_capacity": None,
+    "compute_instance_pool_idle_minutes": 30,
+    "compute_profile": None,
+    # Build the cluster libraries (and their dependencies) into a pinned wheelhouse once, upload it
+    # to the UC volume and install from its lock file instead of PyPI. The volume is created by the
+    # notebook's first cell; None uses /Volumes/<uc_answer_volume_name>/wheelhouse, stored under
+    # wheelhouse/ in the storage container backing it.
+    "wheelhouse_enabled": False,
+    "wheelhouse_python_version": "3.12",
+    "wheelhouse_platform": "manylinux_2_31_x86_64",
+    "wheelhouse_volume_path": None,
     "databricks_pat_secret_name": "databricks-pat",
     "storage_account_name_prefix": "stgdbgenai",
     "storage_container_name": "rag-data",
@@ -64,18 +98,106 @@ DEFAULTS = {
     "serving_served_model_name": "rag-model",
     "serving_model_version": None,
     "serving_workload_size": "Small",
+    "serving_workload_type": "CPU",
+    # Set max (and optionally min) provisioned concurrency, in multiples of 4, to size the endpoint
+    # by concurrent requests instead of serving_workload_size. A min above 0 needs scale-to-zero off.
+    "serving_min_provisioned_concurrency": None,
+    "serving_max_provisioned_concurrency": None,
     "serving_scale_to_zero": True,
     "serving_traffic_percentage": 100,
+    # Scheduled serverless job sending health invocations (rag_model.keepwarm) on this Quartz
+    # schedule, so a scale-to-zero endpoint stays warm during business hours.
+    "serving_keep_warm": False,
+    "serving_keep_warm_cron": "0 0/10 8-17 ? * MON-FRI",
+    "serving_keep_warm_timezone": "UTC",
+    "serving_profile": None,
+    # --serving-only --rollout: blue/green traffic steps (percent to the new version), synthetic
+    # queries per warm-up / per step and side, and the p95 regression that triggers a rollback.
+    "serving_rollout_steps": [10, 25, 50, 100],
+    "serving_rollout_warmup_queries": 20,
+    "serving_rollout_probe_queries": 20,
+    "serving_rollout_max_p95_regression": 0.25,
+    "serving_rollout_min_p95_delta_ms": 200,
+    # Per-request timeout of the synthetic queries; a query that exceeds it counts as an error.
+    "serving_rollout_invoke_timeout_s": 60,
+    # Text file (one query per line) or CSV with a Topic column; None uses the seed FAQ topics.
+    "serving_rollout_queries_path": None,
+    "aoai_tokens_per_capacity_unit": 1000,
+    "aoai_requests_per_capacity_unit": 6,
+    "aoai_max_wait_seconds": 10,
+    # Precomputed answer snapshot; "" serves without one. After the notebook's "Precompute answers"
+    # cell has written it, set this to the path it prints (/Volumes/<catalog>/<schema>/raw/answer_table/
+    # latest.json) and re-run --serving-only. A path to a missing file only slows every cold start.
+    "serving_answer_table_path": "",
     "vector_search_endpoint_name": "vector_search_endpoint",
+    # Written to rag_config.json next to the notebook (index cell widget defaults). Endpoint type
+    # and sync mode apply when the endpoint / index is created; compare them with the notebook's
+    # "Benchmark Vector Search options" cell. Without reuse, a full endpoint quota is an error
+    # instead of falling back to the least loaded endpoint of the same type.
+    "vector_search_endpoint_type": "STANDARD",
+    "vector_search_pipeline_type": "TRIGGERED",
+    "vector_search_allow_endpoint_reuse": False,
     "vector_search_permission_level": "CAN_MANAGE",
     "vector_search_skip_if_missing": False,
     "uc_catalog_name": "adb_genai_super_locust",
     "uc_schema_name": "adb_genai_super_locust.rag",
     "uc_table_name": "adb_genai_super_locust.rag.diabetes_faq_table",
     "uc_index_table_name": None,
+    "uc_answer_volume_name": "adb_genai_super_locust.rag.raw",
     "uc_principal_name": None,
 }
 
+# Serving presets trading idle cost against tail latency; --serving-profile (or
+# DEFAULTS["serving_profile"]) applies one on top of DEFAULTS.
+SERVING_PROFILES = {
+    # Cheapest: scales to zero when idle, first request after idle waits for a cold start.
+    "dev": {
+        "serving_workload_size": "Small",
+        "serving_min_provisioned_concurrency": None,
+        "serving_max_provisioned_concurrency": None,
+        "serving_scale_to_zero": True,
+        "serving_keep_warm": False,
+    },
+    # Scales to zero overnight and at weekends; kept warm by pings during business hours.
+    "staging": {
+        "serving_min_provisioned_concurrency": 0,
+        "serving_max_provisioned_concurrency": 8,
+        "serving_scale_to_zero": True,
+        "serving_keep_warm": True,
+    },
+    # Never cold: 4 concurrent requests always provisioned, scaling out to 16.
+    "prod": {
+        "serving_min_provisioned_concurrency": 4,
+        "serving_max_provisioned_concurrency": 16,
+        "serving_scale_to_zero": False,
+        "serving_keep_warm": False,
+    },
+}
+
+# Compute presets; --compute-profile (or DEFAULTS["compute_profile"]) applies one on top of DEFAULTS.
+COMPUTE_PROFILES = {
+    # One VM, driver only: notebooks and small ingestion runs.
+    "single-node": {
+        "compute_is_single_node": True,
+        "compute_min_cores": 0,
+        "compute_min_memory_gb": 0,
+        "compute_autoscale_max_workers": None,
+        "compute_instance_pool": False,
+    },
+    # Ingestion, chunking and batch inference over the full corpus: 8-core / 32 GB Photon nodes,
+    # 1-8 workers, started from a pool with one idle instance.
+    "autoscale": {
+        "compute_is_single_node": False,
+        "compute_min_cores": 8,
+        "compute_min_memory_gb": 32,
+        "compute_autoscale_min_workers": 1,
+        "compute_autoscale_max_workers": 8,
+        "compute_instance_pool": True,
+        "compute_instance_pool_min_idle": 1,
+        "compute_instance_pool_max_capacity": 10,
+    },
+}
+
 ENV_KEYS = [
     "OPENAI_API_BASE",
     "OPENAI_API_KEY",
@@ -231,6 +353,12 @@ def hcl_value(value):
         return "true" if value else "false"
     if isinstance(value, (int, float)):
         return str(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(hcl_value(item) for item in value) + "]"
+    if isinstance(value, dict):
+        if not value:
+            return "{}"
+        return "{ " + ", ".join(f"{hcl_value(str(key))} = {hcl_value(item)}" for key, item in value.items()) + " }"
     escaped = str(value).replace('"', '\\"')
     return f'"{escaped}"'
 
@@ -241,6 +369,9 @@ def write_tfvars(path, items):
 def get_output(tf_dir, output_name):
     return run_capture(["terraform", f"-chdir={tf_dir}", "output", "-raw", output_name])
 
+def get_output_json(tf_dir, output_name):
+    return json.loads(run_capture(["terraform", f"-chdir={tf_dir}", "output", "-json", output_name]))
+
 def get_output_optional(tf_dir, output_name):
     try:
         return get_output(tf_dir, output_name)
@@ -280,9 +411,31 @@ def write_deployment_tfvars(deployment_dir, rg_name, account_name):
         ("model_version", DEFAULTS["model_version"]),
         ("scale_type", DEFAULTS["scale_type"]),
         ("deployment_capacity", DEFAULTS["deployment_capacity"]),
+        ("pool_deployments", openai_pool_deployments(rg_name)),
     ]
     write_tfvars(deployment_dir / "terraform.tfvars", items)
 
+def openai_pool_deployments(rg_name):
+    pool = {}
+    for key, entry in DEFAULTS["openai_pool_deployments"].items():
+        if not re.fullmatch(r"[0-9A-Za-z-]+", key):
+            raise ValueError(f"Pool deployment key '{key}' must use letters, digits and dashes (Key Vault secret name).")
+        if not entry.get("account_name"):
+            raise ValueError(f"Pool deployment '{key}' needs an account_name.")
+        pool[key] = {
+            "account_name": entry["account_name"],
+            "resource_group_name": entry.get("resource_group_name") or rg_name,
+            "deployment_name": entry.get("deployment_name") or DEFAULTS["deployment_name"],
+            "model_name": entry.get("model_name") or DEFAULTS["model_name"],
+            "model_version": entry.get("model_version") or DEFAULTS["model_version"],
+            "scale_type": entry.get("scale_type") or DEFAULTS["scale_type"],
+            "capacity": entry.get("capacity") or DEFAULTS["deployment_capacity"],
+        }
+    return pool
+
+def openai_pool_secret_name(key):
+    return f"openai-pool-{key}"
+
 def write_key_vault_tfvars(kv_dir, rg_name):
     items = [
         ("resource_group_name", rg_name),
@@ -343,7 +496,7 @@ def write_unity_catalog_tfvars(unity_dir, rg_name, workspace_id, existing_metast
     ]
     write_tfvars(unity_dir / "terraform.tfvars", items)
 
-def write_databricks_compute_tfvars(compute_dir, rg_name):
+def write_databricks_compute_tfvars(compute_dir, rg_name, cluster_requirements_path=None):
     items = [
         ("resource_group_name", rg_name),
         ("secret_scope_name", DEFAULTS["secret_scope_name"]),
@@ -355,6 +508,20 @@ def write_databricks_compute_tfvars(compute_dir, rg_name):
         ("use_ml_runtime", DEFAULTS["use_ml_runtime"]),
         ("mlflow_enable_db_sdk", DEFAULTS["mlflow_enable_db_sdk"]),
         ("databricks_pat_secret_name", DEFAULTS["databricks_pat_secret_name"]),
+        ("is_single_node", DEFAULTS["compute_is_single_node"]),
+        ("runtime_engine", DEFAULTS["compute_runtime_engine"]),
+        ("node_type_id", DEFAULTS["compute_node_type_id"]),
+        ("driver_node_type_id", DEFAULTS["compute_driver_node_type_id"]),
+        ("node_type_min_cores", DEFAULTS["compute_min_cores"]),
+        ("node_type_min_memory_gb", DEFAULTS["compute_min_memory_gb"]),
+        ("num_workers", DEFAULTS["compute_num_workers"]),
+        ("autoscale_min_workers", DEFAULTS["compute_autoscale_min_workers"]),
+        ("autoscale_max_workers", DEFAULTS["compute_autoscale_max_workers"]),
+        ("instance_pool_enabled", DEFAULTS["compute_instance_pool"]),
+        ("instance_pool_min_idle_instances", DEFAULTS["compute_instance_pool_min_idle"]),
+        ("instance_pool_max_capacity", DEFAULTS["compute_instance_pool_max_capacity"]),
+        ("instance_pool_idle_autotermination_minutes", DEFAULTS["compute_instance_pool_idle_minutes"]),
+        ("cluster_requirements_path", cluster_requirements_path),
     ]
     write_tfvars(compute_dir / "terraform.tfvars", items)
 
@@ -376,6 +543,17 @@ def write_databricks_sp_tfvars(sp_dir, rg_name, application_id, display_name):
 def write_notebooks_tfvars(notebooks_dir, rg_name):
     items = [
         ("resource_group_name", rg_name),
+        (
+            "notebook_config",
+            {
+                "vector_search_endpoint_name": DEFAULTS["vector_search_endpoint_name"],
+                "vector_search_endpoint_type": DEFAULTS["vector_search_endpoint_type"],
+                "vector_search_pipeline_type": DEFAULTS["vector_search_pipeline_type"],
+                "vector_search_allow_endpoint_reuse": DEFAULTS["vector_search_allow_endpoint_reuse"],
+                "serving_workload_size": DEFAULTS["serving_workload_size"],
+                "deployment_capacity": DEFAULTS["deployment_capacity"],
+            },
+        ),
     ]
     write_tfvars(notebooks_dir / "terraform.tfvars", items)
 
@@ -396,18 +574,29 @@ def write_uc_grants_tfvars(uc_grants_dir, rg_name):
         ("schema_name", DEFAULTS["uc_schema_name"]),
         ("table_name", DEFAULTS["uc_table_name"]),
         ("index_table_name", DEFAULTS["uc_index_table_name"]),
+        ("answer_volume_name", DEFAULTS["uc_answer_volume_name"]),
         ("service_principal_application_id", None),
         ("principal_name", DEFAULTS["uc_principal_name"]),
     ]
     write_tfvars(uc_grants_dir / "terraform.tfvars", items)
 
-def write_serving_tfvars(serving_dir, rg_name, databricks_dir):
-    if AZ_BIN is None:
-        raise FileNotFoundError("Azure CLI not found. Install Azure CLI or ensure az is on PATH.")
-    run(["terraform", f"-chdir={databricks_dir}", "init"])
-    workspace_url = get_output(databricks_dir, "databricks_workspace_url")
-    token = get_databricks_aad_token()
-    azure_headers = get_azure_workspace_headers(databricks_dir)
+def apply_compute_profile(name):
+    if not name:
+        return
+    if name not in COMPUTE_PROFILES:
+        raise ValueError(f"Unknown compute profile '{name}'. Choose from: {', '.join(COMPUTE_PROFILES)}.")
+    DEFAULTS.update(COMPUTE_PROFILES[name])
+    print(f"\nCompute profile '{name}': {COMPUTE_PROFILES[name]}")
+
+def apply_serving_profile(name):
+    if not name:
+        return
+    if name not in SERVING_PROFILES:
+        raise ValueError(f"Unknown serving profile '{name}'. Choose from: {', '.join(SERVING_PROFILES)}.")
+    DEFAULTS.update(SERVING_PROFILES[name])
+    print(f"\nServing profile '{name}': {SERVING_PROFILES[name]}")
+
+def resolve_serving_model(workspace_url, token, azure_headers):
     model_name = DEFAULTS["serving_model_name"]
     if model_name is None:
         model_name = find_registered_model_name(
@@ -434,10 +623,33 @@ def write_serving_tfvars(serving_dir, rg_name, databricks_dir):
                 f"Could not find any model versions for '{model_name}'. "
                 "Register the model in MLflow before deploying the serving endpoint."
             )
+    return model_name, model_version
+
+def current_served_model_name(serving_dir):
+    # A blue/green rollout leaves "<served_model_name>-<version>" serving; keep that name so a
+    # plain apply updates the entity instead of renaming it.
+    name = get_tfvars_value(serving_dir / "terraform.tfvars", "served_model_name")
+    base = DEFAULTS["serving_served_model_name"]
+    return name if name and name.startswith(f"{base}-") else base
+
+def write_serving_tfvars(serving_dir, rg_name, databricks_dir, served_model_name=None):
+    if AZ_BIN is None:
+        raise FileNotFoundError("Azure CLI not found. Install Azure CLI or ensure az is on PATH.")
+    run(["terraform", f"-chdir={databricks_dir}", "init"])
+    workspace_url = get_output(databricks_dir, "databricks_workspace_url")
+    token = get_databricks_aad_token()
+    azure_headers = get_azure_workspace_headers(databricks_dir)
+    model_name, model_version = resolve_serving_model(workspace_url, token, azure_headers)
+    # The keep-warm job runs rag_model/keepwarm.py as uploaded by the notebooks stack.
+    workspace_base_path = get_tfvars_value(
+        serving_dir.parent / "11_notebooks" / "terraform.tfvars",
+        "workspace_base_path",
+        "/Shared/generative-ai",
+    )
     items = [
         ("resource_group_name", rg_name),
         ("endpoint_name", DEFAULTS["serving_endpoint_name"]),
-        ("served_model_name", DEFAULTS["serving_served_model_name"]),
+        ("served_model_name", served_model_name or current_served_model_name(serving_dir)),
         ("model_name", model_name),
         ("model_version", model_version),
         ("secret_scope_name", DEFAULTS["secret_scope_name"]),
@@ -446,11 +658,73 @@ def write_serving_tfvars(serving_dir, rg_name, databricks_dir):
         ("databricks_client_secret_name", DEFAULTS["databricks_client_secret_secret_name"]),
         ("databricks_tenant_id_secret_name", DEFAULTS["databricks_tenant_id_secret_name"]),
         ("workload_size", DEFAULTS["serving_workload_size"]),
+        ("workload_type", DEFAULTS["serving_workload_type"]),
+        ("min_provisioned_concurrency", DEFAULTS["serving_min_provisioned_concurrency"]),
+        ("max_provisioned_concurrency", DEFAULTS["serving_max_provisioned_concurrency"]),
         ("scale_to_zero_enabled", DEFAULTS["serving_scale_to_zero"]),
         ("traffic_percentage", DEFAULTS["serving_traffic_percentage"]),
+        ("aoai_deployment_capacity", DEFAULTS["deployment_capacity"]),
+        ("aoai_tokens_per_capacity_unit", DEFAULTS["aoai_tokens_per_capacity_unit"]),
+        ("aoai_requests_per_capacity_unit", DEFAULTS["aoai_requests_per_capacity_unit"]),
+        ("aoai_max_wait_seconds", DEFAULTS["aoai_max_wait_seconds"]),
+        ("aoai_pool_secret_names", [openai_pool_secret_name(key) for key in DEFAULTS["openai_pool_deployments"]]),
+        ("answer_table_path", DEFAULTS["serving_answer_table_path"]),
+        ("keep_warm_enabled", DEFAULTS["serving_keep_warm"]),
+        ("keep_warm_cron", DEFAULTS["serving_keep_warm_cron"]),
+        ("keep_warm_timezone", DEFAULTS["serving_keep_warm_timezone"]),
+        ("keep_warm_script_path", f"{workspace_base_path}/rag_model/keepwarm.py"),
     ]
     write_tfvars(serving_dir / "terraform.tfvars", items)
 
+def rollout_serving(databricks_dir, repo_root):
+    """
+    Blue/green rollout of the latest model version on the live endpoint (rag_model.rollout).
+    Returns the served entity name now taking all traffic, or None when the endpoint does not
+    exist yet (the caller creates it with a plain apply).
+    """
+    if AZ_BIN is None:
+        raise FileNotFoundError("Azure CLI not found. Install Azure CLI or ensure az is on PATH.")
+    sys.path.insert(0, str(repo_root))
+    from rag_model.bench.loadgen import load_queries
+    from rag_model.rollout import BlueGreenRollout, format_rollout
+
+    run(["terraform", f"-chdir={databricks_dir}", "init"])
+    workspace_url = get_output(databricks_dir, "databricks_workspace_url")
+    azure_headers = get_azure_workspace_headers(databricks_dir)
+    auth = {"token": get_databricks_aad_token(), "at": time.monotonic()}
+
+    def api(method, path, payload=None, timeout=None):
+        # A rollout can outlast the AAD token; fetch a new one every 30 minutes.
+        if time.monotonic() - auth["at"] > 1800:
+            auth.update(token=get_databricks_aad_token(), at=time.monotonic())
+        return databricks_api(workspace_url, auth["token"], method, path, payload, extra_headers=azure_headers, timeout=timeout)
+
+    endpoint_name = DEFAULTS["serving_endpoint_name"]
+    try:
+        api("GET", f"/api/2.0/serving-endpoints/{endpoint_name}")
+    except RuntimeError as exc:
+        if "RESOURCE_DOES_NOT_EXIST" in str(exc) or "404" in str(exc):
+            print(f"\nServing endpoint {endpoint_name} does not exist yet; creating it without a rollout.")
+            return None
+        raise
+    model_name, model_version = resolve_serving_model(workspace_url, auth["token"], azure_headers)
+    rollout = BlueGreenRollout(
+        api,
+        endpoint_name,
+        load_queries(DEFAULTS["serving_rollout_queries_path"]),
+        steps=DEFAULTS["serving_rollout_steps"],
+        warmup_queries=DEFAULTS["serving_rollout_warmup_queries"],
+        probe_queries=DEFAULTS["serving_rollout_probe_queries"],
+        max_p95_regression=DEFAULTS["serving_rollout_max_p95_regression"],
+        min_p95_delta_ms=DEFAULTS["serving_rollout_min_p95_delta_ms"],
+        invoke_timeout_s=DEFAULTS["serving_rollout_invoke_timeout_s"],
+    )
+    result = rollout.run(f"{DEFAULTS['serving_served_model_name']}-{model_version}", model_name, model_version)
+    print(f"\n{format_rollout(result)}")
+    if result.status == "rolled_back":
+        raise RuntimeError(f"Rollout of {model_name} v{model_version} rolled back: {result.reason}")
+    return result.green
+
 def upload_seed_data(storage_dir, repo_root):
     if AZ_BIN is None:
         raise FileNotFoundError("Azure CLI not found. Install Azure CLI or ensure az is on PATH.")
@@ -481,6 +755,110 @@ def upload_seed_data(storage_dir, repo_root):
         ]
     )
 
+def cluster_pypi_packages():
+    return [
+        DEFAULTS["openai_pypi_package"],
+        DEFAULTS["vectorsearch_pypi_package"],
+        DEFAULTS["azure_identity_pypi_package"],
+        DEFAULTS["databricks_sdk_pypi_package"],
+    ]
+
+def wheelhouse_volume_path():
+    if DEFAULTS["wheelhouse_volume_path"]:
+        return DEFAULTS["wheelhouse_volume_path"].rstrip("/")
+    return "/Volumes/" + DEFAULTS["uc_answer_volume_name"].replace(".", "/") + "/wheelhouse"
+
+def build_and_upload_wheelhouse(storage_dir, repo_root):
+    """
+    Build the pinned cluster wheelhouse (rag_model.wheelhouse) and upload it to the storage
+    container under the UC volume, unless that fingerprint is already there. Returns the lock
+    file's /Volumes path.
+    """
+    if AZ_BIN is None:
+        raise FileNotFoundError("Azure CLI not found. Install Azure CLI or ensure az is on PATH.")
+    sys.path.insert(0, str(repo_root))
+    from rag_model.wheelhouse import LOCK_NAME, build
+
+    volume_dir = wheelhouse_volume_path()
+    local_dir = build(
+        cluster_pypi_packages(),
+        repo_root / ".wheelhouse",
+        python_version=DEFAULTS["wheelhouse_python_version"],
+        platform=DEFAULTS["wheelhouse_platform"],
+        find_links=volume_dir,
+    )
+    storage_account = get_output(storage_dir, "storage_account_name")
+    container_name = get_output(storage_dir, "storage_container_name")
+    blob_prefix = f"{volume_dir.rsplit('/', 1)[-1]}/{local_dir.name}"
+    exists = run_capture(
+        [
+            AZ_BIN,
+            "storage",
+            "blob",
+            "exists",
+            "--account-name",
+            storage_account,
+            "--container-name",
+            container_name,
+            "--name",
+            f"{blob_prefix}/{LOCK_NAME}",
+            "--auth-mode",
+            "login",
+            "--query",
+            "exists",
+            "-o",
+            "tsv",
+        ]
+    )
+    if exists.lower() == "true":
+        print(f"\nWheelhouse {local_dir.name} already uploaded.")
+    else:
+        # Wheels first, lock file last: a lock file in the volume means a complete wheelhouse.
+        run(
+            [
+                AZ_BIN,
+                "storage",
+                "blob",
+                "upload-batch",
+                "--account-name",
+                storage_account,
+                "--destination",
+                container_name,
+                "--destination-path",
+                blob_prefix,
+                "--source",
+                str(local_dir),
+                "--pattern",
+                "*.whl",
+                "--auth-mode",
+                "login",
+                "--overwrite",
+                "true",
+            ]
+        )
+        for name in ("manifest.json", LOCK_NAME):
+            run(
+                [
+                    AZ_BIN,
+                    "storage",
+                    "blob",
+                    "upload",
+                    "--account-name",
+                    storage_account,
+                    "--container-name",
+                    container_name,
+                    "--file",
+                    str(local_dir / name),
+                    "--name",
+                    f"{blob_prefix}/{name}",
+                    "--auth-mode",
+                    "login",
+                    "--overwrite",
+                    "true",
+                ]
+            )
+    return f"{volume_dir}/{local_dir.name}/{LOCK_NAME}"
+
 def normalize_workspace_url(url):
     if not url:
         return url
@@ -722,6 +1100,25 @@ def sync_key_vault_secrets(
     set_key_vault_secret(vault_name, KEY_VAULT_SECRET_NAMES["DATABRICKS_CLIENT_SECRET"], databricks_client_secret)
     set_key_vault_secret(vault_name, KEY_VAULT_SECRET_NAMES["DATABRICKS_TENANT_ID"], databricks_tenant_id)
 
+def sync_openai_pool_secrets(vault_name, deployment_dir):
+    if not DEFAULTS["openai_pool_deployments"]:
+        return
+    try:
+        pool = get_output_json(deployment_dir, "pool_deployments")
+    except subprocess.CalledProcessError:
+        print("\nAzure OpenAI pool deployments not applied yet; skipping pool secret sync.")
+        return
+    for key, deployment in pool.items():
+        value = {
+            "name": key,
+            "endpoint": deployment["endpoint"],
+            "api_key": deployment["api_key"],
+            "api_version": DEFAULTS["openai_api_version"],
+            "deployment": deployment["deployment_name"],
+            "capacity": deployment["capacity"],
+        }
+        set_key_vault_secret(vault_name, openai_pool_secret_name(key), json.dumps(value))
+
 def get_databricks_aad_token():
     if AZ_BIN is None:
         raise FileNotFoundError("Azure CLI not found. Install Azure CLI or ensure az is on PATH.")
@@ -856,7 +1253,7 @@ def normalize_databricks_host(host):
         return host
     return host if host.startswith("https://") else f"https://{host}"
 
-def databricks_api(host, token, method, path, payload=None, extra_headers=None):
+def databricks_api(host, token, method, path, payload=None, extra_headers=None, timeout=None):
     url = f"{normalize_databricks_host(host).rstrip('/')}{path}"
     data = None
     if payload is not None:
@@ -869,7 +1266,7 @@ def databricks_api(host, token, method, path, payload=None, extra_headers=None):
             if value:
                 req.add_header(key, value)
     try:
-        with urllib.request.urlopen(req) as resp:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
             return json.loads(resp.read().decode("utf-8"))
     except urllib.error.HTTPError as exc:
         detail = exc.read().decode("utf-8")
@@ -1102,7 +1499,35 @@ if __name__ == "__main__":
         group.add_argument("--compute-only", action="store_true", help="Deploy only the Databricks compute stack")
         group.add_argument("--notebooks-only", action="store_true", help="Deploy only the notebooks stack")
         group.add_argument("--serving-only", action="store_true", help="Deploy only the serving endpoint stack")
+        parser.add_argument(
+            "--compute-profile",
+            choices=sorted(COMPUTE_PROFILES),
+            default=DEFAULTS["compute_profile"],
+            help="Cluster preset: single-node, or autoscale (multi-node Photon workers from an instance pool)",
+        )
+        parser.add_argument(
+            "--wheelhouse",
+            action="store_true",
+            default=DEFAULTS["wheelhouse_enabled"],
+            help="With the compute stack: install cluster libraries from a pinned wheelhouse uploaded to the UC volume",
+        )
+        parser.add_argument(
+            "--serving-profile",
+            choices=sorted(SERVING_PROFILES),
+            default=DEFAULTS["serving_profile"],
+            help="Serving capacity preset: dev (scale to zero), staging (keep-warm in business hours), prod (provisioned concurrency)",
+        )
+        parser.add_argument(
+            "--rollout",
+            action="store_true",
+            help="With --serving-only: add the new model version next to the current one, warm it and shift traffic in steps, rolling back on p95 regression",
+        )
         args = parser.parse_args()
+        if args.rollout and not args.serving_only:
+            parser.error("--rollout requires --serving-only")
+        apply_compute_profile(args.compute_profile)
+        DEFAULTS["wheelhouse_enabled"] = args.wheelhouse
+        apply_serving_profile(args.serving_profile)
 
         repo_root = Path(__file__).resolve().parent.parent
         load_env_file_into_env(repo_root)
@@ -1202,6 +1627,7 @@ if __name__ == "__main__":
                 databricks_client_secret=databricks_client_secret,
                 databricks_tenant_id=databricks_tenant_id,
             )
+            sync_openai_pool_secrets(vault_name, deployment_dir)
             sys.exit(0)
 
         if args.storage_only:
@@ -1315,7 +1741,11 @@ if __name__ == "__main__":
         if args.compute_only:
             run(["terraform", f"-chdir={rg_dir}", "init"])
             rg_name = get_output(rg_dir, "resource_group_name")
-            write_databricks_compute_tfvars(compute_dir, rg_name)
+            cluster_requirements_path = None
+            if DEFAULTS["wheelhouse_enabled"]:
+                run(["terraform", f"-chdir={storage_dir}", "init"])
+                cluster_requirements_path = build_and_upload_wheelhouse(storage_dir, repo_root)
+            write_databricks_compute_tfvars(compute_dir, rg_name, cluster_requirements_path)
             run(["terraform", f"-chdir={compute_dir}", "init"])
             run(["terraform", f"-chdir={compute_dir}", "apply", "-auto-approve"])
             sys.exit(0)
@@ -1331,7 +1761,9 @@ if __name__ == "__main__":
         if args.serving_only:
             run(["terraform", f"-chdir={rg_dir}", "init"])
             rg_name = get_output(rg_dir, "resource_group_name")
-            write_serving_tfvars(serving_dir, rg_name, databricks_dir)
+            served_model_name = rollout_serving(databricks_dir, repo_root) if args.rollout else None
+            # After a rollout the endpoint already matches; the apply only syncs Terraform state.
+            write_serving_tfvars(serving_dir, rg_name, databricks_dir, served_model_name=served_model_name)
             run(["terraform", f"-chdir={serving_dir}", "init"])
             run(["terraform", f"-chdir={serving_dir}", "apply", "-auto-approve"])
             sys.exit(0)
@@ -1388,6 +1820,7 @@ if __name__ == "__main__":
             databricks_client_secret=databricks_client_secret,
             databricks_tenant_id=databricks_tenant_id,
         )
+        sync_openai_pool_secrets(vault_name, deployment_dir)
 
         write_storage_tfvars(storage_dir, rg_name)
         run(["terraform", f"-chdir={storage_dir}", "init"])
@@ -1411,7 +1844,10 @@ if __name__ == "__main__":
         run(["terraform", f"-chdir={unity_dir}", "init"])
         run(["terraform", f"-chdir={unity_dir}", "apply", "-auto-approve"])
 
-        write_databricks_compute_tfvars(compute_dir, rg_name)
+        cluster_requirements_path = None
+        if DEFAULTS["wheelhouse_enabled"]:
+            cluster_requirements_path = build_and_upload_wheelhouse(storage_dir, repo_root)
+        write_databricks_compute_tfvars(compute_dir, rg_name, cluster_requirements_path)
         run(["terraform", f"-chdir={compute_dir}", "init"])
         run(["terraform", f"-chdir={compute_dir}", "apply", "-auto-approve"])
 
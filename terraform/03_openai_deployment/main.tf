@@ -33,3 +33,26 @@ resource "azurerm_cognitive_deployment" "main" {
     capacity = var.deployment_capacity
   }
 }
+
+data "azurerm_cognitive_account" "pool" {
+  for_each            = var.pool_deployments
+  name                = each.value.account_name
+  resource_group_name = each.value.resource_group_name
+}
+
+resource "azurerm_cognitive_deployment" "pool" {
+  for_each             = var.pool_deployments
+  name                 = each.value.deployment_name
+  cognitive_account_id = data.azurerm_cognitive_account.pool[each.key].id
+
+  model {
+    format  = "OpenAI"
+    name    = each.value.model_name
+    version = each.value.model_version
+  }
+
+  scale {
+    type     = each.value.scale_type
+    capacity = each.value.capacity
+  }
+}
@@ -9,3 +9,15 @@ output "model_name" {
 output "model_version" {
   value = azurerm_cognitive_deployment.main.model[0].version
 }
+
+output "pool_deployments" {
+  value = {
+    for key, deployment in azurerm_cognitive_deployment.pool : key => {
+      deployment_name = deployment.name
+      endpoint        = data.azurerm_cognitive_account.pool[key].endpoint
+      api_key         = data.azurerm_cognitive_account.pool[key].primary_access_key
+      capacity        = var.pool_deployments[key].capacity
+    }
+  }
+  sensitive = true
+}
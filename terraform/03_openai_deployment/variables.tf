@@ -33,5 +33,19 @@ variable "scale_type" {
 variable "deployment_capacity" {
   type        = number
   description = "Deployment capacity units"
-  default     = 1
+  default     = 20
+}
+
+variable "pool_deployments" {
+  type = map(object({
+    account_name        = string
+    resource_group_name = string
+    deployment_name     = string
+    model_name          = string
+    model_version       = string
+    scale_type          = string
+    capacity            = number
+  }))
+  description = "Extra deployments on existing Azure OpenAI accounts (other regions/accounts) for the model's load-balancing pool, keyed by pool member name"
+  default     = {}
 }
@@ -47,13 +47,50 @@ data "databricks_spark_version" "selected" {
   ml                = false
 }
 
+# Smallest node type meeting the core / memory floors (and Photon, when the cluster runs it).
 data "databricks_node_type" "smallest" {
-  local_disk = true
+  local_disk            = var.node_type_local_disk
+  min_cores             = var.node_type_min_cores
+  min_memory_gb         = var.node_type_min_memory_gb
+  photon_worker_capable = var.runtime_engine == "PHOTON"
+  photon_driver_capable = var.runtime_engine == "PHOTON"
 }
 
 locals {
   resolved_spark_version = var.spark_version != null ? var.spark_version : data.databricks_spark_version.selected.id
   resolved_node_type_id  = var.node_type_id != null ? var.node_type_id : data.databricks_node_type.smallest.id
+  autoscale_enabled      = !var.is_single_node && var.autoscale_max_workers != null
+  instance_pool_id       = var.instance_pool_enabled ? databricks_instance_pool.analytics[0].id : null
+
+  pypi_packages = [
+    var.openai_pypi_package,
+    var.vectorsearch_pypi_package,
+    var.azure_identity_pypi_package,
+    var.databricks_sdk_pypi_package,
+  ]
+
+  single_node_spark_conf = {
+    "spark.databricks.cluster.profile" = "singleNode"
+    "spark.master"                     = "local[*]"
+  }
+}
+
+# Idle VMs kept ready (with the runtime preloaded), so the cluster starts and scales out in
+# seconds instead of waiting for Azure to provision each node.
+resource "databricks_instance_pool" "analytics" {
+  count = var.instance_pool_enabled ? 1 : 0
+
+  instance_pool_name                    = var.instance_pool_name
+  node_type_id                          = local.resolved_node_type_id
+  min_idle_instances                    = var.instance_pool_min_idle_instances
+  max_capacity                          = var.instance_pool_max_capacity
+  idle_instance_autotermination_minutes = var.instance_pool_idle_autotermination_minutes
+  preloaded_spark_versions              = [local.resolved_spark_version]
+
+  azure_attributes {
+    availability       = var.instance_pool_availability
+    spot_bid_max_price = var.instance_pool_availability == "SPOT_AZURE" ? -1 : null
+  }
 }
 
 resource "databricks_secret_scope" "openai" {
@@ -79,7 +116,11 @@ resource "databricks_secret_scope" "databricks_sp" {
 resource "databricks_cluster" "analytics" {
   cluster_name            = var.cluster_name
   spark_version           = local.resolved_spark_version
-  node_type_id            = local.resolved_node_type_id
+  # Pool clusters take their node type from the pool.
+  node_type_id            = var.instance_pool_enabled ? null : local.resolved_node_type_id
+  driver_node_type_id     = var.instance_pool_enabled ? null : var.driver_node_type_id
+  instance_pool_id        = local.instance_pool_id
+  driver_instance_pool_id = local.instance_pool_id
   autotermination_minutes = var.autotermination_minutes
   data_security_mode      = var.data_security_mode
   single_user_name        = var.single_user_name
@@ -88,41 +129,51 @@ resource "databricks_cluster" "analytics" {
   is_single_node          = var.is_single_node
   use_ml_runtime          = var.use_ml_runtime
 
-  num_workers = 0
+  num_workers = var.is_single_node ? 0 : (local.autoscale_enabled ? null : var.num_workers)
 
-  spark_conf = {
-    "spark.databricks.cluster.profile" = "singleNode"
-    "spark.master"                     = "local[*]"
+  dynamic "autoscale" {
+    for_each = local.autoscale_enabled ? [1] : []
+    content {
+      min_workers = var.autoscale_min_workers
+      max_workers = var.autoscale_max_workers
+    }
+  }
+
+  spark_conf = merge(var.is_single_node ? local.single_node_spark_conf : {}, {
     "spark.databricks.driverEnv.MLFLOW_ENABLE_DB_SDK" = var.mlflow_enable_db_sdk
     "spark.executorEnv.MLFLOW_ENABLE_DB_SDK"          = var.mlflow_enable_db_sdk
-  }
+  })
 
   spark_env_vars = {
     "MLFLOW_ENABLE_DB_SDK" = var.mlflow_enable_db_sdk
     "DATABRICKS_TOKEN"     = "{{secrets/${var.secret_scope_name}/${var.databricks_pat_secret_name}}}"
   }
 
-  library {
-    pypi {
-      package = var.openai_pypi_package
+  # Pinned wheelhouse lock file on a UC volume (rag_model.wheelhouse) when set, PyPI otherwise.
+  dynamic "library" {
+    for_each = var.cluster_requirements_path != null ? [var.cluster_requirements_path] : []
+    content {
+      requirements = library.value
     }
   }
 
-  library {
-    pypi {
-      package = var.vectorsearch_pypi_package
+  dynamic "library" {
+    for_each = var.cluster_requirements_path == null ? local.pypi_packages : []
+    content {
+      pypi {
+        package = library.value
+      }
     }
   }
 
-  library {
-    pypi {
-      package = var.azure_identity_pypi_package
+  lifecycle {
+    precondition {
+      condition     = !(var.is_single_node && (var.autoscale_max_workers != null || var.num_workers > 0))
+      error_message = "Set is_single_node = false to use num_workers or autoscale_max_workers."
     }
-  }
-
-  library {
-    pypi {
-      package = var.databricks_sdk_pypi_package
+    precondition {
+      condition     = !local.autoscale_enabled || var.autoscale_max_workers >= var.autoscale_min_workers
+      error_message = "autoscale_max_workers must be >= autoscale_min_workers."
     }
   }
 
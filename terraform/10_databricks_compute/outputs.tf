@@ -6,6 +6,10 @@ output "cluster_name" {
   value = databricks_cluster.analytics.cluster_name
 }
 
+output "instance_pool_id" {
+  value = local.instance_pool_id
+}
+
 output "secret_scope_name" {
   value = databricks_secret_scope.openai.name
 }
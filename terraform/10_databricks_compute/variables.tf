@@ -53,10 +53,103 @@ variable "spark_version" {
 
 variable "node_type_id" {
   type        = string
-  description = "Worker node type ID"
+  description = "Worker node type ID (null picks the smallest type meeting node_type_min_cores / node_type_min_memory_gb)"
   default     = null
 }
 
+variable "driver_node_type_id" {
+  type        = string
+  description = "Driver node type ID (null uses the worker node type; ignored with an instance pool)"
+  default     = null
+}
+
+variable "node_type_min_cores" {
+  type        = number
+  description = "Minimum cores per node when node_type_id is null"
+  default     = 0
+}
+
+variable "node_type_min_memory_gb" {
+  type        = number
+  description = "Minimum memory (GB) per node when node_type_id is null"
+  default     = 0
+}
+
+variable "node_type_local_disk" {
+  type        = bool
+  description = "Only consider node types with a local disk when node_type_id is null"
+  default     = true
+}
+
+variable "num_workers" {
+  type        = number
+  description = "Fixed number of workers for a multi-node cluster without autoscaling"
+  default     = 0
+}
+
+variable "autoscale_min_workers" {
+  type        = number
+  description = "Minimum workers when autoscaling"
+  default     = 1
+
+  validation {
+    condition     = var.autoscale_min_workers >= 0
+    error_message = "autoscale_min_workers must be >= 0."
+  }
+}
+
+variable "autoscale_max_workers" {
+  type        = number
+  description = "Maximum workers; set (with is_single_node = false) to autoscale between autoscale_min_workers and this"
+  default     = null
+
+  validation {
+    condition     = var.autoscale_max_workers == null || try(var.autoscale_max_workers >= 1, false)
+    error_message = "autoscale_max_workers must be >= 1."
+  }
+}
+
+variable "instance_pool_enabled" {
+  type        = bool
+  description = "Create an instance pool and run the driver and workers from it"
+  default     = false
+}
+
+variable "instance_pool_name" {
+  type        = string
+  description = "Name of the instance pool"
+  default     = "GenAI Pool"
+}
+
+variable "instance_pool_min_idle_instances" {
+  type        = number
+  description = "Idle instances the pool keeps running (billed as VMs, no DBUs while idle)"
+  default     = 1
+}
+
+variable "instance_pool_max_capacity" {
+  type        = number
+  description = "Maximum instances in the pool (idle + in use); null for no limit"
+  default     = null
+}
+
+variable "instance_pool_idle_autotermination_minutes" {
+  type        = number
+  description = "Minutes before idle instances above min_idle_instances are released"
+  default     = 30
+}
+
+variable "instance_pool_availability" {
+  type        = string
+  description = "ON_DEMAND_AZURE or SPOT_AZURE"
+  default     = "ON_DEMAND_AZURE"
+
+  validation {
+    condition     = contains(["ON_DEMAND_AZURE", "SPOT_AZURE"], var.instance_pool_availability)
+    error_message = "instance_pool_availability must be ON_DEMAND_AZURE or SPOT_AZURE."
+  }
+}
+
 variable "autotermination_minutes" {
   type        = number
   description = "Minutes of inactivity before auto-termination"
@@ -110,3 +203,9 @@ variable "databricks_sdk_pypi_package" {
   description = "PyPI package spec for Databricks SDK"
   default     = "databricks-sdk"
 }
+
+variable "cluster_requirements_path" {
+  type        = string
+  description = "Lock file (/Volumes/.../wheelhouse/<fingerprint>/requirements.lock) to install the cluster libraries from instead of PyPI"
+  default     = null
+}
@@ -39,6 +39,7 @@ locals {
   notebooks = {
     "rag" = "${var.notebooks_dir}/RAG.ipynb"
   }
+  package_files = fileset(var.package_dir, "**/*.py")
 }
 
 resource "databricks_notebook" "notebooks" {
@@ -49,3 +50,18 @@ resource "databricks_notebook" "notebooks" {
   language       = "PYTHON"
   content_base64 = filebase64(each.value)
 }
+
+# The notebook imports rag_model from its own folder and ships it with the model via code_paths.
+resource "databricks_workspace_file" "package" {
+  for_each = local.package_files
+
+  path   = "${var.workspace_base_path}/rag_model/${each.value}"
+  source = "${var.package_dir}/${each.value}"
+}
+
+# Deploy-time notebook settings (Vector Search endpoint, type and sync mode), read by the notebook's
+# first cell as widget defaults.
+resource "databricks_workspace_file" "config" {
+  path           = "${var.workspace_base_path}/rag_config.json"
+  content_base64 = base64encode(jsonencode(var.notebook_config))
+}
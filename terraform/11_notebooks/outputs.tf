@@ -1,3 +1,7 @@
 output "notebook_paths" {
   value = [for nb in databricks_notebook.notebooks : nb.path]
 }
+
+output "package_paths" {
+  value = [for f in databricks_workspace_file.package : f.path]
+}
@@ -9,8 +9,20 @@ variable "notebooks_dir" {
   default     = "../../notebooks"
 }
 
+variable "package_dir" {
+  type        = string
+  description = "Path to the local rag_model package uploaded next to the notebooks"
+  default     = "../../rag_model"
+}
+
 variable "workspace_base_path" {
   type        = string
   description = "Destination folder in the Databricks workspace"
   default     = "/Shared/generative-ai"
 }
+
+variable "notebook_config" {
+  type        = any
+  description = "Settings written to rag_config.json next to the notebook (vector_search_endpoint_name, vector_search_endpoint_type, vector_search_pipeline_type, vector_search_allow_endpoint_reuse, serving_workload_size, deployment_capacity)"
+  default     = {}
+}
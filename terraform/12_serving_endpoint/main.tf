@@ -35,6 +35,12 @@ provider "databricks" {
   auth_type                   = "azure-cli"
 }
 
+locals {
+  # Provisioned concurrency replaces the workload_size presets when max_provisioned_concurrency is set.
+  use_provisioned_concurrency = var.max_provisioned_concurrency != null
+  min_provisioned_concurrency = coalesce(var.min_provisioned_concurrency, var.scale_to_zero_enabled ? 0 : 4)
+}
+
 resource "databricks_model_serving" "main" {
   name = var.endpoint_name
 
@@ -43,9 +49,12 @@ resource "databricks_model_serving" "main" {
       name                 = var.served_model_name
       entity_name          = var.model_name
       entity_version       = var.model_version
-      workload_size        = var.workload_size
+      workload_type        = var.workload_type
+      workload_size        = local.use_provisioned_concurrency ? null : var.workload_size
+      min_provisioned_concurrency = local.use_provisioned_concurrency ? local.min_provisioned_concurrency : null
+      max_provisioned_concurrency = local.use_provisioned_concurrency ? var.max_provisioned_concurrency : null
       scale_to_zero_enabled = var.scale_to_zero_enabled
-      environment_vars = {
+      environment_vars = merge({
         DATABRICKS_HOST          = "https://${data.azurerm_databricks_workspace.main.workspace_url}"
         DATABRICKS_AUTH_TYPE     = "oauth"
         DATABRICKS_AZURE_RESOURCE_ID = data.azurerm_databricks_workspace.main.id
@@ -61,7 +70,16 @@ resource "databricks_model_serving" "main" {
         OPENAI_API_KEY           = "{{secrets/${var.secret_scope_name}/openai-api-key}}"
         OPENAI_API_VERSION       = "{{secrets/${var.secret_scope_name}/openai-api-version}}"
         OPENAI_DEPLOYMENT_NAME   = "{{secrets/${var.secret_scope_name}/openai-deployment-name}}"
-      }
+        RAG_AOAI_RPM             = tostring(var.aoai_deployment_capacity * var.aoai_requests_per_capacity_unit)
+        RAG_AOAI_TPM             = tostring(var.aoai_deployment_capacity * var.aoai_tokens_per_capacity_unit)
+        RAG_AOAI_MAX_WAIT_S      = tostring(var.aoai_max_wait_seconds)
+      }, {
+        # One JSON secret per extra Azure OpenAI deployment in the model's load-balancing pool.
+        for index, name in var.aoai_pool_secret_names : "RAG_AOAI_POOL_${index}" => "{{secrets/${var.secret_scope_name}/${name}}}"
+      }, var.answer_table_path != "" ? {
+        # Precomputed answers for head queries, checked before retrieval and chat.
+        RAG_ANSWER_TABLE_PATH = var.answer_table_path
+      } : {})
     }
 
     traffic_config {
@@ -71,4 +89,48 @@ resource "databricks_model_serving" "main" {
       }
     }
   }
+  lifecycle {
+    precondition {
+      condition     = !local.use_provisioned_concurrency || local.min_provisioned_concurrency <= var.max_provisioned_concurrency
+      error_message = "min_provisioned_concurrency must not exceed max_provisioned_concurrency."
+    }
+    precondition {
+      condition     = !(local.use_provisioned_concurrency && var.scale_to_zero_enabled && local.min_provisioned_concurrency > 0)
+      error_message = "scale_to_zero_enabled requires min_provisioned_concurrency = 0."
+    }
+  }
+}
+
+# Keep-warm pings during business hours: a scale-to-zero endpoint stays up while users are around
+# and still costs nothing overnight. Serverless, so each run only bills for the ping itself.
+resource "databricks_job" "keep_warm" {
+  count = var.keep_warm_enabled ? 1 : 0
+
+  name = "${var.endpoint_name}-keep-warm"
+
+  schedule {
+    quartz_cron_expression = var.keep_warm_cron
+    timezone_id            = var.keep_warm_timezone
+    pause_status           = "UNPAUSED"
+  }
+
+  max_concurrent_runs = 1
+  timeout_seconds     = 600
+
+  environment {
+    environment_key = "default"
+    spec {
+      client = "1"
+    }
+  }
+
+  task {
+    task_key        = "ping"
+    environment_key = "default"
+
+    spark_python_task {
+      python_file = var.keep_warm_script_path
+      parameters  = ["--endpoint", databricks_model_serving.main.name, "--once", "--always"]
+    }
+  }
 }
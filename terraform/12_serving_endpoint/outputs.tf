@@ -5,3 +5,7 @@ output "serving_endpoint_id" {
 output "serving_endpoint_name" {
   value = databricks_model_serving.main.name
 }
+
+output "keep_warm_job_id" {
+  value = try(databricks_job.keep_warm[0].id, null)
+}
@@ -63,6 +63,34 @@ variable "workload_size" {
   default     = "Small"
 }
 
+variable "workload_type" {
+  type        = string
+  description = "Serving compute type (CPU, GPU_SMALL, GPU_MEDIUM, GPU_LARGE, MULTIGPU_MEDIUM)"
+  default     = "CPU"
+}
+
+variable "min_provisioned_concurrency" {
+  type        = number
+  description = "Minimum concurrent requests kept provisioned (multiple of 4; 0 with scale-to-zero). Used with max_provisioned_concurrency instead of workload_size"
+  default     = null
+
+  validation {
+    condition     = var.min_provisioned_concurrency == null || (try(var.min_provisioned_concurrency % 4 == 0, false) && try(var.min_provisioned_concurrency >= 0, false))
+    error_message = "min_provisioned_concurrency must be a non-negative multiple of 4."
+  }
+}
+
+variable "max_provisioned_concurrency" {
+  type        = number
+  description = "Maximum concurrent requests the endpoint scales to (multiple of 4); null uses workload_size"
+  default     = null
+
+  validation {
+    condition     = var.max_provisioned_concurrency == null || (try(var.max_provisioned_concurrency % 4 == 0, false) && try(var.max_provisioned_concurrency >= 4, false))
+    error_message = "max_provisioned_concurrency must be a positive multiple of 4."
+  }
+}
+
 variable "scale_to_zero_enabled" {
   type        = bool
   description = "Enable scale-to-zero for the serving endpoint"
@@ -74,3 +102,63 @@ variable "traffic_percentage" {
   description = "Traffic percentage for the served model"
   default     = 100
 }
+
+variable "aoai_deployment_capacity" {
+  type        = number
+  description = "Azure OpenAI deployment capacity units (sets the model's client-side rate limiter)"
+  default     = 20
+}
+
+variable "aoai_tokens_per_capacity_unit" {
+  type        = number
+  description = "Tokens per minute granted per Azure OpenAI capacity unit"
+  default     = 1000
+}
+
+variable "aoai_requests_per_capacity_unit" {
+  type        = number
+  description = "Requests per minute granted per Azure OpenAI capacity unit"
+  default     = 6
+}
+
+variable "aoai_max_wait_seconds" {
+  type        = number
+  description = "Longest a request queues for Azure OpenAI quota before failing"
+  default     = 10
+}
+
+variable "aoai_pool_secret_names" {
+  type        = list(string)
+  description = "Secrets (in secret_scope_name) describing extra Azure OpenAI deployments for the model's load-balancing pool"
+  default     = []
+}
+
+variable "answer_table_path" {
+  type        = string
+  description = "Precomputed answer snapshot (local or /Volumes path) loaded by the model; empty to disable"
+  default     = ""
+}
+
+variable "keep_warm_enabled" {
+  type        = bool
+  description = "Create a scheduled serverless job that sends keep-warm health invocations (rag_model.keepwarm)"
+  default     = false
+}
+
+variable "keep_warm_cron" {
+  type        = string
+  description = "Quartz cron schedule of the keep-warm job (default: every 10 minutes, 08:00-17:50 Mon-Fri)"
+  default     = "0 0/10 8-17 ? * MON-FRI"
+}
+
+variable "keep_warm_timezone" {
+  type        = string
+  description = "Time zone of keep_warm_cron (Java time zone ID)"
+  default     = "UTC"
+}
+
+variable "keep_warm_script_path" {
+  type        = string
+  description = "Workspace path of rag_model/keepwarm.py (uploaded by the notebooks stack)"
+  default     = "/Shared/generative-ai/rag_model/keepwarm.py"
+}
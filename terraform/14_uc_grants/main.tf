@@ -84,3 +84,13 @@ resource "databricks_grants" "index_table" {
     privileges = ["SELECT"]
   }
 }
+
+resource "databricks_grants" "answer_volume" {
+  count  = var.answer_volume_name != null && var.answer_volume_name != "" ? 1 : 0
+  volume = var.answer_volume_name
+
+  grant {
+    principal  = local.principal_name
+    privileges = ["READ_VOLUME"]
+  }
+}
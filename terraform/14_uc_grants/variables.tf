@@ -38,3 +38,9 @@ variable "principal_name" {
   description = "Optional override for the principal name to grant (e.g. <appId>, dbx-sp, or servicePrincipal:<appId>)"
   default     = null
 }
+
+variable "answer_volume_name" {
+  type        = string
+  description = "Optional Unity Catalog volume (catalog.schema.volume) holding the precomputed answer snapshot"
+  default     = null
+}
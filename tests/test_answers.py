@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from rag_model.answers import AnswerTable, normalize_query, precompute_answers
+
+ENTRIES = [
+    {"query": "What is diabetes?", "answer": "A condition with high blood glucose."},
+    {"query": "Healthy eating tips for diabetes", "answer": "Vegetables, whole grains, lean protein."},
+]
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS   diabetes?! ") == "what is diabetes"
+
+
+def test_exact_match_ignores_case_and_punctuation():
+    match = AnswerTable(ENTRIES).lookup("what is DIABETES")
+    assert match["answer"] == ENTRIES[0]["answer"]
+    assert (match["match"], match["score"]) == ("exact", 1.0)
+
+
+def test_nearest_match_needs_min_similarity():
+    table = AnswerTable(ENTRIES, min_similarity=0.6)
+    match = table.lookup("healthy eating tips for people with diabetes")
+    assert match["match"] == "nearest"
+    assert match["answer"] == ENTRIES[1]["answer"]
+    assert 0.6 <= match["score"] < 1.0
+    assert table.lookup("how much exercise per week") is None
+    assert AnswerTable(ENTRIES, min_similarity=0.95).lookup("healthy eating tips for people with diabetes") is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    table = AnswerTable(ENTRIES, source_version=7, prompt_template="rag-faq@1")
+    loaded = AnswerTable.load(table.save(tmp_path / "answers" / "latest.json"), min_similarity=0.5)
+    assert len(loaded) == 2
+    assert loaded.source_version == 7
+    assert loaded.min_similarity == 0.5
+    assert loaded.rows()[0]["normalized_query"] == "what is diabetes"
+    assert loaded.rows()[0]["prompt_template"] == "rag-faq@1"
+
+
+def test_load_rejects_unknown_format(tmp_path):
+    path = tmp_path / "answers.json"
+    path.write_text('{"format_version": 99, "entries": []}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        AnswerTable.load(path)
+
+
+def test_precompute_answers_batches_distinct_queries():
+    batches = []
+
+    def predict(frame):
+        batches.append(len(frame))
+        return pd.DataFrame({"answer": [f"answer to {query}" for query in frame["query"]]})
+
+    entries = precompute_answers(predict, ["a", "b", "A?", "c"], batch_size=2)
+    assert batches == [2, 1]
+    assert [entry["answer"] for entry in entries] == ["answer to a", "answer to b", "answer to c"]
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from rag_model.aoai_pool import Deployment, DeploymentRouter, pool_configs_from_env
+from rag_model.ratelimit import RateLimiter
+
+
+class _Response:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class _APIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = _Response(headers)
+
+
+def _deployment(name, limiter=None):
+    return Deployment(name, client=None, deployment=name, limiter=limiter)
+
+
+def _calls(failures):
+    """
+    ``fn(deployment)`` that raises ``failures[name]`` (popped in order) and else returns the name.
+    """
+    calls = []
+
+    def fn(deployment):
+        calls.append(deployment.name)
+        errors = failures.get(deployment.name) or []
+        if errors:
+            raise errors.pop(0)
+        return deployment.name
+
+    return fn, calls
+
+
+def test_pool_configs_from_env():
+    env = {"RAG_AOAI_POOL_EAST": '{"deployment": "gpt"}', "RAG_AOAI_POOL_BAD": "{", "OTHER": "{}"}
+    assert pool_configs_from_env(env) == [{"deployment": "gpt", "name": "east"}]
+
+
+def test_fails_over_and_cools_down_the_failing_deployment():
+    primary, secondary = _deployment("primary"), _deployment("secondary")
+    primary.latency_s, secondary.latency_s = 0.1, 1.0
+    router = DeploymentRouter([primary, secondary], cooldown_s=30)
+    fn, calls = _calls({"primary": [_APIError(429)]})
+
+    result, deployment, _ = router.call(fn)
+    assert (result, deployment) == ("secondary", secondary)
+    assert calls == ["primary", "secondary"]
+    assert primary.cooldown_until > time.monotonic() + 20
+
+    # The faster deployment stays out of rotation while it cools down.
+    assert router.call(fn)[0] == "secondary"
+
+
+def test_retry_after_sets_the_cooldown():
+    primary, secondary = _deployment("primary"), _deployment("secondary")
+    primary.latency_s = 0.1
+    router = DeploymentRouter([primary, secondary], cooldown_s=30)
+    fn, _ = _calls({"primary": [_APIError(429, {"retry-after": "2"})]})
+    router.call(fn)
+    assert 1.5 < primary.cooldown_until - time.monotonic() <= 2.0
+
+
+def test_non_retryable_errors_are_raised():
+    router = DeploymentRouter([_deployment("primary"), _deployment("secondary")])
+    fn, calls = _calls({"primary": [_APIError(400)], "secondary": [_APIError(400)]})
+    with pytest.raises(_APIError):
+        router.call(fn)
+    assert len(calls) == 1
+
+
+def test_single_deployment_backs_off_before_retrying():
+    router = DeploymentRouter([_deployment("only")], cooldown_s=0.2)
+    fn, calls = _calls({"only": [_APIError(503)]})
+    start = time.monotonic()
+    assert router.call(fn, max_retries=2)[0] == "only"
+    assert time.monotonic() - start >= 0.15
+    assert calls == ["only", "only"]
+
+
+def test_gives_up_after_max_retries():
+    router = DeploymentRouter([_deployment("only")], cooldown_s=0.01)
+    fn, calls = _calls({"only": [_APIError(500) for _ in range(5)]})
+    with pytest.raises(_APIError):
+        router.call(fn, max_retries=2)
+    assert len(calls) == 3
+
+
+def test_prefers_the_deployment_with_quota():
+    # "busy" is faster but has no quota left, so the call goes to "idle" without waiting.
+    busy = _deployment("busy", RateLimiter(requests_per_minute=6, burst_s=10.0))
+    busy.limiter.acquire()
+    busy.latency_s = 0.05
+    idle = _deployment("idle", RateLimiter(requests_per_minute=600))
+    idle.latency_s = 0.5
+    router = DeploymentRouter([busy, idle], max_wait_s=0.5)
+    fn, _ = _calls({})
+    result, _, waited = router.call(fn)
+    assert result == "idle"
+    assert waited < 0.05
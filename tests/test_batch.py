@@ -0,0 +1,91 @@
+import functools
+import os
+import uuid
+
+import pandas as pd
+import pytest
+
+from rag_model import batch
+from rag_model.bench.harness import DEFAULT_CSV
+from rag_model.bench.stubs import AzureOpenAIStub, VectorSearchStub
+from rag_model.local_index import read_csv_records
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class EchoModel:
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, model_input):
+        self.calls += 1
+        return pd.DataFrame({"answer": [f"answer: {query}" for query in model_input["query"]]})
+
+
+def _batches(*chunks):
+    return iter([pd.Series(chunk) for chunk in chunks])
+
+
+def test_predict_batches_keeps_row_order_and_reuses_the_model():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return EchoModel()
+
+    key = f"echo-{uuid.uuid4()}"
+    queries = [f"q{i}" for i in range(10)]
+    out = list(batch.predict_batches(_batches(queries[:6], queries[6:]), loader, key, max_concurrency=4))
+    assert [series.tolist() for series in out] == [[f"answer: {q}" for q in queries[:6]], [f"answer: {q}" for q in queries[6:]]]
+    # A second UDF call in the same worker reuses the loaded model.
+    list(batch.predict_batches(_batches(["again"]), loader, key))
+    assert len(loads) == 1
+    assert batch._MODELS[key].calls == 11
+
+
+def test_predict_batches_takes_quota_per_row():
+    key = f"echo-{uuid.uuid4()}"
+    list(batch.predict_batches(_batches(["a", "b", "c"]), EchoModel, key, requests_per_minute=60, tokens_per_minute=6000, tokens_per_query=100))
+    limiter = batch._LIMITERS[(key, 60, 6000)]
+    # 10 s buckets: 10 requests and 1000 tokens, minus three calls (plus a few ms of refill).
+    assert 7 <= limiter.requests.level < 7.5
+    assert 700 <= limiter.tokens.level < 710
+
+
+def test_predict_batches_with_the_stubbed_model():
+    records = read_csv_records(DEFAULT_CSV)
+    topics = [record["Topic"] for record in records[:5]]
+    with AzureOpenAIStub(latency="const:5") as aoai, VectorSearchStub(records, latency="const:5") as vs:
+        loader = functools.partial(batch.load_stub_model, aoai.url, vs.url)
+        (answers,) = list(batch.predict_batches(_batches(topics), loader, f"stub-{uuid.uuid4()}", max_concurrency=2))
+        assert aoai.requests == len(topics)
+    assert len(answers) == len(topics)
+    assert all(isinstance(answer, str) and answer for answer in answers)
+
+
+def test_score_queries_in_local_spark():
+    pytest.importorskip("pyspark")
+    from pyspark.sql import SparkSession
+
+    # Local-mode Python workers inherit the driver's environment and import rag_model from the repo.
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")]))
+    spark = SparkSession.builder.master("local[2]").appName("rag-batch-test").getOrCreate()
+    records = read_csv_records(DEFAULT_CSV)
+    topics = [records[i % len(records)]["Topic"] for i in range(12)]
+    try:
+        with AzureOpenAIStub(latency="const:5") as aoai, VectorSearchStub(records, latency="const:5") as vs:
+            queries = spark.createDataFrame(pd.DataFrame({"id": range(len(topics)), "query": topics}))
+            scored = batch.score_queries(
+                queries,
+                model_loader=functools.partial(batch.load_stub_model, aoai.url, vs.url),
+                num_partitions=2,
+                max_concurrency_per_task=2,
+                requests_per_minute=6000,
+            ).toPandas()
+            assert aoai.requests == len(topics)
+    finally:
+        spark.stop()
+    scored = scored.sort_values("id")
+    assert scored["query"].tolist() == topics
+    assert scored["answer"].notna().all()
+    assert (scored["answer"].str.len() > 0).all()
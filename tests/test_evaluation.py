@@ -0,0 +1,67 @@
+import pytest
+
+from rag_model.evaluation import EvaluationGateError, EvaluationLimits, EvaluationReport, check, flatten_metrics
+
+
+def _metrics(**values):
+    return {f"eval_{name}": value for name, value in values.items()}
+
+
+def test_passes_within_limits():
+    limits = EvaluationLimits(min_recall={1: 0.8}, min_mrr=0.8, max_p95_ms={"total": 3000}, max_tokens_per_answer=500)
+    metrics = _metrics(recall_at_1=0.9, mrr=0.92, total_p95_ms=1200, tokens_per_answer=400, error_rate=0.0)
+    assert check(metrics, limits) == []
+
+
+def test_absolute_limits():
+    limits = EvaluationLimits(min_recall={1: 0.8, 5: 0.95}, min_mrr=0.8, max_p95_ms={"total": 3000}, max_tokens_per_answer=500)
+    metrics = _metrics(recall_at_1=0.7, recall_at_5=0.99, mrr=0.75, total_p95_ms=3500, tokens_per_answer=600, error_rate=0.1)
+    assert check(metrics, limits) == [
+        "recall@1 0.700 < 0.800",
+        "MRR 0.750 < 0.800",
+        "total p95 3500 ms > 3000 ms",
+        "tokens/answer 600 > 500",
+        "error rate 10.0% > 0.0%",
+    ]
+
+
+def test_missing_metrics_are_not_violations():
+    limits = EvaluationLimits(min_recall={10: 0.9}, max_p95_ms={"chat": 100})
+    assert check(_metrics(recall_at_1=0.5), limits) == []
+
+
+def test_regressions_against_baseline():
+    limits = EvaluationLimits()
+    baseline = _metrics(recall_at_3=0.95, mrr=0.90, total_p95_ms=1000, retrieve_p95_ms=100, tokens_per_answer=400, rerank_p95_ms=1)
+    metrics = _metrics(recall_at_3=0.90, mrr=0.89, total_p95_ms=1300, retrieve_p95_ms=110, tokens_per_answer=600, rerank_p95_ms=50)
+    violations = check(metrics, limits, baseline)
+    assert violations == [
+        "recall_at_3 dropped 0.950 -> 0.900",
+        "total_p95_ms regressed 1000 -> 1300 ms (> +25%)",
+        "tokens/answer regressed 400 -> 600 (> +25%)",
+    ]
+
+
+def test_disabled_regression_checks():
+    limits = EvaluationLimits(max_recall_drop=None, max_p95_increase=None, max_tokens_increase=None)
+    baseline = _metrics(recall_at_3=0.95, total_p95_ms=1000, tokens_per_answer=400)
+    metrics = _metrics(recall_at_3=0.5, total_p95_ms=5000, tokens_per_answer=4000)
+    assert check(metrics, limits, baseline) == []
+
+
+def test_flatten_metrics_and_report():
+    retrieval = {"queries": 10, "recall_at_1": 0.8, "mrr": 0.85, "by_variant": {"keywords": {"queries": 5, "mrr": 0.7}}}
+    latency = {"requests": 4, "errors": 1, "stages": {"total": {"p95_ms": 900.0, "p99_ms": None}}, "tokens": {"tokens_per_answer": 300.0}}
+    metrics = flatten_metrics(retrieval, latency)
+    assert metrics == {
+        "eval_recall_at_1": 0.8,
+        "eval_mrr": 0.85,
+        "eval_keywords_mrr": 0.7,
+        "eval_total_p95_ms": 900.0,
+        "eval_tokens_per_answer": 300.0,
+        "eval_error_rate": 0.25,
+    }
+    report = EvaluationReport(retrieval, latency, check(metrics, EvaluationLimits(max_error_rate=0.1)))
+    assert not report.passed
+    with pytest.raises(EvaluationGateError, match="error rate 25.0%"):
+        report.raise_for_violations()
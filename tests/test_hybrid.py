@@ -0,0 +1,67 @@
+from rag_model.hybrid import HybridIndex, reciprocal_rank_fusion
+from rag_model.lexical import BM25Index
+from rag_model.results import build_result, result_rows
+
+
+def _hits(*topics):
+    return [{"Topic": topic, "source": "list"} for topic in topics]
+
+
+def test_rrf_orders_by_summed_reciprocal_rank():
+    fused = reciprocal_rank_fusion([_hits("a", "b", "c"), _hits("b", "c", "d")], key="Topic", k=60)
+    assert [row["Topic"] for row, _ in fused] == ["b", "c", "a", "d"]
+    scores = dict((row["Topic"], score) for row, score in fused)
+    assert scores["b"] == 1 / 62 + 1 / 61
+    assert scores["a"] == 1 / 61
+
+
+def test_rrf_keeps_row_values_from_first_list():
+    first = [{"Topic": "a", "Description": "vector"}]
+    second = [{"Topic": "a", "Description": "lexical"}]
+    (row, _), = reciprocal_rank_fusion([first, second], key="Topic")
+    assert row["Description"] == "vector"
+
+
+class _VectorIndex:
+    def __init__(self, topics):
+        self.topics = topics
+        self.calls = []
+
+    def describe(self):
+        return {"name": "vector"}
+
+    def similarity_search(self, query_text=None, columns=None, num_results=10, **kwargs):
+        self.calls.append({"query_text": query_text, "num_results": num_results, **kwargs})
+        rows = [[topic if col == "Topic" else "" for col in columns] for topic in self.topics[:num_results]]
+        return build_result(columns, rows, [1.0 - 0.1 * i for i in range(len(rows))])
+
+
+class _FailingLexicalIndex:
+    def similarity_search(self, **kwargs):
+        raise RuntimeError("lexical index unavailable")
+
+
+def test_hybrid_fuses_vector_and_bm25():
+    lexical = BM25Index.from_records(
+        [{"Topic": "Insulin", "Description": "insulin dosing"}, {"Topic": "Diet", "Description": "carbs and fiber"}],
+        columns=["Topic", "Description"],
+    )
+    vector = _VectorIndex(["Exercise", "Diet"])
+    index = HybridIndex(vector, lexical, candidates=5)
+    topics = [row["Topic"] for row in result_rows(index.similarity_search("carbs fiber", columns=["Topic"], num_results=3))]
+    # "Diet" is in both lists, so it outranks the vector-only top hit; BM25 skips "Insulin".
+    assert topics == ["Diet", "Exercise"]
+    assert vector.calls[0]["num_results"] == 5
+
+
+def test_hybrid_precomputed_vector_replaces_query_text():
+    vector = _VectorIndex(["Diet"])
+    HybridIndex(vector, _FailingLexicalIndex()).similarity_search("carbs", columns=["Topic"], query_vector=[0.1, 0.2])
+    assert vector.calls[0]["query_text"] is None
+    assert vector.calls[0]["query_vector"] == [0.1, 0.2]
+
+
+def test_hybrid_falls_back_to_vector_results_when_lexical_fails():
+    index = HybridIndex(_VectorIndex(["Diet", "Exercise"]), _FailingLexicalIndex())
+    rows = result_rows(index.similarity_search("carbs", columns=["Topic"], num_results=2))
+    assert [row["Topic"] for row in rows] == ["Diet", "Exercise"]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from rag_model.embeddings import HashingEmbedder, normalize_rows
+from rag_model.local_index import LocalVectorIndex, build_snapshot, snapshot_from_records, top_k
+
+ROWS = 2000
+DIM = 32
+K = 10
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    # Clustered vectors, like embeddings of a topical FAQ; queries come from the same clusters.
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, DIM))
+    vectors = normalize_rows(centers[rng.integers(0, 20, ROWS)] + 0.3 * rng.normal(size=(ROWS, DIM)))
+    queries = normalize_rows(centers[rng.integers(0, 20, 50)] + 0.3 * rng.normal(size=(50, DIM)))
+    truth = [set(np.argsort(-(vectors @ q))[:K].tolist()) for q in queries]
+    return vectors, queries, truth
+
+
+def _index(tmp_path, vectors, **kwargs):
+    load_kwargs = {key: kwargs.pop(key) for key in ("nprobe", "rescore_factor") if key in kwargs}
+    build_snapshot(tmp_path, ["id"], [[i] for i in range(len(vectors))], vectors, "custom", **kwargs)
+    return LocalVectorIndex.load(tmp_path, embed_fn=HashingEmbedder(DIM), **load_kwargs)
+
+
+def _recall(index, queries, truth) -> float:
+    return float(np.mean([len(set(index.search_vector(q, K)[0].tolist()) & t) / K for q, t in zip(queries, truth)]))
+
+
+def test_top_k_matches_full_sort():
+    scores = np.random.default_rng(1).normal(size=500)
+    assert top_k(scores, 7).tolist() == np.argsort(-scores)[:7].tolist()
+    assert top_k(scores, 1000).tolist() == np.argsort(-scores).tolist()
+    assert top_k(scores, 0).tolist() == []
+
+
+def test_flat_search_is_exact(tmp_path, corpus):
+    vectors, queries, truth = corpus
+    index = _index(tmp_path, vectors)
+    for q, t in zip(queries, truth):
+        ids, scores = index.search_vector(q, K)
+        assert set(ids.tolist()) == t
+        assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_ivf_recall(tmp_path, corpus):
+    vectors, queries, truth = corpus
+    index = _index(tmp_path, vectors, index_type="ivf")
+    assert _recall(index, queries, truth) >= 0.9
+    every_list = LocalVectorIndex.load(tmp_path, embed_fn=HashingEmbedder(DIM), nprobe=index.meta["ivf"]["nlist"])
+    assert _recall(every_list, queries, truth) == 1.0
+
+
+@pytest.mark.parametrize("quantization", ["sq8", "pq"])
+@pytest.mark.parametrize("index_type", ["flat", "ivf"])
+def test_quantized_recall_with_rescoring(tmp_path, corpus, index_type, quantization):
+    vectors, queries, truth = corpus
+    index = _index(tmp_path, vectors, index_type=index_type, quantization=quantization)
+    assert index.describe()["quantization"] == quantization
+    assert _recall(index, queries, truth) >= 0.95
+
+
+def test_sq8_scores_without_rescoring_stay_close(tmp_path, corpus):
+    vectors, queries, truth = corpus
+    index = _index(tmp_path, vectors, quantization="sq8", rescore_factor=0)
+    assert _recall(index, queries, truth) >= 0.8
+
+
+def test_similarity_search_by_text(tmp_path):
+    records = [
+        {"Topic": "What is diabetes?", "Description": "Diabetes is a disease where blood glucose is too high."},
+        {"Topic": "Healthy eating", "Description": "Eat vegetables, whole grains and lean protein."},
+        {"Topic": "Exercise", "Description": "Physical activity lowers blood glucose."},
+    ]
+    snapshot_from_records(tmp_path, records, HashingEmbedder(64))
+    index = LocalVectorIndex.load(tmp_path)
+    result = index.similarity_search(query_text="should I eat whole grains and vegetables", columns=["Topic"], num_results=2)
+    assert result["result"]["data_array"][0][:1] == ["Healthy eating"]
+    assert result["result"]["row_count"] == 2
+    with pytest.raises(ValueError):
+        index.similarity_search(query_text="diabetes", columns=["Missing"])
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from rag_model.ratelimit import RateLimiter, RateLimitTimeout, estimate_tokens, quota_from_capacity, retry_after_s
+
+
+def test_quota_from_capacity():
+    assert quota_from_capacity(2) == (12.0, 2000.0)
+
+
+def test_estimate_tokens_counts_prompt_chars_and_completion():
+    assert estimate_tokens([{"content": "x" * 400}, {"content": None}], completion_tokens=100) == 200
+
+
+def test_retry_after_headers():
+    assert retry_after_s({"retry-after-ms": "250"}) == 0.25
+    assert retry_after_s({"retry-after": "2"}) == 2.0
+    assert retry_after_s({"retry-after": "soon"}) is None
+    assert retry_after_s(None) is None
+
+
+def test_acquire_within_burst_is_immediate_then_times_out():
+    # 60 RPM with a 2 s burst holds two requests.
+    limiter = RateLimiter(requests_per_minute=60, burst_s=2.0)
+    assert limiter.acquire() < 0.01
+    assert limiter.acquire() < 0.01
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(max_wait_s=0)
+
+
+def test_acquire_waits_for_refill():
+    limiter = RateLimiter(requests_per_minute=600, burst_s=0.1)
+    limiter.acquire()
+    start = time.monotonic()
+    waited = limiter.acquire(max_wait_s=1.0)
+    assert 0.05 < waited < 0.5
+    assert time.monotonic() - start >= waited
+
+
+def test_settle_refunds_overestimated_tokens():
+    # 600 TPM with a 10 s burst holds 100 tokens.
+    limiter = RateLimiter(tokens_per_minute=600, burst_s=10.0)
+    limiter.acquire(tokens=80)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(tokens=80, max_wait_s=0)
+    limiter.settle(estimated=80, actual=10)
+    limiter.acquire(tokens=80, max_wait_s=0)
+
+
+def test_settle_charges_underestimated_tokens():
+    limiter = RateLimiter(tokens_per_minute=600, burst_s=10.0)
+    limiter.acquire(tokens=10)
+    limiter.settle(estimated=10, actual=60)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(tokens=80, max_wait_s=0)
+
+
+def test_penalize_and_headers_cap_the_buckets():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    assert limiter.headroom() == 1.0
+    limiter.observe_headers({"x-ratelimit-remaining-requests": "0"})
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(tokens=1, max_wait_s=0)
+    limiter.penalize(5.0)
+    assert limiter.headroom() == 0.0
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(tokens=1, max_wait_s=1.0)
@@ -0,0 +1,114 @@
+import urllib.error
+
+import pytest
+
+from rag_model.rollout import BlueGreenRollout, RolloutError
+
+
+class FakeServing:
+    """
+    In-memory serving endpoint behind the ``api(method, path, payload=None, timeout=None)`` caller.
+    ``latency_ms`` / ``failures`` are per served entity; ``put_errors`` are raised by config updates in
+    order (None lets that update through).
+    """
+
+    def __init__(self, latency_ms=None, failures=None, put_errors=None):
+        self.entities = [{"name": "rag-6", "entity_name": "main.rag.rag_model", "entity_version": "6", "workload_size": "Small"}]
+        self.traffic = {"rag-6": 100}
+        self.latency_ms = latency_ms or {}
+        self.failures = failures or {}
+        self.put_errors = list(put_errors or [])
+        self.invocations = []
+        self.clock = 0.0
+
+    def __call__(self, method, path, payload=None, timeout=None):
+        if method == "GET":
+            return {
+                "state": {"ready": "READY", "config_update": "NOT_UPDATING"},
+                "config": {"served_entities": [dict(entity, state={"deployment": "DEPLOYMENT_READY"}) for entity in self.entities]},
+            }
+        if method == "PUT":
+            error = self.put_errors.pop(0) if self.put_errors else None
+            if error is not None:
+                raise error
+            self.entities = payload["served_entities"]
+            self.traffic = {route["served_model_name"]: route["traffic_percentage"] for route in payload["traffic_config"]["routes"]}
+            return {}
+        served = path.split("/served-models/")[1].split("/")[0]
+        self.invocations.append((served, timeout))
+        if self.failures.get(served):
+            raise self.failures[served]
+        self.clock += self.latency_ms.get(served, 100) / 1000.0
+        return {"predictions": [{"answer": "ok"}]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Synthetic latencies come from the fake's clock instead of real sleeps.
+    def use(fake):
+        monkeypatch.setattr("rag_model.rollout.time.perf_counter", lambda: fake.clock)
+        return fake
+
+    return use
+
+
+def _rollout(fake, **kwargs):
+    kwargs = {"steps": (50, 100), "warmup_queries": 2, "probe_queries": 4, "invoke_timeout_s": 5, "log": lambda *args: None, **kwargs}
+    return BlueGreenRollout(fake, "rag-endpoint", ["what is diabetes?", "carbs?"], **kwargs)
+
+
+def test_promotes_a_healthy_version(clock):
+    fake = clock(FakeServing())
+    result = _rollout(fake).run("rag-7", "main.rag.rag_model", "7")
+    assert result.promoted
+    assert [step.traffic for step in result.steps] == [0, 50, 100]
+    assert [entity["name"] for entity in fake.entities] == ["rag-7"]
+    assert fake.traffic == {"rag-7": 100}
+    assert fake.entities[0]["workload_size"] == "Small"
+    assert {timeout for _, timeout in fake.invocations} == {5}
+
+
+def test_rolls_back_a_slower_version(clock):
+    fake = clock(FakeServing(latency_ms={"rag-6": 100, "rag-7": 800}))
+    result = _rollout(fake).run("rag-7", "main.rag.rag_model", "7")
+    assert result.status == "rolled_back"
+    assert result.reason == "regressed at 0% traffic"
+    assert fake.traffic == {"rag-6": 100}
+    assert [entity["name"] for entity in fake.entities] == ["rag-6"]
+
+
+def test_small_absolute_slowdown_is_not_a_regression(clock):
+    # +50% but only 50 ms slower: under min_p95_delta_ms.
+    fake = clock(FakeServing(latency_ms={"rag-6": 100, "rag-7": 150}))
+    assert _rollout(fake).run("rag-7", "main.rag.rag_model", "7").promoted
+
+
+def test_rolls_back_when_green_fails_to_warm(clock):
+    fake = clock(FakeServing(failures={"rag-7": RuntimeError("503 Service Unavailable")}))
+    result = _rollout(fake).run("rag-7", "main.rag.rag_model", "7")
+    assert result.status == "rolled_back"
+    assert "Warm-up query to rag-7 failed" in result.reason
+    assert fake.traffic == {"rag-6": 100}
+
+
+def test_rolls_back_on_network_errors(clock):
+    # The 50% shift fails with an OSError from urllib, not a RuntimeError.
+    fake = clock(FakeServing(put_errors=[None, urllib.error.URLError("connection reset")]))
+    result = _rollout(fake).run("rag-7", "main.rag.rag_model", "7")
+    assert result.status == "rolled_back"
+    assert "connection reset" in result.reason
+    assert fake.traffic == {"rag-6": 100}
+    assert [entity["name"] for entity in fake.entities] == ["rag-6"]
+
+
+def test_same_version_is_unchanged_and_leftover_green_is_an_error(clock):
+    fake = clock(FakeServing())
+    assert _rollout(fake).run("rag-6b", "main.rag.rag_model", "6").status == "unchanged"
+    fake.entities.append(dict(fake.entities[0], name="rag-7", entity_version="7"))
+    with pytest.raises(RolloutError):
+        _rollout(fake).run("rag-8", "main.rag.rag_model", "8")
+
+
+def test_steps_must_end_at_100():
+    with pytest.raises(ValueError):
+        BlueGreenRollout(FakeServing(), "rag-endpoint", ["q"], steps=(10, 50))
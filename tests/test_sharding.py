@@ -0,0 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rag_model.metrics import MetricsRegistry
+from rag_model.results import build_result, result_rows
+from rag_model.sharding import IndexShard, NoShardAvailable, ShardedIndex, normalize_scores, parse_shards
+
+
+class _Shard:
+    def __init__(self, hits, delay_s=0.0, error=None):
+        self.hits = hits
+        self.delay_s = delay_s
+        self.error = error
+        self.calls = 0
+
+    def similarity_search(self, query_text=None, columns=None, num_results=10, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay_s)
+        if self.error:
+            raise self.error
+        hits = self.hits[:num_results]
+        return build_result(columns, [[topic] for topic, _ in hits], [score for _, score in hits])
+
+
+def _sharded(indexes, **kwargs):
+    shards = kwargs.pop("shards", None) or [IndexShard(name, index=name) for name in indexes]
+    return ShardedIndex(shards, indexes, **kwargs)
+
+
+def _topics(result):
+    return [row["Topic"] for row in result_rows(result)]
+
+
+def test_merges_shards_by_score():
+    index = _sharded({"a": _Shard([("a1", 0.9), ("a2", 0.5)]), "b": _Shard([("b1", 0.7), ("b2", 0.6)])})
+    result = index.similarity_search("q", columns=["Topic"], num_results=3)
+    assert _topics(result) == ["a1", "b1", "b2"]
+
+
+def test_minmax_rescales_each_shard():
+    assert normalize_scores([2.0, 4.0, 3.0], "minmax") == [0.0, 1.0, 0.5]
+    index = _sharded({"a": _Shard([("a1", 0.9), ("a2", 0.8)]), "b": _Shard([("b1", 0.02), ("b2", 0.01)])}, score_norm="minmax")
+    # Each shard's best hit scores 1.0; raw score breaks the tie.
+    assert _topics(index.similarity_search("q", columns=["Topic"], num_results=2)) == ["a1", "b1"]
+
+
+def test_slow_shard_is_skipped_and_counted():
+    registry = MetricsRegistry()
+    index = _sharded({"fast": _Shard([("f1", 0.5)]), "slow": _Shard([("s1", 0.9)], delay_s=1.0)}, timeout_ms=100, registry=registry)
+    start = time.perf_counter()
+    assert _topics(index.similarity_search("q", columns=["Topic"])) == ["f1"]
+    assert time.perf_counter() - start < 0.5
+    assert registry.snapshot()["counters"]["shard_timeouts_total"] == 1
+
+
+def test_failing_shard_is_skipped_and_all_failing_raises():
+    registry = MetricsRegistry()
+    index = _sharded({"ok": _Shard([("o1", 0.5)]), "bad": _Shard([], error=RuntimeError("boom"))}, registry=registry)
+    assert _topics(index.similarity_search("q", columns=["Topic"])) == ["o1"]
+    assert registry.snapshot()["counters"]["shard_errors_total"] == 1
+    with pytest.raises(NoShardAvailable):
+        _sharded({"bad": _Shard([], error=RuntimeError("boom"))}).similarity_search("q", columns=["Topic"])
+
+
+def test_queueing_does_not_count_against_the_timeout():
+    index = _sharded({"a": _Shard([("a1", 0.5)], delay_s=0.2), "b": _Shard([("b1", 0.4)], delay_s=0.2)}, timeout_ms=600)
+
+    def search(_):
+        return _topics(index.similarity_search("q", columns=["Topic"], num_results=2))
+
+    with ThreadPoolExecutor(max_workers=24) as pool:
+        assert all(topics == ["a1", "b1"] for topics in pool.map(search, range(24)))
+
+
+def test_routes_by_tenant_and_keywords():
+    shards = parse_shards(
+        '[{"name": "faq", "index": "faq"},'
+        ' {"name": "diet", "index": "diet", "keywords": ["carb"]},'
+        ' {"name": "acme", "index": "acme", "tenant": "acme"}]'
+    )
+    indexes = {name: _Shard([(name, 0.5)]) for name in ("faq", "diet", "acme")}
+    index = ShardedIndex(shards, indexes, routing="keywords")
+    assert [shard.name for shard in index.route("how many carbs")] == ["faq", "diet"]
+    assert [shard.name for shard in index.route("what is diabetes", tenant="acme")] == ["faq", "diet", "acme"]
+    assert sorted(_topics(index.similarity_search("carbs per meal", columns=["Topic"]))) == ["diet", "faq"]
+    assert indexes["acme"].calls == 0
+
+
+def test_parse_shards_rejects_duplicates_and_unknown_keys():
+    with pytest.raises(ValueError):
+        parse_shards([{"name": "a", "index": "x"}, {"name": "a", "index": "y"}])
+    with pytest.raises(ValueError):
+        parse_shards([{"name": "a", "index": "x", "region": "eu"}])
+    assert parse_shards("") == []